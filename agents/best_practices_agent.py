@@ -1,5 +1,5 @@
 from agents.base_agent import BaseAgent
-from typing import Dict, Any
+from models.agent_models import BestPracticesResponse
 
 class BestPracticesAgent(BaseAgent):
     """Agent for adding technical best practices"""
@@ -7,12 +7,12 @@ class BestPracticesAgent(BaseAgent):
     def __init__(self):
         super().__init__("Best Practices Agent")
     
-    def execute(self) -> Dict[str, Any]:
+    def execute(self) -> BestPracticesResponse:
         """Add best practices enhancement flag"""
         detail = "Enhanced response with step-by-step guidance, warnings, and industry best practices."
         
-        return {
-            "agent": self.name,
-            "enhancement": "best_practices",
-            "detail": detail
-        }
+        return BestPracticesResponse(
+            agent_name=self.name,
+            detail=detail,
+            enhancement="best_practices"
+        )
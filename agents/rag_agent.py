@@ -1,19 +1,27 @@
 from agents.base_agent import BaseAgent
+from agents.response_agent import is_document_display_request
 from models.agent_models import RAGResponse
 from services.vector_db_service import VectorDBService
+from services.rerank_service import RerankService
+from config.settings import RerankConfig, VectorDBConfig
+from typing import Optional, Dict, Any
 
 class RAGAgent(BaseAgent):
     """Agent for retrieving relevant documents"""
     
-    def __init__(self, vector_db_service: VectorDBService):
+    def __init__(self, vector_db_service: VectorDBService,
+                 rerank_service: Optional[RerankService] = None):
         super().__init__("RAG Agent")
         self.vector_db = vector_db_service
+        self.rerank_service = rerank_service
     
-    def execute(self, query: str) -> RAGResponse:
-        """Retrieve documents from vector database"""
+    def execute(self, query: str, tenant: Optional[str] = None,
+                filters: Optional[Dict[str, Any]] = None) -> RAGResponse:
+        """Retrieve documents from vector database, limited to chunks matching the metadata filters"""
         documents = []
+        query_embedding = None
         
-        if not self.vector_db or not self.vector_db.collection:
+        if not self.vector_db or not self.vector_db.get_collection(tenant):
             detail = "ERROR: Vector database not initialized!"
             return RAGResponse(
                 agent_name=self.name,
@@ -22,18 +30,77 @@ class RAGAgent(BaseAgent):
             )
         
         try:
-            documents = self.vector_db.get_all_documents()
-            
-            if documents:
-                detail = f"✓ Retrieved ALL {len(documents)} document chunks for complete context"
+            if is_document_display_request(query):
+                # The Response Agent browses the corpus page by page; fetching it all here is wasted
+                stats = self.vector_db.get_corpus_stats(tenant)
+                detail = (f"✓ Document browse request: {stats['chunks']} chunks across "
+                          f"{len(stats['sources'])} file(s), chunk text not retrieved")
+            elif self.rerank_service:
+                query_embedding = self.vector_db.encode_query(query)
+                documents, detail = self._retrieve_reranked(query, query_embedding, tenant, filters)
             else:
-                detail = "ERROR: No documents in database. Please upload and process PDF documents."
+                # A similarity search, so repeated queries are served by the retrieval cache
+                query_embedding = self.vector_db.encode_query(query)
+                candidates = self.vector_db.query_with_scores(
+                    query, VectorDBConfig.TOP_K, query_embedding=query_embedding,
+                    tenant=tenant, filters=filters
+                )
+                expanded = self.vector_db.expand_neighbors(
+                    candidates, VectorDBConfig.NEIGHBOR_WINDOW, tenant, filters
+                )
+                documents = [candidate["document"] for candidate in expanded]
+                
+                if candidates and filters:
+                    detail = f"✓ Retrieved top {len(candidates)} document chunks matching {filters}"
+                elif candidates:
+                    detail = f"✓ Retrieved top {len(candidates)} document chunks by similarity"
+                else:
+                    detail = "ERROR: No documents in database. Please upload and process PDF documents."
+                detail += self._neighbor_summary(candidates, expanded)
         
         except Exception as e:
             detail = f"ERROR: {str(e)}"
         
+        cache_stats = self.vector_db.get_retrieval_cache_stats()
+        if cache_stats and cache_stats["hits"] + cache_stats["misses"]:
+            detail += (f" | Retrieval cache: {cache_stats['hit_rate']:.0%} hit rate, "
+                       f"{cache_stats['saved_ms']:.0f}ms saved")
+        
         return RAGResponse(
             agent_name=self.name,
             detail=detail,
-            documents=documents
+            documents=documents,
+            query_embedding=query_embedding
+        )
+    
+    def _retrieve_reranked(self, query: str, query_embedding, tenant: Optional[str],
+                           filters: Optional[Dict[str, Any]] = None):
+        """Retrieve top candidates by similarity, keep the best N after reranking and add their neighbors"""
+        candidates = self.vector_db.query_with_scores(
+            query, RerankConfig.CANDIDATE_COUNT, query_embedding=query_embedding,
+            tenant=tenant, filters=filters
         )
+        if not candidates:
+            return [], "ERROR: No documents in database. Please upload and process PDF documents."
+        
+        kept, stats = self.rerank_service.rerank(
+            query, candidates, self.vector_db.corpus_key(tenant)
+        )
+        expanded = self.vector_db.expand_neighbors(kept, VectorDBConfig.NEIGHBOR_WINDOW, tenant, filters)
+        documents = [candidate["document"] for candidate in expanded]
+        
+        if stats["skipped"]:
+            detail = (f"✓ Retrieved top {len(kept)} of {stats['candidates']} candidates "
+                      f"(dense scores decisive, rerank skipped)")
+        else:
+            detail = (f"✓ Reranked {stats['candidates']} candidates → kept top {len(kept)} chunks "
+                      f"| Scored: {stats['scored']}, cached: {stats['cache_hits']}, "
+                      f"trimmed: {stats['trimmed']} | {stats['elapsed_ms']:.0f}ms")
+        return documents, detail + self._neighbor_summary(kept, expanded)
+    
+    @staticmethod
+    def _neighbor_summary(hits, expanded) -> str:
+        """Detail suffix counting the neighbor chunks added around the hits"""
+        if len(expanded) <= len(hits):
+            return ""
+        return f" | +{len(expanded) - len(hits)} neighbor chunks (±{VectorDBConfig.NEIGHBOR_WINDOW})"
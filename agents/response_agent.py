@@ -1,19 +1,42 @@
 from agents.base_agent import BaseAgent
 from models.agent_models import ResponseAgentResponse
 from services.aws_service import AWSService
-from typing import List, Optional
+from services.context_compressor import ContextCompressor
+from services.model_router import RoutingDecision
+from services.vector_db_service import VectorDBService
+from typing import Callable, List, Optional
+
+DISPLAY_TERMS = ['display document', 'show document', 'what documents', 'document content']
+DISPLAY_CHUNK_LIMIT = 10
+
+def is_document_display_request(query: str) -> bool:
+    """Whether the query asks to browse the uploaded documents rather than answer from them"""
+    query_lower = query.lower()
+    return any(term in query_lower for term in DISPLAY_TERMS)
 
 class ResponseAgent(BaseAgent):
     """Agent for building final response using LLM"""
     
-    def __init__(self, aws_service: AWSService):
+    def __init__(self, aws_service: AWSService,
+                 context_compressor: Optional[ContextCompressor] = None,
+                 vector_db: Optional[VectorDBService] = None):
         super().__init__("Response Agent")
         self.aws_service = aws_service
+        self.context_compressor = context_compressor
+        self.vector_db = vector_db
     
     def execute(self, query: str, documents: List[str], persona: str,
                 calming_preamble: Optional[str] = None, 
-                best_practices: bool = False) -> ResponseAgentResponse:
-        """Build final response using AWS Bedrock"""
+                best_practices: bool = False,
+                query_embedding: Optional[List[float]] = None,
+                routing: Optional[RoutingDecision] = None,
+                tenant: Optional[str] = None,
+                on_text: Optional[Callable[[str], None]] = None) -> ResponseAgentResponse:
+        """
+        Build final response using AWS Bedrock; with on_text, the model output is streamed to it
+        Bedrock errors (including timeouts and an open circuit) are raised, so the flow can record
+        them and fall back to the retrieved context instead of showing the error as the answer
+        """
         
         if not self.aws_service.is_connected():
             return ResponseAgentResponse(
@@ -22,74 +45,109 @@ class ResponseAgent(BaseAgent):
                 response="[Error: AWS Bedrock not connected]"
             )
         
-        try:
-            # Check for document display request
-            query_lower = query.lower()
-            if any(term in query_lower for term in ['display document', 'show document', 
-                                                      'what documents', 'document content']):
-                if documents:
-                    response = f"I found {len(documents)} document chunks:\n\n"
-                    for i, doc in enumerate(documents[:10], 1):
-                        response += f"**Chunk {i}:**\n{doc[:400]}{'...' if len(doc) > 400 else ''}\n\n"
-                    if len(documents) > 10:
-                        response += f"... and {len(documents) - 10} more chunks."
-                else:
-                    response = "No documents uploaded yet."
-                
-                return ResponseAgentResponse(
-                    agent_name=self.name,
-                    detail=f"Document display response generated.",
-                    response=response
-                )
-            
-            # Prepare context
-            if documents:
-                context_text = "\n\n---\n\n".join(documents)
-                detail_prefix = f"Using COMPLETE context: ALL {len(documents)} document chunks"
-            else:
-                context_text = "No document context available."
-                detail_prefix = "WARNING: No document context available"
-            
-            # Build prompt based on persona
-            if persona in ["angry customer", "confused customer"]:
-                system_prompt = "You are an empathetic customer support agent."
-            elif persona == "precision ask":
-                system_prompt = "You are a technical expert."
-            else:
-                system_prompt = "You are a helpful assistant."
-            
-            prompt = f"""{system_prompt}
+        # Check for document display request
+        if is_document_display_request(query):
+            return ResponseAgentResponse(
+                agent_name=self.name,
+                detail=f"Document display response generated.",
+                response=self._display_documents(documents, tenant)
+            )
+        
+        # Prepare context
+        context_label = "RETRIEVED DOCUMENT CONTEXT"
+        context_instruction = "Use the retrieved document context to answer"
+        if documents and self.context_compressor:
+            context_text, stats = self.context_compressor.compress(query, documents, query_embedding)
+            detail_prefix = (f"Compressed context: {len(documents)} chunks → "
+                             f"{stats['sentences_selected']}/{stats['sentences_total']} sentences, "
+                             f"{stats['compressed_tokens']}/{stats['original_tokens']} tokens "
+                             f"({stats['ratio']:.0%}) in {stats['elapsed_ms']:.0f}ms")
+            if stats["compressed_tokens"] < stats["original_tokens"]:
+                # The model only sees selected sentences, so it must not assume the text is complete
+                context_label = "SELECTED DOCUMENT EXCERPTS"
+                context_instruction = ("Use the document excerpts to answer; they are selected "
+                                       "sentences, not the full documents")
+        elif documents:
+            context_text = "\n\n---\n\n".join(documents)
+            detail_prefix = f"Using retrieved context: {len(documents)} document chunks"
+        else:
+            context_text = "No document context available."
+            detail_prefix = "WARNING: No document context available"
+        
+        # Build prompt based on persona
+        if persona in ["angry customer", "confused customer"]:
+            system_prompt = "You are an empathetic customer support agent."
+        elif persona == "precision ask":
+            system_prompt = "You are a technical expert."
+        else:
+            system_prompt = "You are a helpful assistant."
+        
+        prompt = f"""{system_prompt}
 
-COMPLETE DOCUMENT CONTEXT:
+{context_label}:
 {context_text}
 
 Customer query: {query}
 
 INSTRUCTIONS:
-- Use the COMPLETE document context to answer
+- {context_instruction}
 - Provide comprehensive, well-structured answer
 - Reference specific information from context
 """
-            
-            # Call AWS Bedrock
-            final_response = self.aws_service.invoke_model(prompt)
-            
-            # Add calming preamble if provided
-            if calming_preamble:
-                final_response = f"{calming_preamble}\n\n{final_response}"
-            
-            detail = f"{detail_prefix} | Final response: {len(final_response)} characters"
-            
-            return ResponseAgentResponse(
-                agent_name=self.name,
-                detail=detail,
-                response=final_response
-            )
-            
-        except Exception as e:
-            return ResponseAgentResponse(
-                agent_name=self.name,
-                detail=f"Bedrock API Error: {str(e)}",
-                response=f"[Error calling Bedrock: {str(e)}]"
+        
+        # Call AWS Bedrock
+        invoke = self.aws_service.invoke_stream if on_text else self.aws_service.invoke
+        kwargs = {"on_text": on_text} if on_text else {}
+        if routing:
+            result = invoke(
+                prompt, routing.max_tokens, routing.temperature, routing.model_id, **kwargs
             )
+        else:
+            result = invoke(prompt, **kwargs)
+        final_response = result["text"]
+        
+        # Add calming preamble if provided
+        if calming_preamble:
+            final_response = f"{calming_preamble}\n\n{final_response}"
+        
+        detail = f"{detail_prefix} | Final response: {len(final_response)} characters"
+        
+        return ResponseAgentResponse(
+            agent_name=self.name,
+            detail=detail,
+            response=final_response,
+            model_id=result["model_id"],
+            usage=result["usage"],
+            latency_ms=result["latency_ms"]
+        )
+    
+    def _display_documents(self, documents: List[str], tenant: Optional[str]) -> str:
+        """List the corpus sources and its first chunks, fetching only the chunks shown"""
+        if self.vector_db is None:
+            if not documents:
+                return "No documents uploaded yet."
+            response = f"I found {len(documents)} document chunks:\n\n"
+            for i, doc in enumerate(documents[:DISPLAY_CHUNK_LIMIT], 1):
+                response += f"**Chunk {i}:**\n{doc[:400]}{'...' if len(doc) > 400 else ''}\n\n"
+            if len(documents) > DISPLAY_CHUNK_LIMIT:
+                response += f"... and {len(documents) - DISPLAY_CHUNK_LIMIT} more chunks."
+            return response
+        
+        stats = self.vector_db.get_corpus_stats(tenant)
+        if not stats["chunks"]:
+            return "No documents uploaded yet."
+        page = self.vector_db.list_chunks(tenant, limit=DISPLAY_CHUNK_LIMIT,
+                                          include=("documents", "metadatas"))
+        
+        response = f"I found {stats['chunks']} document chunks from {len(stats['sources'])} file(s):\n\n"
+        for source, chunk_count in stats["sources"].items():
+            response += f"- {source}: {chunk_count} chunks\n"
+        response += "\n"
+        for i, (doc, metadata) in enumerate(zip(page["documents"], page["metadatas"]), 1):
+            source = (metadata or {}).get("source")
+            label = f"**Chunk {i}** ({source}):" if source else f"**Chunk {i}:**"
+            response += f"{label}\n{doc[:400]}{'...' if len(doc) > 400 else ''}\n\n"
+        if stats["chunks"] > len(page["ids"]):
+            response += f"... and {stats['chunks'] - len(page['ids'])} more chunks."
+        return response
 
@@ -3,11 +3,31 @@
 # Main backend orchestrator using modular components
 # ============================================================================
 
-from typing import List, Dict, Any
+import copy
+import hashlib
+import json
+import os
+import threading
+import uuid
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from services.aws_service import AWSService
 from services.langfuse_service import LangfuseService
 from services.vector_db_service import VectorDBService
 from services.document_processor import DocumentProcessor
+from services.rerank_service import RerankService
+from services.context_compressor import ContextCompressor
+from services.chunk_deduplicator import ChunkDeduplicator
+from services.model_router import ModelRouter
+from services.single_flight import SingleFlight
+from services.extractive_answerer import ExtractiveAnswerer
+from services.ingestion_pipeline import IngestionPipeline, StageMemoryTracker
+from services.ingestion_queue import IngestionQueue, IngestionServices
+from services.index_snapshot import SnapshotService
+from services.bedrock_cassette import CassetteMissError
+from services.profiler import StackSampler
+from services.resilience import (
+    Deadline, DeadlineExceeded, CircuitOpenError, BulkheadFullError, StreamCancelled, call_with_timeout
+)
 from agents.planner_agent import PlannerAgent
 from agents.orchestration_agent import OrchestrationAgent
 from agents.rag_agent import RAGAgent
@@ -18,6 +38,20 @@ from agents.reflector_agent import ReflectorAgent
 from agents.response_agent import ResponseAgent
 from agents.feedback_agent import FeedbackAgent
 from models.agent_models import AgentFlowResult
+from models.trace_records import AgentTrace
+from config.settings import (
+    RerankConfig, CompressionConfig, DedupConfig, SingleFlightConfig,
+    ResilienceConfig, FastPathConfig, SnapshotConfig
+)
+from utils.helpers import estimate_tokens
+
+# Shared by every backend in the process (one per Streamlit session) so identical
+# requests from different customers coalesce
+_single_flight = SingleFlight()
+# One worker per process ingests uploads in the background and resumes interrupted jobs
+_ingestion_queue = IngestionQueue()
+# Shared so the extractor benchmark runs once per process rather than once per session
+_document_processor = DocumentProcessor()
 
 class AgentBackend:
     """Refactored backend orchestrator"""
@@ -27,7 +61,23 @@ class AgentBackend:
         self.aws_service = AWSService()
         self.langfuse_service = LangfuseService()
         self.vector_db_service = VectorDBService()
-        self.document_processor = DocumentProcessor()
+        self.document_processor = _document_processor
+        self.rerank_service = RerankService() if RerankConfig.ENABLED else None
+        self.context_compressor = (
+            ContextCompressor(self.vector_db_service) if CompressionConfig.ENABLED else None
+        )
+        self.deduplicator = ChunkDeduplicator() if DedupConfig.ENABLED else None
+        self.model_router = ModelRouter()
+        self.extractive_answerer = (
+            ExtractiveAnswerer(self.vector_db_service) if FastPathConfig.ENABLED else None
+        )
+        self.single_flight = _single_flight
+        self.ingestion_pipeline = IngestionPipeline(self.vector_db_service, self.deduplicator)
+        self.ingestion_queue = _ingestion_queue
+        self.snapshot_service = SnapshotService(self.vector_db_service)
+        self.last_ingestion_profile = None
+        if self.rerank_service:
+            self.vector_db_service.add_unload_listener(self.rerank_service.evict_tenant)
         
         # Initialize agents (lazy loading where needed)
         self.planner_agent = PlannerAgent()
@@ -47,177 +97,561 @@ class AgentBackend:
         success, message = self.aws_service.connect(aws_access_key, aws_secret_key, aws_region)
         if success:
             self.vector_db_service.initialize()
-            self.rag_agent = RAGAgent(self.vector_db_service)
-            self.response_agent = ResponseAgent(self.aws_service)
+            self.rag_agent = RAGAgent(self.vector_db_service, self.rerank_service)
+            self.response_agent = ResponseAgent(self.aws_service, self.context_compressor, self.vector_db_service)
             self.reflector_agent = ReflectorAgent()
+            self.ingestion_queue.attach(self._ingestion_services())
+            if SnapshotConfig.RESTORE_ON_CONNECT:
+                self._restore_empty_tenants()
         return success, message
     
+    def _ingestion_services(self) -> IngestionServices:
+        """This session's services, for the ingestion jobs it submits"""
+        return IngestionServices(
+            self.vector_db_service, self.document_processor, self.ingestion_pipeline, self.snapshot_service
+        )
+    
+    def _restore_empty_tenants(self) -> None:
+        """Seed tenants that have a snapshot but no documents, e.g. on a freshly started replica"""
+        for tenant in self.snapshot_service.list_snapshots():
+            if self.vector_db_service.count(tenant) == 0:
+                success, message = self.snapshot_service.restore(tenant)
+                print(message if success else f"Snapshot restore of '{tenant}' failed: {message}")
+    
     def connect_langfuse(self, public_key: str, secret_key: str, host: str):
         """Connect to Langfuse"""
         return self.langfuse_service.connect(public_key, secret_key, host)
     
-    def process_documents(self, uploaded_files):
-        """Process and store PDF documents"""
+    def set_tenant(self, tenant: str) -> str:
+        """Select the tenant whose collection this session uses by default"""
+        return self.vector_db_service.set_active_tenant(tenant)
+    
+    def create_tenant(self, tenant: str) -> Tuple[bool, str]:
+        """Create an empty tenant and select it"""
+        success, message = self.vector_db_service.create_tenant(tenant)
+        if success:
+            self.set_tenant(tenant)
+        return success, message
+    
+    def list_tenants(self) -> List[str]:
+        """Names of the existing tenants"""
+        return self.vector_db_service.list_tenants()
+    
+    def submit_ingestion(self, uploaded_files, tenant: Optional[str] = None,
+                         profile: bool = False) -> Tuple[bool, str]:
+        """
+        Queue PDF documents for background ingestion into the tenant's collection
+        Returns: (success, job_id or error message)
+        """
+        tenant = VectorDBService.normalize_tenant(tenant) if tenant else self.vector_db_service.active_tenant
+        if not self.vector_db_service.tenant_exists(tenant):
+            return False, f"Unknown tenant '{tenant}'"
+        return self.ingestion_queue.submit(uploaded_files, tenant, self._ingestion_services(), profile)
+    
+    def get_ingestion_jobs(self, tenant: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Ingestion jobs of a tenant, newest first"""
+        tenant = VectorDBService.normalize_tenant(tenant) if tenant else self.vector_db_service.active_tenant
+        return self.ingestion_queue.list_jobs(tenant)
+    
+    def get_extraction_stats(self) -> Dict[str, Any]:
+        """PDF extractor in use and extraction cache hit counts"""
+        return self.document_processor.get_stats()
+    
+    def process_documents(self, uploaded_files, tenant: Optional[str] = None, profile: bool = False):
+        """Process and store PDF documents synchronously; a requested profile is kept in last_ingestion_profile"""
+        if profile:
+            with StackSampler() as sampler:
+                outcome = self.process_documents(uploaded_files, tenant)
+            self.last_ingestion_profile = sampler.result
+            return outcome
+        
+        if not self.vector_db_service.tenant_exists(tenant):
+            return False, f"Unknown tenant '{tenant or self.vector_db_service.active_tenant}'"
+        
         try:
-            # Clear existing documents
-            self.vector_db_service.clear()
-            
-            all_paragraphs = []
-            all_metadatas = []
-            
-            for uploaded_file in uploaded_files:
-                success, message, paragraphs = self.document_processor.extract_text_from_pdf(uploaded_file)
+            with StageMemoryTracker() as memory:
+                seen_sources = set()
+                duplicate_names = 0
+                failed = 0
                 
-                if not success:
-                    continue
+                def extracted_files():
+                    """Extract uploads one at a time as the pipeline asks for them"""
+                    nonlocal duplicate_names, failed
+                    for uploaded_file in uploaded_files:
+                        if uploaded_file.name in seen_sources:
+                            duplicate_names += 1
+                            continue
+                        seen_sources.add(uploaded_file.name)
+                        
+                        with memory.stage("extract"):
+                            success, message, paragraphs = self.document_processor.extract_text_from_pdf(uploaded_file)
+                        
+                        if not success:
+                            failed += 1
+                            continue
+                        yield uploaded_file.name, paragraphs
                 
-                # Add to batch
-                for idx, para in enumerate(paragraphs):
-                    all_paragraphs.append(para)
-                    all_metadatas.append({
-                        "source": uploaded_file.name,
-                        "chunk_index": idx + 1,
-                        "chunk_type": "paragraph",
-                        "char_count": len(para)
-                    })
-            
-            if all_paragraphs:
-                success, message = self.vector_db_service.add_documents(all_paragraphs, all_metadatas)
-                if success:
-                    return True, f"✓ Successfully processed {len(uploaded_files)} PDF file(s) → {len(all_paragraphs)} chunks stored"
-                return False, message
-            else:
-                return False, "No valid text content found in PDF files."
+                # Fill a staging collection so queries keep using the previous documents until the swap
+                staging_id = uuid.uuid4().hex[:12]
+                collection = self.vector_db_service.get_staging_collection(tenant, staging_id)
+                try:
+                    stream = self.ingestion_pipeline.ingest(extracted_files(), collection, tenant, memory=memory)
+                    if not stream.files:
+                        self.vector_db_service.drop_staging_collection(tenant, staging_id)
+                        return False, "No valid text content found in PDF files."
+                    self.vector_db_service.promote_staging(tenant, staging_id)
+                except Exception:
+                    self.vector_db_service.drop_staging_collection(tenant, staging_id)
+                    raise
+                snapshot_summary = ""
+                if SnapshotConfig.AUTO_EXPORT:
+                    snapshot_summary = f" | {self.snapshot_service.export(tenant)[1]}"
+            skipped_summary = self._skipped_summary(duplicate_names, failed)
+            return True, f"✓ Successfully processed {stream.files} PDF file(s){skipped_summary} → {stream.chunk_count} chunks stored{stream.summary()}{snapshot_summary}{memory.summary()}"
         
         except Exception as e:
             return False, f"Error processing documents: {str(e)}"
     
-    def clear_vector_db(self):
-        """Clear vector database"""
-        return self.vector_db_service.clear()
+    @staticmethod
+    def _skipped_summary(duplicate_names: int, failed: int) -> str:
+        """Files left out of an ingestion, for the result message"""
+        reasons = []
+        if duplicate_names:
+            reasons.append(f"{duplicate_names} with a duplicate file name")
+        if failed:
+            reasons.append(f"{failed} without extractable text")
+        return f", skipped {sum((duplicate_names, failed))} ({', '.join(reasons)})" if reasons else ""
+    
+    def export_snapshot(self, tenant: Optional[str] = None) -> Tuple[bool, str]:
+        """Write the tenant's index to its snapshot file, reusing unchanged sources of the last one"""
+        return self.snapshot_service.export(tenant)
+    
+    def restore_snapshot(self, tenant: Optional[str] = None) -> Tuple[bool, str]:
+        """Replace the tenant's documents with the contents of its snapshot file"""
+        return self.snapshot_service.restore(tenant)
+    
+    def has_snapshot(self, tenant: Optional[str] = None) -> bool:
+        """Whether the tenant has a snapshot file"""
+        return os.path.exists(self.snapshot_service.snapshot_path(tenant))
+    
+    def clear_vector_db(self, tenant: Optional[str] = None):
+        """Clear vector database and the tenant's snapshot, so a later connect does not restore it"""
+        success, message = self.vector_db_service.clear(tenant)
+        if success and self.snapshot_service.delete(tenant):
+            message += " (snapshot deleted)"
+        return success, message
     
     @property
     def vector_db(self):
         """Property to maintain compatibility with existing code"""
         return self.vector_db_service.collection
     
+    def _estimate_context_tokens(self, documents: List[str]) -> int:
+        """Estimate prompt context size after compression"""
+        context_tokens = sum(estimate_tokens(doc) for doc in documents)
+        if self.context_compressor:
+            context_tokens = min(context_tokens, self.context_compressor.token_budget)
+        return context_tokens
+    
     def execute_agentic_flow(self, query: str, risk_weight: float, 
                             accuracy_weight: float, latency_weight: float, 
-                            cost_weight: float, guardrails: str) -> Dict[str, Any]:
-        """Execute complete agentic flow"""
+                            cost_weight: float, guardrails: str,
+                            tenant: Optional[str] = None,
+                            deadline_seconds: float = ResilienceConfig.REQUEST_DEADLINE_SECONDS,
+                            profile: bool = False,
+                            filters: Optional[Dict[str, Any]] = None,
+                            on_text: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Execute complete agentic flow, sharing one execution between identical in-flight requests
+        Sharing spans all sessions in the process: a request coalesced with another session's gets
+        that execution's result, including its model routing, as long as both would run the same
+        flow (see _coalescing_key)
+        filters limits retrieval to chunks with matching metadata, e.g. {"source": "policy.pdf"}
+        on_text receives the Response Agent's model output as it streams; such requests are not
+        shared, and final_response remains the complete answer. An escalated retry is not streamed,
+        so on_text never mixes two answers
+        """
+        if profile:
+            with StackSampler() as sampler:
+                result = self.execute_agentic_flow(
+                    query, risk_weight, accuracy_weight, latency_weight, cost_weight,
+                    guardrails, tenant, deadline_seconds, filters=filters, on_text=on_text
+                )
+            result["profile"] = sampler.result
+            return result
         
-        agents_executed = []
+        deadline = Deadline(deadline_seconds)
         
-        # Step 1: Planner Agent
+        # Step 1: Planner Agent (cheap and deterministic, so it is part of the coalescing key)
         planner_result = self.planner_agent.execute(query)
-        agents_executed.append({
-            "agent": "Planner Agent",
-            "emoji": "🧠",
-            "action": "Analyzing query sentiment",
-            "detail": planner_result.detail
-        })
+        
+        # A streaming caller needs its own model call, so it cannot share another request's execution
+        if not SingleFlightConfig.ENABLED or on_text:
+            result = self._run_agentic_flow(
+                query, planner_result, risk_weight, accuracy_weight,
+                latency_weight, cost_weight, guardrails, tenant, deadline, filters, on_text
+            )
+            result["coalesced"] = False
+            return result
+        
+        key = self._coalescing_key(
+            query, planner_result.persona, tenant, guardrails,
+            (risk_weight, accuracy_weight, latency_weight, cost_weight), filters, deadline_seconds
+        )
+        result, shared = self.single_flight.do(key, lambda: self._run_agentic_flow(
+            query, planner_result, risk_weight, accuracy_weight,
+            latency_weight, cost_weight, guardrails, tenant, deadline, filters
+        ))
+        # Followers get their own copy so callers can mutate results independently
+        result = copy.deepcopy(result)
+        result["coalesced"] = shared
+        return result
+    
+    def _coalescing_key(self, query: str, persona: str, tenant: Optional[str], guardrails: str,
+                        weights, filters: Optional[Dict[str, Any]] = None,
+                        deadline_seconds: float = ResilienceConfig.REQUEST_DEADLINE_SECONDS) -> tuple:
+        """
+        Key identifying requests that would produce the same flow output
+        Covers every per-request input and the session's Bedrock endpoint and credentials, so
+        sessions connected to different accounts or regions never share an execution
+        """
+        normalized_query = ' '.join(query.lower().split()).rstrip('?!. ')
+        guardrail_hash = hashlib.sha256(
+            '\n'.join(sorted(g.strip().lower() for g in (guardrails or '').split('\n') if g.strip())).encode('utf-8')
+        ).hexdigest()
+        # Weights drive model routing and the feedback score, so they are part of the key
+        return (
+            normalized_query,
+            persona,
+            self.vector_db_service.corpus_key(tenant),
+            guardrail_hash,
+            tuple(round(w, 2) for w in weights),
+            json.dumps(filters, sort_keys=True, default=sorted) if filters else "",
+            # A shorter deadline can degrade the answer, so it must not wait on a longer one
+            round(deadline_seconds, 1),
+            self.aws_service.endpoint_key
+        )
+    
+    def _run_step(self, agent_name: str, fn, deadline: Deadline, later_agents: List[str],
+                  degradations: List[Dict[str, Any]], optional: Optional[bool] = None,
+                  on_timeout: Optional[Callable[[], None]] = None):
+        """
+        Run one agent step within its share of the request deadline
+        on_timeout is called when the step is given up on while it is still running
+        Returns: the step's result, or None when it was skipped, timed out or failed
+        A CassetteMissError is re-raised: a replay run must fail rather than degrade
+        """
+        if not ResilienceConfig.ENABLED:
+            try:
+                return fn()
+            except CassetteMissError:
+                raise
+            except Exception as e:
+                degradations.append({"agent": agent_name, "kind": "error", "detail": str(e)})
+                return None
+        
+        if optional is None:
+            optional = agent_name in ResilienceConfig.OPTIONAL_AGENTS
+        cap = ResilienceConfig.AGENT_TIMEOUTS_SECONDS.get(agent_name, 5.0)
+        reserve = sum(ResilienceConfig.REQUIRED_RESERVE_SECONDS.get(a, 0.0) for a in later_agents)
+        if optional:
+            budget = deadline.budget(cap, reserve)
+            min_budget = ResilienceConfig.MIN_OPTIONAL_BUDGET_SECONDS
+        else:
+            # Required agents split a too-short remainder in proportion to their reserves
+            own = ResilienceConfig.REQUIRED_RESERVE_SECONDS.get(agent_name, 0.0)
+            share = own / (own + reserve) if own + reserve > 0 else 1.0
+            budget = max(deadline.budget(cap, reserve), deadline.budget(cap) * share)
+            min_budget = 0.0
+        
+        if budget <= min_budget:
+            degradations.append({
+                "agent": agent_name,
+                "kind": "skipped",
+                "detail": f"only {deadline.remaining():.1f}s left of the {deadline.seconds:.0f}s request deadline"
+            })
+            return None
+        
+        dependency = ResilienceConfig.AGENT_DEPENDENCIES.get(agent_name, "local")
+        try:
+            return call_with_timeout(fn, budget, dependency)
+        except DeadlineExceeded as e:
+            if on_timeout:
+                on_timeout()
+            degradations.append({"agent": agent_name, "kind": "timeout", "detail": str(e)})
+        except CircuitOpenError as e:
+            degradations.append({"agent": agent_name, "kind": "circuit_open", "detail": str(e)})
+        except BulkheadFullError as e:
+            degradations.append({"agent": agent_name, "kind": "saturated", "detail": str(e)})
+        except CassetteMissError:
+            raise
+        except Exception as e:
+            degradations.append({"agent": agent_name, "kind": "error", "detail": str(e)})
+        return None
+    
+    @staticmethod
+    def _cancellable_stream(on_text: Callable[[str], None], abandoned: threading.Event,
+                            deadline: Deadline) -> Callable[[str], None]:
+        """
+        Wrap a stream callback so a stream the flow stopped waiting for ends at its next delta,
+        releasing its Bedrock worker slot instead of streaming into an answer already degraded
+        """
+        def stream_text(text: str) -> None:
+            if abandoned.is_set() or deadline.expired():
+                raise StreamCancelled("response step timed out")
+            on_text(text)
+        return stream_text
+    
+    @staticmethod
+    def _degraded_response(documents: List[str], calming_preamble: Optional[str]) -> str:
+        """Fallback answer when the model cannot be called within the deadline"""
+        if documents:
+            excerpt = documents[0][:600]
+            response = ("I can't generate a complete answer right now. "
+                        f"Here is the most relevant information I found:\n\n{excerpt}")
+        else:
+            response = "I can't generate an answer right now. Please try again in a moment."
+        if calming_preamble:
+            response = f"{calming_preamble}\n\n{response}"
+        return response
+    
+    def _run_agentic_flow(self, query: str, planner_result, risk_weight: float,
+                          accuracy_weight: float, latency_weight: float,
+                          cost_weight: float, guardrails: str,
+                          tenant: Optional[str], deadline: Deadline,
+                          filters: Optional[Dict[str, Any]] = None,
+                          on_text: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Run the agent chain for an already planned query within the request deadline"""
+        
+        agents_executed = []
+        degradations = []
+        
+        agents_executed.append(AgentTrace(
+            agent="Planner Agent",
+            emoji="🧠",
+            action="Analyzing query sentiment",
+            detail=planner_result.detail
+        ))
         persona = planner_result.persona
         
         # Step 2: Orchestration Agent
         orchestration_result = self.orchestration_agent.execute(persona)
-        agents_executed.append({
-            "agent": "Orchestration Agent",
-            "emoji": "🎯",
-            "action": "Routing to appropriate agents",
-            "detail": orchestration_result.detail
-        })
+        agents_executed.append(AgentTrace(
+            agent="Orchestration Agent",
+            emoji="🎯",
+            action="Routing to appropriate agents",
+            detail=orchestration_result.detail
+        ))
         agent_flow = orchestration_result.agent_flow
         
         # Initialize variables
         calming_preamble = None
         best_practices = False
         documents = []
+        query_embedding = None
         final_response = ""
         quality_score = 0.85
         token_count = 0
+        routing = []
+        fast_path = None
         
         # Execute agent flow
-        for agent_name in agent_flow:
+        for position, agent_name in enumerate(agent_flow):
+            later_agents = agent_flow[position + 1:]
+            
             if agent_name == "Emotions Agent":
-                emotion_result = self.emotions_agent.execute(query, persona)
-                agents_executed.append({
-                    "agent": "Emotions Agent",
-                    "emoji": "💭",
-                    "action": "Analyzing emotional content",
-                    "detail": emotion_result.detail
-                })
+                emotion_result = self._run_step(
+                    agent_name, lambda: self.emotions_agent.execute(query, persona),
+                    deadline, later_agents, degradations
+                )
+                if emotion_result is None:
+                    continue
+                agents_executed.append(AgentTrace(
+                    agent="Emotions Agent",
+                    emoji="💭",
+                    action="Analyzing emotional content",
+                    detail=emotion_result.detail
+                ))
             
             elif agent_name == "Calming Agent":
-                calming_result = self.calming_agent.execute()
+                calming_result = self._run_step(
+                    agent_name, self.calming_agent.execute, deadline, later_agents, degradations
+                )
+                if calming_result is None:
+                    continue
                 calming_preamble = calming_result.preamble
-                agents_executed.append({
-                    "agent": "Calming Agent",
-                    "emoji": "🕊️",
-                    "action": "Generating empathetic response",
-                    "detail": calming_result.detail
-                })
+                agents_executed.append(AgentTrace(
+                    agent="Calming Agent",
+                    emoji="🕊️",
+                    action="Generating empathetic response",
+                    detail=calming_result.detail
+                ))
             
             elif agent_name == "RAG Agent":
-                rag_result = self.rag_agent.execute(query)
+                if self.vector_db_service.breaker.is_open():
+                    degradations.append({
+                        "agent": agent_name,
+                        "kind": "circuit_open",
+                        "detail": "vector store failing, answering without document context"
+                    })
+                    continue
+                rag_result = self._run_step(
+                    agent_name, lambda: self.rag_agent.execute(query, tenant, filters),
+                    deadline, later_agents, degradations
+                )
+                if rag_result is None:
+                    continue
                 documents = rag_result.documents
-                agents_executed.append({
-                    "agent": "RAG Agent",
-                    "emoji": "📚",
-                    "action": "Retrieving relevant documents",
-                    "detail": rag_result.detail
-                })
+                query_embedding = rag_result.query_embedding
+                agents_executed.append(AgentTrace(
+                    agent="RAG Agent",
+                    emoji="📚",
+                    action="Retrieving relevant documents",
+                    detail=rag_result.detail
+                ))
             
             elif agent_name == "Best Practices Agent":
-                bp_result = self.best_practices_agent.execute()
+                bp_result = self._run_step(
+                    agent_name, self.best_practices_agent.execute, deadline, later_agents, degradations
+                )
+                if bp_result is None:
+                    continue
                 best_practices = True
-                agents_executed.append({
-                    "agent": "Best Practices Agent",
-                    "emoji": "⭐",
-                    "action": "Enhancing with best practices",
-                    "detail": bp_result["detail"]
-                })
+                agents_executed.append(AgentTrace(
+                    agent="Best Practices Agent",
+                    emoji="⭐",
+                    action="Enhancing with best practices",
+                    detail=bp_result.detail
+                ))
             
             elif agent_name == "Response Agent":
-                response_result = self.response_agent.execute(
-                    query, documents, persona, calming_preamble, best_practices
+                # Answer confident simple queries straight from the top chunk
+                if self.extractive_answerer and documents and persona in FastPathConfig.PERSONAS:
+                    fast_answer, fast_path = self.extractive_answerer.try_answer(
+                        query, tenant, query_embedding, filters
+                    )
+                    if fast_answer:
+                        final_response = f"{calming_preamble}\n\n{fast_answer}" if calming_preamble else fast_answer
+                        agents_executed.append(AgentTrace(
+                            agent="Response Agent",
+                            emoji="✍️",
+                            action="Building final response",
+                            detail=(f"⚡ Extractive fast path: similarity {fast_path['similarity']:.2f}, "
+                                       f"query overlap {fast_path['overlap']:.0%} | "
+                                       f"{fast_path['elapsed_ms']:.0f}ms, Bedrock call skipped")
+                        ))
+                        continue
+                
+                decision = self.model_router.route(
+                    persona, self._estimate_context_tokens(documents),
+                    latency_weight, cost_weight
                 )
+                if self.aws_service.breaker.is_open():
+                    degradations.append({
+                        "agent": agent_name,
+                        "kind": "circuit_open",
+                        "detail": "Bedrock failing, answered from retrieved documents"
+                    })
+                    response_result = None
+                else:
+                    abandoned = threading.Event()
+                    stream_text = self._cancellable_stream(on_text, abandoned, deadline) if on_text else None
+                    response_result = self._run_step(
+                        agent_name, lambda: self.response_agent.execute(
+                            query, documents, persona, calming_preamble, best_practices,
+                            query_embedding, decision, tenant, stream_text
+                        ),
+                        deadline, later_agents, degradations, on_timeout=abandoned.set
+                    )
+                
+                if response_result is None:
+                    final_response = self._degraded_response(documents, calming_preamble)
+                    agents_executed.append(AgentTrace(
+                        agent="Response Agent",
+                        emoji="✍️",
+                        action="Building final response",
+                        detail="DEGRADED: model unavailable within the deadline, returned retrieved context"
+                    ))
+                    continue
+                
+                routing.append(self.model_router.record(
+                    decision, response_result.latency_ms, response_result.usage
+                ))
+                
+                # Escalate a cheap answer that visibly failed, if the deadline still allows it
+                if decision.tier == "fast" and response_result.model_id:
+                    escalation_reason = self.model_router.escalation_reason(
+                        decision, response_result.response, response_result.usage
+                    )
+                    if escalation_reason:
+                        escalated = self.model_router.escalate(decision, escalation_reason)
+                        # Not streamed: the first answer's text has already gone to on_text
+                        escalated_result = self._run_step(
+                            agent_name, lambda: self.response_agent.execute(
+                                query, documents, persona, calming_preamble, best_practices,
+                                query_embedding, escalated, tenant
+                            ),
+                            deadline, later_agents, degradations, optional=True
+                        )
+                        if escalated_result is not None:
+                            self.model_router.mark_superseded(routing[-1])
+                            decision, response_result = escalated, escalated_result
+                            routing.append(self.model_router.record(
+                                decision, response_result.latency_ms, response_result.usage
+                            ))
+                
                 final_response = response_result.response
-                agents_executed.append({
-                    "agent": "Response Agent",
-                    "emoji": "✍️",
-                    "action": "Building final response",
-                    "detail": response_result.detail
-                })
+                agents_executed.append(AgentTrace(
+                    agent="Response Agent",
+                    emoji="✍️",
+                    action="Building final response",
+                    detail=f"{response_result.detail} | Model: {decision.tier} ({decision.reason})"
+                              + (f" | Fast path skipped: {fast_path['reason']}" if fast_path else "")
+                ))
             
             elif agent_name == "Reflector Agent":
-                reflector_result = self.reflector_agent.execute(
-                    query, documents, final_response, guardrails
+                reflector_result = self._run_step(
+                    agent_name, lambda: self.reflector_agent.execute(
+                        query, documents, final_response, guardrails
+                    ),
+                    deadline, later_agents, degradations
                 )
-                agents_executed.append({
-                    "agent": "Reflector Agent",
-                    "emoji": "🤔",
-                    "action": "Evaluating response quality",
-                    "detail": reflector_result.detail,
-                    "performance_status": reflector_result.performance_status,
-                    "performance_issue": reflector_result.performance_issue
-                })
+                if reflector_result is None:
+                    continue
+                agents_executed.append(AgentTrace(
+                    agent="Reflector Agent",
+                    emoji="🤔",
+                    action="Evaluating response quality",
+                    detail=reflector_result.detail,
+                    performance_status=reflector_result.performance_status,
+                    performance_issue=reflector_result.performance_issue
+                ))
                 quality_score = reflector_result.quality_score
                 token_count = reflector_result.token_count
             
             elif agent_name == "Feedback Agent":
-                feedback_result = self.feedback_agent.execute(
-                    quality_score, risk_weight, accuracy_weight, 
-                    latency_weight, cost_weight, token_count
+                feedback_result = self._run_step(
+                    agent_name, lambda: self.feedback_agent.execute(
+                        quality_score, risk_weight, accuracy_weight,
+                        latency_weight, cost_weight, token_count
+                    ),
+                    deadline, later_agents, degradations
                 )
-                agents_executed.append({
-                    "agent": "Feedback Agent",
-                    "emoji": "📊",
-                    "action": "Calculating convergence score",
-                    "detail": feedback_result.detail
-                })
+                if feedback_result is None:
+                    continue
+                agents_executed.append(AgentTrace(
+                    agent="Feedback Agent",
+                    emoji="📊",
+                    action="Calculating convergence score",
+                    detail=feedback_result.detail
+                ))
         
         return {
             "agents_executed": agents_executed,
             "final_response": final_response,
-            "persona": persona
+            "persona": persona,
+            "routing": routing,
+            "fast_path": fast_path,
+            "degradations": degradations,
+            "deadline_remaining_s": deadline.remaining()
         }
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Measure Streamlit rerun time of the dashboard after a sidebar change
+
+Runs the app headless with streamlit.testing, seeded with a synthetic agent log and
+conversation history, then moves a sidebar slider and times each full rerun of the
+script inside the run (the test harness's own polling is excluded).
+Compare another version of the page with --app (e.g. a checkout of an older app.py).
+
+Usage: python benchmarks/bench_app_rerun.py [--app app.py] [--entries N] [--reruns N]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest
+
+from models.trace_records import TraceLog
+
+# Times the page script inside the rerun; AppTest wall time is dominated by its own polling
+RUNNER = """
+import runpy
+import time
+import streamlit as st
+start = time.perf_counter()
+runpy.run_path({app!r}, run_name="__main__")
+st.session_state["bench_rerun_ms"] = (time.perf_counter() - start) * 1000
+"""
+
+AGENTS = ["Planner Agent", "Orchestration Agent", "RAG Agent", "Reflector Agent", "Response Agent", "Feedback Agent"]
+
+def seed_history(entries):
+    """Agent log and conversations as left behind by entries / len(AGENTS) queries"""
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1)
+    log = TraceLog()
+    conversations = []
+    for i in range(entries):
+        log.append({
+            "timestamp": start + timedelta(seconds=i),
+            "agent": AGENTS[i % len(AGENTS)],
+            "action": "Completed",
+            "detail": f"Step {i} detail",
+            "tokens": rng.randint(100, 1000),
+            "latency": rng.uniform(0.5, 3.0)
+        })
+        if i % len(AGENTS) == len(AGENTS) - 1:
+            conversations.append({
+                "timestamp": (start + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S"),
+                "query": f"Query {i}", "response": "Response", "persona": "simple query",
+                "agent_flow": AGENTS, "tenant": "default", "degradations": [], "profile": None, "mode": "REAL"
+            })
+    return log, conversations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--entries", type=int, default=600)
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+    
+    log, conversations = seed_history(args.entries)
+    app = AppTest.from_string(RUNNER.format(app=os.path.abspath(args.app)), default_timeout=120)
+    app.session_state["agent_logs"] = log
+    app.session_state["conversations"] = conversations
+    app.run()
+    if app.exception:
+        raise SystemExit(f"App failed: {app.exception[0].message}")
+    
+    timings = []
+    slider = app.sidebar.slider[0]
+    for i in range(args.reruns):
+        slider.set_value(round(0.1 * (i % 10), 1))
+        app.run()
+        timings.append(app.session_state["bench_rerun_ms"])
+        slider = app.sidebar.slider[0]
+    
+    timings.sort()
+    print(f"{os.path.basename(args.app)}: {args.entries} log entries, {len(conversations)} conversations, "
+          f"{args.reruns} reruns after a sidebar slider change")
+    print(f"  mean {statistics.mean(timings):.1f}ms  p50 {timings[len(timings) // 2]:.1f}ms  "
+          f"p95 {timings[int(len(timings) * 0.95) - 1]:.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+End-to-end performance benchmark: ingestion, retrieval and full agent flows against a simulated Bedrock
+
+Usage: python benchmarks/bench_end_to_end.py [--documents N] [--pages N] [--queries N] [--flows N]
+           [--bedrock-profile instant|realistic|congested] [--output results.json]
+           [--baseline baseline.json [--update-baseline] [--tolerance 0.1]]
+
+Synthetic PDFs are ingested through AgentBackend.process_documents, retrieval is timed through
+VectorDBService.query_with_scores, and flows through AgentBackend.execute_agentic_flow grouped by
+the trajectory the agents took. Results are written as JSON; with --baseline they are compared
+against a stored run and the script exits with status 1 when a metric regressed beyond --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic_workload import make_backend, make_documents, make_queries, scratch_directory, trajectory_name
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Metrics compared against the baseline; means and maxima are left out as too noisy to gate on
+COMPARED = {
+    "ingestion": ("pages_per_sec", "chunks_per_sec", "peak_rss_mb"),
+    "retrieval": ("p50_ms", "p99_ms", "qps")
+}
+# Metric name suffixes where a larger value is better; everything else is a latency or a size
+HIGHER_IS_BETTER = ("_per_sec", "qps")
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def latency_summary(samples_ms):
+    """Percentiles of a list of latencies in milliseconds"""
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "count": int(samples.size),
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "p99_ms": float(np.percentile(samples, 99)),
+        "max_ms": float(samples.max())
+    }
+
+def bench_ingestion(backend, args):
+    """Pages and chunks ingested per second through the synchronous ingestion path"""
+    # A throwaway tenant absorbs one-time costs: extractor selection and embedding model warm-up
+    backend.vector_db_service.create_tenant("bench-warmup")
+    backend.process_documents(make_documents(1, 1, args.paragraphs, seed=args.seed + 100), tenant="bench-warmup")
+    backend.document_processor.wait_for_benchmark()
+    uploads = make_documents(args.documents, args.pages, args.paragraphs, seed=args.seed)
+    start = time.perf_counter()
+    success, message = backend.process_documents(uploads)
+    elapsed = time.perf_counter() - start
+    if not success:
+        raise RuntimeError(f"Ingestion failed: {message}")
+    chunks = backend.vector_db_service.count()
+    pages = args.documents * args.pages
+    return {
+        "documents": args.documents,
+        "pages": pages,
+        "chunks": chunks,
+        "seconds": elapsed,
+        "pages_per_sec": pages / elapsed,
+        "chunks_per_sec": chunks / elapsed,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+def bench_retrieval(backend, args):
+    """Sequential similarity searches, including query embedding"""
+    queries = [query for _, query in make_queries(args.queries + args.warmup, seed=args.seed + 1)]
+    vector_db = backend.vector_db_service
+    for query in queries[:args.warmup]:
+        vector_db.query_with_scores(query, args.top_k)
+    samples = []
+    start = time.perf_counter()
+    for query in queries[args.warmup:]:
+        query_start = time.perf_counter()
+        vector_db.query_with_scores(query, args.top_k)
+        samples.append((time.perf_counter() - query_start) * 1000)
+    elapsed = time.perf_counter() - start
+    return dict(latency_summary(samples), qps=len(samples) / elapsed, peak_rss_mb=peak_rss_mb())
+
+def bench_flows(backend, args):
+    """End-to-end agent flows, grouped by the trajectory each one took"""
+    queries = make_queries(args.flows + args.warmup, seed=args.seed + 2)
+    for _, query in queries[:args.warmup]:
+        backend.execute_agentic_flow(query, 0.5, 0.5, 0.5, 0.5, "")
+    by_trajectory = defaultdict(list)
+    personas = {}
+    degraded = 0
+    start = time.perf_counter()
+    for persona, query in queries[args.warmup:]:
+        query_start = time.perf_counter()
+        result = backend.execute_agentic_flow(query, 0.5, 0.5, 0.5, 0.5, "")
+        trajectory = trajectory_name(result)
+        by_trajectory[trajectory].append((time.perf_counter() - query_start) * 1000)
+        personas[trajectory] = result["persona"]
+        degraded += bool(result["degradations"])
+    elapsed = time.perf_counter() - start
+    all_samples = [sample for samples in by_trajectory.values() for sample in samples]
+    return {
+        "all": dict(latency_summary(all_samples), qps=len(all_samples) / elapsed),
+        "trajectories": {
+            trajectory: dict(latency_summary(samples), persona=personas[trajectory])
+            for trajectory, samples in sorted(by_trajectory.items())
+        },
+        "degraded": degraded,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+def flatten(results):
+    """Comparable metrics as a flat name -> number mapping"""
+    metrics = {}
+    for section, names in COMPARED.items():
+        for name in names:
+            if results[section][name] is not None:
+                metrics[f"{section}.{name}"] = results[section][name]
+    flows = results["flows"]
+    for name in ("p50_ms", "p99_ms", "qps"):
+        metrics[f"flows.{name}"] = flows["all"][name]
+    for trajectory, summary in flows["trajectories"].items():
+        for name in ("p50_ms", "p99_ms"):
+            metrics[f"flows[{trajectory}].{name}"] = summary[name]
+    if flows["peak_rss_mb"] is not None:
+        metrics["flows.peak_rss_mb"] = flows["peak_rss_mb"]
+    return metrics
+
+def compare(metrics, baseline, tolerance):
+    """Print the change of every metric against the baseline; returns the regressed metric names"""
+    regressions = []
+    names = sorted(set(metrics) | set(baseline))
+    width = max(len(name) for name in names) + 2
+    print(f"\n{'metric':<{width}}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name in names:
+        if name not in metrics or name not in baseline:
+            print(f"{name:<{width}}{'-' if name not in baseline else f'{baseline[name]:.2f}':>12}"
+                  f"{'-' if name not in metrics else f'{metrics[name]:.2f}':>12}")
+            continue
+        before, after = baseline[name], metrics[name]
+        change = (after - before) / before if before else 0.0
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        flag = ""
+        if worse > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<{width}}{before:>12.2f}{after:>12.2f}{change:>+9.1%}{flag}")
+    return regressions
+
+def git_commit():
+    """Commit of the tree being measured, if it is a git checkout"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5, help="pages per document")
+    parser.add_argument("--paragraphs", type=int, default=8, help="paragraphs per page")
+    parser.add_argument("--queries", type=int, default=200, help="retrieval queries")
+    parser.add_argument("--flows", type=int, default=40, help="end-to-end agent flows")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--bedrock-profile", default="instant")
+    parser.add_argument("--retrieval-cache", action="store_true", help="keep the retrieval cache on")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="baseline results JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    
+    workdir = scratch_directory()
+    try:
+        backend = make_backend(args.bedrock_profile, args.retrieval_cache, seed=args.seed)
+        results = {"ingestion": bench_ingestion(backend, args)}
+        ingestion = results["ingestion"]
+        print(f"Ingestion: {ingestion['pages']} pages, {ingestion['chunks']} chunks in {ingestion['seconds']:.1f}s "
+              f"({ingestion['pages_per_sec']:.1f} pages/s, {ingestion['chunks_per_sec']:.0f} chunks/s)")
+        results["retrieval"] = bench_retrieval(backend, args)
+        retrieval = results["retrieval"]
+        print(f"Retrieval: p50 {retrieval['p50_ms']:.2f}ms, p99 {retrieval['p99_ms']:.2f}ms, "
+              f"{retrieval['qps']:.0f} QPS")
+        results["flows"] = bench_flows(backend, args)
+        print(f"Flows: p50 {results['flows']['all']['p50_ms']:.0f}ms, p99 {results['flows']['all']['p99_ms']:.0f}ms, "
+              f"{results['flows']['degraded']} degraded")
+        for trajectory, summary in results["flows"]["trajectories"].items():
+            print(f"  {trajectory:<75} n={summary['count']:<4} p50 {summary['p50_ms']:8.1f}ms  "
+                  f"p99 {summary['p99_ms']:8.1f}ms")
+        if ingestion["peak_rss_mb"] is not None:
+            print(f"Peak RSS: {results['flows']['peak_rss_mb']:.0f}MB")
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args)
+        },
+        "metrics": flatten(results),
+        "results": results
+    }
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {output}")
+    
+    regressions = []
+    if baseline_path and os.path.exists(baseline_path) and not args.update_baseline:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report["metrics"], baseline["metrics"], args.tolerance)
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+    elif baseline_path:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {baseline_path}")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
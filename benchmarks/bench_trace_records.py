@@ -0,0 +1,94 @@
+"""
+Benchmark the agent log as a list of dicts against the columnar TraceLog
+
+Usage: python benchmarks/bench_trace_records.py [--entries N] [--repeat N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.trace_records import TraceLog
+
+AGENTS = ["Planner Agent", "Orchestration Agent", "RAG Agent", "Emotions Agent", "Calming Agent",
+          "Best Practices Agent", "Reflector Agent", "Response Agent", "Feedback Agent"]
+
+def make_entries(count):
+    """Synthetic agent log entries shaped like the ones app.py records"""
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "timestamp": start + timedelta(seconds=i),
+            "agent": AGENTS[i % len(AGENTS)],
+            "action": "Completed",
+            "detail": f"Step {i} detail with a short description of the agent output",
+            "tokens": rng.randint(100, 1000),
+            "latency": rng.uniform(0.5, 3.0)
+        }
+        for i in range(count)
+    ]
+
+def count_allocations(fn):
+    """Memory blocks still held by the value fn returns"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    value = fn()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    del value
+    return blocks, size
+
+def throughput(fn, repeat, count):
+    """Entries per second over repeat runs of fn, after one warm-up run"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return count * repeat / (time.perf_counter() - start)
+
+def build_dicts(entries):
+    """The agent log as app.py kept it before: a list of fresh dicts"""
+    return [dict(entry) for entry in entries]
+
+def build_log(entries):
+    """The columnar agent log app.py keeps now"""
+    log = TraceLog()
+    for entry in entries:
+        log.append(entry)
+    return log
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    entries = make_entries(args.entries)
+    dicts = build_dicts(entries)
+    log = build_log(entries)
+    
+    print(f"{args.entries} entries, {args.repeat} runs each\n")
+    print(f"{'log':<16}{'blocks':>10}{'alloc KB':>10}{'append/s':>14}{'DataFrame ms':>14}")
+    rows = [
+        ("list of dicts", lambda: build_dicts(entries), lambda: pd.DataFrame(dicts)),
+        ("TraceLog", lambda: build_log(entries), log.to_dataframe),
+    ]
+    for name, build, to_dataframe in rows:
+        blocks, size = count_allocations(build)
+        dataframe_ms = 1000 * args.entries / throughput(to_dataframe, args.repeat, args.entries)
+        print(f"{name:<16}{blocks:>10,}{size / 1024:>10.0f}"
+              f"{throughput(build, args.repeat, args.entries):>14,.0f}{dataframe_ms:>14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Open-loop load generator: replay a query log against AgentBackend at a fixed or ramping arrival rate
+
+Usage: python benchmarks/load_generator.py [--log query_log.jsonl] [--rate QPS] [--ramp-to QPS]
+           [--duration SECONDS] [--arrivals poisson|uniform] [--bedrock-profile realistic]
+           [--interval SECONDS] [--output report.json]
+
+Requests are sent on a precomputed schedule whatever the state of earlier requests, and latency is
+measured from each request's scheduled send time. A slow backend therefore shows up as growing
+latency and backlog instead of a silently lower send rate (coordinated omission).
+The log is JSON lines with a "query" field, as exported from the Conversations tab; without --log,
+synthetic queries covering every persona are used. The backend runs against the Bedrock simulator.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic_workload import make_backend, make_documents, make_queries, scratch_directory, trajectory_name
+
+# Degradation kinds caused by the request deadline rather than a failing dependency
+TIMEOUT_KINDS = ("timeout", "skipped")
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram in the style of HdrHistogram
+    Buckets keep a fixed relative error (under 1%) across microseconds to minutes in constant memory
+    """
+    SUB_BUCKET_BITS = 8
+    
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+    
+    def record(self, latency_ms):
+        """Add one latency"""
+        value = max(1, int(latency_ms * 1000))
+        exponent = max(0, value.bit_length() - self.SUB_BUCKET_BITS)
+        self.counts[(exponent << self.SUB_BUCKET_BITS) + (value >> exponent)] += 1
+        self.count += 1
+        self.total_us += value
+        self.max_us = max(self.max_us, value)
+    
+    def _highest_equivalent(self, index):
+        """Largest microsecond value that falls in a bucket"""
+        exponent = index >> self.SUB_BUCKET_BITS
+        mantissa = index - (exponent << self.SUB_BUCKET_BITS)
+        return ((mantissa + 1) << exponent) - 1
+    
+    def percentile(self, percent):
+        """Latency in milliseconds at or below which percent of the recorded values fall"""
+        if not self.count:
+            return None
+        target = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest_equivalent(index), self.max_us) / 1000
+        return self.max_us / 1000
+    
+    def summary(self):
+        """Count, mean and the usual percentiles in milliseconds"""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": self.total_us / self.count / 1000,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "p99.9_ms": self.percentile(99.9),
+            "max_ms": self.max_us / 1000
+        }
+
+def load_queries(path):
+    """Queries of a JSON-lines log; lines without a query are skipped"""
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and entry.get("query"):
+                queries.append(entry["query"])
+    return queries
+
+def arrival_schedule(rate, ramp_to, duration, poisson, seed):
+    """Send offsets in seconds, with the rate moving linearly from rate to ramp_to over the run"""
+    rng = random.Random(seed)
+    offsets = []
+    offset = 0.0
+    while True:
+        current = rate + (ramp_to - rate) * offset / duration
+        if current <= 0:
+            break
+        offset += rng.expovariate(current) if poisson else 1 / current
+        if offset >= duration:
+            return offsets
+        offsets.append(offset)
+    return offsets
+
+class LoadRun:
+    """One open-loop run and the outcomes of its requests"""
+    
+    def __init__(self, backend, deadline_seconds, interval):
+        self.backend = backend
+        self.deadline_seconds = deadline_seconds
+        self.interval = interval
+        self.records = []
+        self.max_dispatch_lag_ms = 0.0
+        self._lock = threading.Lock()
+    
+    def _send(self, start, offset, query):
+        """Run one flow and record its outcome, timed from the scheduled send time"""
+        persona, trajectory = None, None
+        try:
+            result = self.backend.execute_agentic_flow(query, 0.5, 0.5, 0.5, 0.5, "",
+                                                       deadline_seconds=self.deadline_seconds)
+            persona, trajectory = result["persona"], trajectory_name(result)
+            kinds = {degradation["kind"] for degradation in result["degradations"]}
+            if kinds & set(TIMEOUT_KINDS):
+                outcome = "timeout"
+            elif kinds:
+                outcome = "degraded"
+            else:
+                outcome = "ok"
+        except Exception:
+            outcome = "error"
+        finished = time.perf_counter() - start
+        if persona is None:
+            persona = self.backend.planner_agent.execute(query).persona
+        with self._lock:
+            self.records.append({
+                "offset": offset, "finished": finished, "latency_ms": (finished - offset) * 1000,
+                "persona": persona, "trajectory": trajectory or "(failed)", "outcome": outcome
+            })
+    
+    def run(self, schedule, queries, max_in_flight):
+        """Send queries (cycled) at the scheduled offsets and wait for every response"""
+        pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="load")
+        start = time.perf_counter() + 0.05
+        for number, offset in enumerate(schedule):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.max_dispatch_lag_ms = max(self.max_dispatch_lag_ms, -delay * 1000)
+            pool.submit(self._send, start, offset, queries[number % len(queries)])
+        pool.shutdown(wait=True)
+        return time.perf_counter() - start
+    
+    def report(self, wall_seconds, duration):
+        """Histograms per persona and trajectory, outcome rates and throughput per interval"""
+        overall = LatencyHistogram()
+        by_persona = defaultdict(LatencyHistogram)
+        by_trajectory = defaultdict(LatencyHistogram)
+        outcomes = defaultdict(int)
+        buckets = max(1, math.ceil(max([duration] + [r["finished"] for r in self.records]) / self.interval))
+        timeline = [{"start_s": i * self.interval, "sent": 0, "completed": 0, "errors": 0, "timeouts": 0,
+                     "histogram": LatencyHistogram()} for i in range(buckets)]
+        for record in self.records:
+            outcomes[record["outcome"]] += 1
+            if record["outcome"] != "error":
+                overall.record(record["latency_ms"])
+                by_persona[record["persona"]].record(record["latency_ms"])
+                by_trajectory[record["trajectory"]].record(record["latency_ms"])
+            timeline[min(buckets - 1, int(record["offset"] // self.interval))]["sent"] += 1
+            finished = timeline[min(buckets - 1, int(record["finished"] // self.interval))]
+            finished["completed"] += 1
+            finished["errors"] += record["outcome"] == "error"
+            finished["timeouts"] += record["outcome"] == "timeout"
+            finished["histogram"].record(record["latency_ms"])
+        
+        in_flight = 0
+        for bucket in timeline:
+            histogram = bucket.pop("histogram")
+            in_flight += bucket["sent"] - bucket["completed"]
+            bucket.update(
+                offered_qps=bucket["sent"] / self.interval,
+                throughput_qps=bucket["completed"] / self.interval,
+                backlog=in_flight,
+                p50_ms=histogram.percentile(50),
+                p99_ms=histogram.percentile(99)
+            )
+        total = len(self.records)
+        return {
+            "requests": total,
+            "wall_seconds": wall_seconds,
+            "throughput_qps": total / wall_seconds if wall_seconds else 0.0,
+            "outcomes": dict(outcomes),
+            "error_rate": outcomes["error"] / total if total else 0.0,
+            "timeout_rate": outcomes["timeout"] / total if total else 0.0,
+            "max_dispatch_lag_ms": self.max_dispatch_lag_ms,
+            "latency": overall.summary(),
+            "personas": {name: h.summary() for name, h in sorted(by_persona.items())},
+            "trajectories": {name: h.summary() for name, h in sorted(by_trajectory.items())},
+            "timeline": timeline
+        }
+
+def print_report(report):
+    """Human-readable summary of a run"""
+    print(f"\n{report['requests']} requests in {report['wall_seconds']:.1f}s: "
+          f"{report['throughput_qps']:.2f} QPS completed, outcomes {report['outcomes']}, "
+          f"error rate {report['error_rate']:.1%}, timeout rate {report['timeout_rate']:.1%}")
+    if report["max_dispatch_lag_ms"] > 10:
+        # The lag is part of the measured latencies, but a lagging generator is sharing CPU with the backend
+        print(f"Note: sends fell behind schedule by up to {report['max_dispatch_lag_ms']:.0f}ms; "
+              f"the generator shares this process's CPU with the backend")
+    
+    columns = ("count", "p50_ms", "p90_ms", "p99_ms", "p99.9_ms", "max_ms")
+    for title, groups in (("persona", report["personas"]), ("trajectory", report["trajectories"])):
+        width = max([len(title)] + [len(name) for name in groups]) + 2
+        print(f"\n{title:<{width}}" + "".join(f"{column:>10}" for column in columns))
+        for name, summary in groups.items():
+            print(f"{name:<{width}}{summary['count']:>10}" + "".join(
+                f"{summary[column]:>10.0f}" for column in columns[1:]))
+    
+    print(f"\n{'t (s)':>7}{'offered':>9}{'done':>8}{'backlog':>9}{'errors':>8}{'timeouts':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for bucket in report["timeline"]:
+        p50 = f"{bucket['p50_ms']:.0f}" if bucket["p50_ms"] is not None else "-"
+        p99 = f"{bucket['p99_ms']:.0f}" if bucket["p99_ms"] is not None else "-"
+        print(f"{bucket['start_s']:>7.0f}{bucket['offered_qps']:>9.2f}{bucket['throughput_qps']:>8.2f}"
+              f"{bucket['backlog']:>9}{bucket['errors']:>8}{bucket['timeouts']:>10}{p50:>9}{p99:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--log", help="JSON-lines query log, e.g. exported from the Conversations tab")
+    parser.add_argument("--rate", type=float, default=2.0, help="arrivals per second at the start")
+    parser.add_argument("--ramp-to", type=float, help="arrivals per second at the end (default: --rate)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals")
+    parser.add_argument("--arrivals", choices=("poisson", "uniform"), default="poisson")
+    parser.add_argument("--max-in-flight", type=int, default=512, help="client threads; keep above the backlog")
+    parser.add_argument("--deadline", type=float, help="request deadline in seconds (default: configured)")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds per timeline row")
+    parser.add_argument("--bedrock-profile", default="realistic")
+    parser.add_argument("--documents", type=int, default=20, help="synthetic documents to ingest first")
+    parser.add_argument("--retrieval-cache", action="store_true", help="keep the retrieval cache on")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the report as JSON here")
+    args = parser.parse_args()
+    log = os.path.abspath(args.log) if args.log else None
+    output = os.path.abspath(args.output) if args.output else None
+    
+    queries = load_queries(log) if log else [query for _, query in make_queries(200, seed=args.seed)]
+    if not queries:
+        parser.error(f"no queries found in {log}")
+    schedule = arrival_schedule(args.rate, args.ramp_to if args.ramp_to is not None else args.rate,
+                                args.duration, args.arrivals == "poisson", args.seed)
+    
+    workdir = scratch_directory()
+    try:
+        backend = make_backend(args.bedrock_profile, args.retrieval_cache, seed=args.seed)
+        success, message = backend.process_documents(make_documents(args.documents, 5, 8, seed=args.seed))
+        if not success:
+            raise RuntimeError(message)
+        from config.settings import ResilienceConfig
+        deadline = args.deadline or ResilienceConfig.REQUEST_DEADLINE_SECONDS
+        print(f"Sending {len(schedule)} requests over {args.duration:.0f}s "
+              f"({len(queries)} distinct queries, {args.arrivals} arrivals, Bedrock profile {args.bedrock_profile})")
+        load = LoadRun(backend, deadline, args.interval)
+        wall_seconds = load.run(schedule, queries, args.max_in_flight)
+        report = load.report(wall_seconds, args.duration)
+        report["simulator"] = backend.aws_service.get_simulator_stats()
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    print_report(report)
+    if report["simulator"]:
+        print(f"\nSimulator: {report['simulator']}")
+    if output:
+        report["args"] = vars(args)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {output}")
+
+if __name__ == "__main__":
+    main()
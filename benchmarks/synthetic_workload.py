@@ -0,0 +1,146 @@
+"""
+Synthetic documents, queries and a simulator-backed AgentBackend shared by the benchmark scripts
+
+Documents are generated as real PDF files, so ingestion runs the same extraction path as an upload.
+Queries cover every persona the Planner Agent detects, so every trajectory gets exercised.
+"""
+import io
+import os
+import random
+import tempfile
+
+TOPICS = {
+    "refund": ["refund", "purchase", "receipt", "store credit", "return window", "original payment"],
+    "shipping": ["shipment", "carrier", "tracking number", "delivery estimate", "warehouse", "signature"],
+    "password": ["password", "account settings", "verification email", "security question", "login", "reset link"],
+    "billing": ["invoice", "billing cycle", "payment method", "late fee", "statement", "autopay"],
+    "warranty": ["warranty claim", "serial number", "repair center", "defect", "replacement unit", "proof of purchase"],
+    "subscription": ["subscription", "renewal date", "plan tier", "cancellation", "trial period", "upgrade"],
+    "privacy": ["personal data", "consent", "data export", "retention period", "deletion request", "privacy team"],
+    "printer": ["printer", "toner cartridge", "paper tray", "print queue", "driver update", "facilities desk"],
+    "travel": ["travel request", "expense report", "per diem", "booking tool", "manager approval", "mileage"],
+    "onboarding": ["new hire", "laptop setup", "badge", "orientation", "benefits enrollment", "mentor"]
+}
+
+SENTENCES = [
+    "To handle a {a} request, customers must provide the {b} within {n} business days.",
+    "The {a} team reviews every {b} and responds within {n} days of receiving it.",
+    "If the {a} is missing, contact support with the {b} and allow {n} days for processing.",
+    "Each {a} is logged with its {b}, and changes take effect after {n} days.",
+    "Staff should confirm the {a} before updating the {b}; exceptions need approval within {n} days.",
+    "A {a} older than {n} days cannot be changed without a new {b} from the customer."
+]
+
+QUERY_TEMPLATES = {
+    "simple query": ["What is the {a} policy?", "How long does a {a} take?", "Where do I find the {b}?"],
+    "precision ask": ["Can you tell me exactly how the {a} works with the {b}?",
+                      "Give me a detailed step by step guide for the {b}."],
+    "angry customer": ["I am frustrated, how many times do I have to ask about my {a}?",
+                       "This is terrible, the {b} still has not arrived."],
+    "confused customer": ["I tried before and it did not work, what do I do about the {b}?",
+                          "I don't understand the {a} rules, the {b} part is unclear."]
+}
+
+class SyntheticUpload(io.BytesIO):
+    """In-memory PDF with a file name, readable like a Streamlit upload"""
+    
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+def make_pdf(pages):
+    """Minimal PDF with one Helvetica text line per entry of each page's line list"""
+    def escape(text):
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R")
+        stream = "BT /F1 9 Tf 20 800 Td 12 TL " + " ".join(f"({escape(line)}) '" for line in lines) + " ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Resources << /Font << "
+                       f"/F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode("latin-1"))
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode("latin-1"))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode("latin-1")
+    
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode("latin-1") + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += b"".join(f"{offset:010d} 00000 n \n".encode("latin-1") for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode("latin-1")
+    return bytes(out)
+
+def make_paragraph(rng, topic):
+    """Two templated sentences about a topic, long enough to survive paragraph filtering"""
+    terms = TOPICS[topic]
+    return " ".join(
+        rng.choice(SENTENCES).format(a=rng.choice(terms), b=rng.choice(terms), n=rng.randint(2, 30))
+        for _ in range(2)
+    )
+
+def make_documents(count, pages_per_document, paragraphs_per_page, seed=7):
+    """Synthetic PDF uploads, each centred on one topic with some paragraphs about others"""
+    rng = random.Random(seed)
+    topics = sorted(TOPICS)
+    uploads = []
+    for number in range(count):
+        topic = topics[number % len(topics)]
+        pages = [
+            [make_paragraph(rng, topic if rng.random() < 0.7 else rng.choice(topics))
+             for _ in range(paragraphs_per_page)]
+            for _ in range(pages_per_document)
+        ]
+        uploads.append(SyntheticUpload(f"{topic}_{number:04d}.pdf", make_pdf(pages)))
+    return uploads
+
+def make_queries(count, seed=11, personas=None):
+    """(persona, query) pairs cycling through the personas, about randomly chosen topics"""
+    rng = random.Random(seed)
+    personas = personas or list(QUERY_TEMPLATES)
+    queries = []
+    for number in range(count):
+        persona = personas[number % len(personas)]
+        terms = TOPICS[rng.choice(sorted(TOPICS))]
+        queries.append((persona, rng.choice(QUERY_TEMPLATES[persona]).format(
+            a=rng.choice(terms), b=rng.choice(terms))))
+    return queries
+
+def make_backend(bedrock_profile="instant", retrieval_cache=False, seed=None):
+    """
+    AgentBackend connected to the local Bedrock simulator
+    Call from a scratch working directory: the backend module creates its job, cache and snapshot
+    directories relative to the current directory on import
+    """
+    from config.settings import RetrievalCacheConfig, SimulatorConfig, SnapshotConfig
+    SimulatorConfig.ENABLED = True
+    SimulatorConfig.PROFILE = bedrock_profile
+    SimulatorConfig.SEED = seed
+    RetrievalCacheConfig.ENABLED = retrieval_cache
+    SnapshotConfig.RESTORE_ON_CONNECT = False
+    SnapshotConfig.AUTO_EXPORT = False
+    
+    from backend import AgentBackend
+    from services.document_processor import DocumentProcessor
+    backend = AgentBackend()
+    # Uncached, so every run measures extraction rather than cache lookups
+    backend.document_processor = DocumentProcessor(cache_dir=None)
+    success, message = backend.connect_aws("", "", "us-east-1")
+    if not success:
+        raise RuntimeError(message)
+    return backend
+
+def trajectory_name(result):
+    """Agents a flow actually ran, e.g. Planner>Orchestration>RAG>Reflector>Response>Feedback"""
+    return ">".join(step.agent.replace(" Agent", "") for step in result["agents_executed"])
+
+def scratch_directory():
+    """Fresh working directory for a benchmark run"""
+    path = tempfile.mkdtemp(prefix="agent-bench-")
+    os.chdir(path)
+    return path
@@ -1,5 +1,47 @@
 """Configuration module initialization"""
 
-from .settings import AppConfig, ModelConfig, VectorDBConfig, UIConfig
+from .settings import (
+    AppConfig,
+    ModelConfig,
+    VectorDBConfig,
+    UIConfig,
+    RerankConfig,
+    CompressionConfig,
+    DedupConfig,
+    RoutingConfig,
+    SingleFlightConfig,
+    IngestionConfig,
+    ResilienceConfig,
+    FastPathConfig,
+    ProfilingConfig,
+    ExtractionConfig,
+    EmbeddingServerConfig,
+    RetrievalCacheConfig,
+    SnapshotConfig,
+    CassetteConfig,
+    SimulatorConfig,
+    ServerConfig
+)
 
-__all__ = ['AppConfig', 'ModelConfig', 'VectorDBConfig', 'UIConfig']
+__all__ = [
+    'AppConfig',
+    'ModelConfig',
+    'VectorDBConfig',
+    'UIConfig',
+    'RerankConfig',
+    'CompressionConfig',
+    'DedupConfig',
+    'RoutingConfig',
+    'SingleFlightConfig',
+    'IngestionConfig',
+    'ResilienceConfig',
+    'FastPathConfig',
+    'ProfilingConfig',
+    'ExtractionConfig',
+    'EmbeddingServerConfig',
+    'RetrievalCacheConfig',
+    'SnapshotConfig',
+    'CassetteConfig',
+    'SimulatorConfig',
+    'ServerConfig'
+]
@@ -8,14 +8,210 @@ class AppConfig:
 class ModelConfig:
     """Model configuration"""
     BEDROCK_MODEL_ID = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+    FAST_MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
+    # USD per 1K (input, output) tokens
+    MODEL_PRICING = {
+        BEDROCK_MODEL_ID: (0.003, 0.015),
+        FAST_MODEL_ID: (0.00025, 0.00125)
+    }
     EMBEDDING_MODEL = "all-MiniLM-L6-v2"
     MAX_TOKENS = 4000
     TEMPERATURE = 0.7
     
+class RoutingConfig:
+    """Per-request model routing configuration"""
+    ENABLED = True
+    FAST_PERSONAS = ["simple query"]
+    MAX_FAST_CONTEXT_TOKENS = 3000
+    FAST_PRESSURE_THRESHOLD = 0.4  # mean of latency and cost weights for fast-persona traffic
+    FORCE_FAST_PRESSURE = 0.9  # any persona goes to the fast model above this pressure
+    ESCALATION_ENABLED = True  # regenerate empty or truncated fast answers
+    # persona: (max_tokens, temperature)
+    PERSONA_SETTINGS = {
+        "simple query": (1000, 0.3),
+        "precision ask": (4000, 0.2),
+        "angry customer": (2000, 0.7),
+        "confused customer": (2000, 0.5)
+    }
+    MIN_MAX_TOKENS = 256
+    HISTORY_SIZE = 500
+    
+class FastPathConfig:
+    """Extractive fast-path answering configuration"""
+    ENABLED = False  # opt in: answers skip the LLM entirely
+    PERSONAS = ["simple query"]
+    MIN_SIMILARITY = 0.6
+    MIN_OVERLAP = 0.7
+    MAX_ANSWER_CHARS = 1200
+    HISTORY_SIZE = 500
+    
+class ProfilingConfig:
+    """Opt-in request profiling configuration"""
+    SAMPLE_INTERVAL_MS = 5
+    MAX_STACK_DEPTH = 60
+    TOP_FUNCTIONS = 25
+    MAX_STACKS = 500
+    
+class SingleFlightConfig:
+    """Request coalescing configuration"""
+    ENABLED = True
+    
+class ResilienceConfig:
+    """Request deadline, per-agent budget and circuit breaker configuration"""
+    ENABLED = True
+    REQUEST_DEADLINE_SECONDS = 45.0
+    # Upper bound per agent step; the flow deadline can shorten it further
+    AGENT_TIMEOUTS_SECONDS = {
+        "Emotions Agent": 2.0,
+        "Calming Agent": 2.0,
+        "RAG Agent": 8.0,
+        "Best Practices Agent": 2.0,
+        "Response Agent": 30.0,
+        "Reflector Agent": 3.0,
+        "Feedback Agent": 2.0
+    }
+    OPTIONAL_AGENTS = ["Emotions Agent", "Best Practices Agent", "Reflector Agent", "Feedback Agent"]
+    # Time kept back for required agents still to run when budgeting earlier steps
+    REQUIRED_RESERVE_SECONDS = {"RAG Agent": 1.0, "Response Agent": 8.0}
+    MIN_OPTIONAL_BUDGET_SECONDS = 0.5
+    BREAKER_FAILURE_THRESHOLD = 5
+    BREAKER_RESET_SECONDS = 30.0
+    # Worker threads per dependency; a timed-out call holds its thread until it returns
+    POOL_SIZES = {"bedrock": 16, "vector_db": 8, "local": 16}
+    AGENT_DEPENDENCIES = {"Response Agent": "bedrock", "RAG Agent": "vector_db"}  # others: "local"
+    # Attempts x (connect + read timeout) stays below the Response Agent's 30s cap
+    BEDROCK_CONNECT_TIMEOUT_SECONDS = 2
+    BEDROCK_READ_TIMEOUT_SECONDS = 12
+    BEDROCK_MAX_ATTEMPTS = 2
+    BEDROCK_RETRY_BASE_SECONDS = 0.25  # backoff of application-level retries (simulator only)
+    BEDROCK_RETRY_MAX_SECONDS = 4.0
+    
+class SimulatorConfig:
+    """Local Bedrock simulator for load tests that must not spend Bedrock quota"""
+    ENABLED = False
+    PROFILE = "realistic"
+    SEED = None
+    # Per profile: time to first token, output token latency, extra time to first token per 1K prompt
+    # tokens, concurrent requests before throttling, and injected throttling and timeout rates
+    PROFILES = {
+        "instant": {"ttft_ms": 0, "ms_per_token": 0.0, "prefill_ms_per_1k": 0.0,
+                    "max_concurrency": 10000, "throttle_rate": 0.0, "timeout_rate": 0.0},
+        "realistic": {"ttft_ms": 500, "ms_per_token": 15.0, "prefill_ms_per_1k": 40.0,
+                      "max_concurrency": 16, "throttle_rate": 0.0, "timeout_rate": 0.0},
+        "congested": {"ttft_ms": 1500, "ms_per_token": 30.0, "prefill_ms_per_1k": 80.0,
+                      "max_concurrency": 4, "throttle_rate": 0.1, "timeout_rate": 0.02}
+    }
+    OUTPUT_TOKENS = 200  # completion length, capped by the request's max_tokens
+    MODEL_SPEED = {ModelConfig.FAST_MODEL_ID: 3.0}  # token rate multiplier per model
+    TIMEOUT_SECONDS = 2.0  # how long an injected timeout hangs before failing
+    
+class CassetteConfig:
+    """Record/replay of Bedrock calls for offline regression runs"""
+    MODE = "off"  # "record", "replay" (offline, no AWS credentials needed) or "auto"
+    DIRECTORY = "./cassettes"
+    REPLAY_LATENCY = "zero"  # or "recorded" to replay the recorded call durations and chunk timing
+    
 class VectorDBConfig:
     """Vector database configuration"""
     COLLECTION_NAME = "documents"
     MIN_PARAGRAPH_LENGTH = 50
+    PERSIST_DIRECTORY = None  # e.g. "./chroma_data" so unloaded tenants release memory
+    SEGMENT_CACHE_MB = 1024  # Loaded indexes of a persistent store, least recently used evicted first
+    DEFAULT_TENANT = "default"
+    MAX_LOADED_TENANTS = 8  # Per process; unloading evicts the tenant's cached results
+    MAX_CHUNKS_PER_TENANT = 50000
+    MAX_STORED_MB_PER_TENANT = 256  # Texts, metadata and embeddings
+    LATENCY_WINDOW = 200
+    BROWSE_PAGE_SIZE = 1000  # metadata rows fetched per page when computing corpus stats
+    TOP_K = 20  # chunks the RAG Agent retrieves by similarity when reranking is off
+    NEIGHBOR_WINDOW = 1  # adjacent chunks added on each side of a retrieved hit (0 disables)
+    
+class EmbeddingServerConfig:
+    """Shared local embedding server configuration"""
+    ENABLED = False  # embed through one server process instead of a model per session
+    SOCKET_PATH = None  # None: agent-embeddings.sock in $XDG_RUNTIME_DIR or a per-user temp directory
+    AUTOSTART = True  # spawn the server on first use when none is listening
+    MODEL_NAME = "all-MiniLM-L6-v2"
+    MAX_BATCH_SIZE = 64  # texts per encode call
+    MAX_WAIT_MS = 5.0  # how long the first request of a batch waits for others to join
+    WORKER_THREADS = 2  # concurrent encode calls
+    TORCH_THREADS = None  # intra-op threads per encode call, None keeps the torch default
+    CPU_AFFINITY = None  # e.g. [0, 1, 2, 3] to pin the server to these cores
+    STARTUP_TIMEOUT_SECONDS = 120.0
+    REQUEST_TIMEOUT_SECONDS = 30.0
+    STATS_WINDOW = 1000
+    
+class RetrievalCacheConfig:
+    """Retrieval result cache configuration"""
+    ENABLED = True
+    MAX_ENTRIES = 2048  # cached searches across all tenants
+    EMBEDDING_CACHE_SIZE = 1024  # cached query embeddings
+    QUANTIZATION_STEP = 0.01  # embeddings rounded to this step before keying
+    
+class SnapshotConfig:
+    """Vector index snapshot configuration"""
+    DIRECTORY = "./snapshots"  # one <tenant>.snap file per tenant
+    AUTO_EXPORT = False  # refresh the tenant's snapshot after each completed ingestion
+    RESTORE_ON_CONNECT = False  # seed empty tenants from their snapshots when AWS connects
+    BATCH_SIZE = 5000  # chunks per read or insert while exporting and restoring
+    
+class RerankConfig:
+    """Cross-encoder reranking configuration"""
+    ENABLED = False
+    MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    CANDIDATE_COUNT = 20
+    TOP_N = 5
+    LATENCY_BUDGET_MS = 250
+    INITIAL_MS_PER_PAIR = 10.0  # scoring cost assumed until the first batch has been timed
+    DECISIVE_MARGIN = 0.15
+    CACHE_SIZE = 5000
+    
+class CompressionConfig:
+    """Context compression configuration"""
+    ENABLED = False  # embeds every retrieved sentence per request; pays off with large contexts
+    TOKEN_BUDGET = 1500
+    MMR_LAMBDA = 0.7
+    MIN_SENTENCE_LENGTH = 20
+    CACHE_SIZE = 20000
+    
+class DedupConfig:
+    """Ingestion-time near-duplicate detection configuration"""
+    ENABLED = True
+    MODE = "drop"  # "drop" removes duplicates, "link" stores them with the canonical embedding
+    SHINGLE_SIZE = 5
+    NUM_PERMUTATIONS = 64
+    BANDS = 16
+    SIMILARITY_THRESHOLD = 0.8
+    
+class IngestionConfig:
+    """Background document ingestion configuration"""
+    JOB_DIR = "./ingestion_jobs"
+    KEEP_FINISHED_JOBS = 50  # finished jobs listed in the sidebar; older job directories are deleted
+    BATCH_SIZE = 64  # chunks per embedding call
+    MEMORY_BUDGET_MB = 64  # pending embedded chunks are flushed to the store before exceeding this
+    TRACK_MEMORY = False  # tracemalloc peaks per stage; slows every allocation in the process while on
+    POLL_INTERVAL_SECONDS = 1.0
+    
+class ExtractionConfig:
+    """PDF text extraction configuration"""
+    EXTRACTOR = "auto"  # "auto" benchmarks the installed backends, or one of EXTRACTOR_PREFERENCE
+    EXTRACTOR_PREFERENCE = ["pypdfium2", "pypdf", "pdfminer", "PyPDF2"]  # tie-break order for "auto"
+    BENCHMARK_PAGES = 3
+    CACHE_ENABLED = True
+    CACHE_DIR = "./extraction_cache"
+    CACHE_MAX_MB = 256  # least recently used entries are deleted beyond this
+    
+class ServerConfig:
+    """Headless HTTP server configuration (python server.py)"""
+    HOST = "127.0.0.1"
+    PORT = 8080
+    WORKERS = 8  # agent flows executing at once
+    MAX_QUEUE = 32  # admitted requests waiting for a worker; beyond this new requests get 429
+    RETRY_AFTER_SECONDS = 1
+    MAX_BODY_BYTES = 1024 * 1024
+    SSE_HEARTBEAT_SECONDS = 10.0  # keep-alive comment interval on idle event streams
+    DRAIN_TIMEOUT_SECONDS = 60.0  # how long shutdown waits for admitted requests to finish
+    ACCESS_LOG = True
     
 class UIConfig:
     """UI styling configuration"""
@@ -7,11 +7,13 @@ from .agent_models import (
     RAGResponse,
     EmotionsResponse,
     CalmingResponse,
+    BestPracticesResponse,
     ReflectorResponse,
     ResponseAgentResponse,
     FeedbackResponse,
     AgentFlowResult
 )
+from .trace_records import AgentTrace, TraceLog
 
 __all__ = [
     'AgentResponse',
@@ -20,8 +22,11 @@ __all__ = [
     'RAGResponse',
     'EmotionsResponse',
     'CalmingResponse',
+    'BestPracticesResponse',
     'ReflectorResponse',
     'ResponseAgentResponse',
     'FeedbackResponse',
-    'AgentFlowResult'
+    'AgentFlowResult',
+    'AgentTrace',
+    'TraceLog'
 ]
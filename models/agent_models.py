@@ -22,6 +22,7 @@ class OrchestrationResponse(AgentResponse):
 class RAGResponse(AgentResponse):
     """RAG agent response"""
     documents: List[str]
+    query_embedding: Optional[List[float]] = None
     
 @dataclass
 class EmotionsResponse(AgentResponse):
@@ -34,6 +35,11 @@ class CalmingResponse(AgentResponse):
     """Calming agent response"""
     preamble: str
     
+@dataclass
+class BestPracticesResponse(AgentResponse):
+    """Best practices agent response"""
+    enhancement: str
+    
 @dataclass
 class ReflectorResponse(AgentResponse):
     """Reflector agent response"""
@@ -47,6 +53,9 @@ class ReflectorResponse(AgentResponse):
 class ResponseAgentResponse(AgentResponse):
     """Response agent response"""
     response: str
+    model_id: Optional[str] = None
+    usage: Optional[Dict[str, Any]] = None
+    latency_ms: float = 0.0
     
 @dataclass
 class FeedbackResponse(AgentResponse):
@@ -0,0 +1,124 @@
+import uuid
+from array import array
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+# Timestamps are stored as naive wall-clock seconds so DataFrames show the logged local time
+_EPOCH = datetime(1970, 1, 1)
+
+class AgentTrace(Mapping):
+    """One agent step of a flow trace, readable like the dicts it replaces"""
+    __slots__ = ("agent", "emoji", "action", "detail", "performance_status", "performance_issue")
+    
+    def __init__(self, agent: str, emoji: str, action: str, detail: str,
+                 performance_status: Optional[str] = None,
+                 performance_issue: Optional[str] = None):
+        self.agent = agent
+        self.emoji = emoji
+        self.action = action
+        self.detail = detail
+        self.performance_status = performance_status
+        self.performance_issue = performance_issue
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+    
+    def __iter__(self) -> Iterator[str]:
+        # Unset optional fields are absent, as they were from the dicts
+        return (key for key in self.__slots__ if getattr(self, key) is not None)
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    def __repr__(self) -> str:
+        return f"AgentTrace({self.to_dict()!r})"
+    
+    def __getstate__(self):
+        return tuple(getattr(self, key) for key in self.__slots__)
+    
+    def __setstate__(self, state) -> None:
+        for key, value in zip(self.__slots__, state):
+            setattr(self, key, value)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a plain dict for JSON output"""
+        return dict(self)
+
+class TraceLog:
+    """Columnar log of agent activity with dictionary-encoded agent and action names"""
+    
+    def __init__(self):
+        self.timestamps = array("d")
+        self.agent_codes = array("H")
+        self.action_codes = array("H")
+        self.tokens = array("q")
+        self.latencies = array("d")
+        self.details: List[str] = []
+        self.agents: List[str] = []
+        self.actions: List[str] = []
+        self._agent_index: Dict[str, int] = {}
+        self._action_index: Dict[str, int] = {}
+        self.log_id = uuid.uuid4().hex
+        self.version = 0
+    
+    @property
+    def cache_key(self) -> str:
+        """Changes on every append, so cached analytics of this log are recomputed only when it grows"""
+        return f"{self.log_id}:{self.version}"
+    
+    @staticmethod
+    def _code(value: str, values: List[str], index: Dict[str, int]) -> int:
+        """Dictionary-encode a repeated string"""
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(values)
+            values.append(value)
+        return code
+    
+    def append(self, entry: Mapping) -> None:
+        """Add one agent log entry (timestamp, agent, action, detail, tokens, latency)"""
+        timestamp = entry["timestamp"]
+        self.timestamps.append(
+            (timestamp - _EPOCH).total_seconds() if isinstance(timestamp, datetime) else float(timestamp)
+        )
+        self.agent_codes.append(self._code(entry["agent"], self.agents, self._agent_index))
+        self.action_codes.append(self._code(entry["action"], self.actions, self._action_index))
+        self.details.append(entry["detail"])
+        self.tokens.append(int(entry["tokens"]))
+        self.latencies.append(float(entry["latency"]))
+        self.version += 1
+    
+    def __len__(self) -> int:
+        return len(self.timestamps)
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield {
+                "timestamp": _EPOCH + timedelta(seconds=self.timestamps[i]),
+                "agent": self.agents[self.agent_codes[i]],
+                "action": self.actions[self.action_codes[i]],
+                "detail": self.details[i],
+                "tokens": self.tokens[i],
+                "latency": self.latencies[i]
+            }
+    
+    def to_dataframe(self):
+        """Build an analytics DataFrame straight from the columns, with categorical agent/action columns"""
+        import numpy as np
+        import pandas as pd
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(np.frombuffer(self.timestamps, dtype=np.float64), unit="s"),
+            "agent": pd.Categorical.from_codes(np.frombuffer(self.agent_codes, dtype=np.uint16),
+                                               categories=self.agents),
+            "action": pd.Categorical.from_codes(np.frombuffer(self.action_codes, dtype=np.uint16),
+                                                categories=self.actions),
+            "detail": self.details,
+            "tokens": np.frombuffer(self.tokens, dtype=np.int64),
+            "latency": np.frombuffer(self.latencies, dtype=np.float64)
+        })
@@ -0,0 +1,369 @@
+"""
+Headless HTTP server hosting one shared AgentBackend, for use behind a load balancer
+
+Run with: python server.py [--host HOST] [--port PORT] [--workers N] [--max-queue N]
+
+AWS credentials come from AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY and AWS_DEFAULT_REGION
+(not needed with the Bedrock simulator or cassette replay).
+
+Endpoints:
+    POST /query    run an agent flow; JSON body {"query": ..., "tenant", "filters", "guardrails",
+                   "risk_weight", "accuracy_weight", "latency_weight", "cost_weight",
+                   "deadline_seconds", "stream"}. With "stream": true or Accept: text/event-stream
+                   the response is a server-sent event stream of delta events with the Response
+                   Agent's output, then one result event
+    GET /healthz   liveness: the process is serving
+    GET /readyz    readiness: connected and not draining (503 otherwise)
+    GET /stats     worker pool, bulkhead, circuit breaker and model routing counters
+"""
+import argparse
+import json
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from backend import AgentBackend
+from config.settings import AppConfig, ResilienceConfig, ServerConfig
+from services.resilience import get_breaker_stats, get_bulkhead_stats
+
+class QueueTimeoutError(Exception):
+    """A request's deadline passed before a worker picked it up"""
+
+class WorkerPool:
+    """Bounded pool: up to workers flows run at once, max_queue more wait, and the rest are refused"""
+    
+    def __init__(self, workers: int = ServerConfig.WORKERS, max_queue: int = ServerConfig.MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flow-worker")
+        self._idle = threading.Condition()
+        self.admitted = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+    
+    def try_admit(self) -> bool:
+        """Reserve a place for a request, or refuse it when every worker and queue slot is taken"""
+        with self._idle:
+            if self.admitted >= self.workers + self.max_queue:
+                self.rejected += 1
+                return False
+            self.admitted += 1
+            return True
+    
+    def release(self) -> None:
+        """Give back an admitted request's place once its response has been written"""
+        with self._idle:
+            self.admitted -= 1
+            self.completed += 1
+            self._idle.notify_all()
+    
+    def submit(self, fn: Callable[[float], Any], deadline_seconds: float) -> Future:
+        """
+        Run fn on a worker with the part of the deadline left after queueing
+        Raises QueueTimeoutError from the future when nothing is left
+        """
+        admitted_at = time.monotonic()
+        
+        def run():
+            remaining = deadline_seconds - (time.monotonic() - admitted_at)
+            if remaining <= 0:
+                raise QueueTimeoutError(f"waited {deadline_seconds:.1f}s for a worker")
+            with self._idle:
+                self.running += 1
+            try:
+                return fn(remaining)
+            finally:
+                with self._idle:
+                    self.running -= 1
+        
+        return self._executor.submit(run)
+    
+    def wait_idle(self, timeout: float) -> bool:
+        """Wait until every admitted request has been answered"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self.admitted == 0, timeout)
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=wait)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Occupancy and counters since start"""
+        with self._idle:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": self.running,
+                "queued": self.admitted - self.running,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+
+def serialize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Flow result as plain JSON types"""
+    return dict(result, agents_executed=[step.to_dict() for step in result["agents_executed"]])
+
+def parse_query_request(body: Dict[str, Any],
+                        tenant_exists: Callable[[str], bool]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Validate a /query body into execute_agentic_flow arguments
+    Only existing tenants are accepted, so a request cannot create a collection
+    Returns: (arguments, None) or (None, error message)
+    """
+    query = body.get("query")
+    if not isinstance(query, str) or not query.strip():
+        return None, "'query' must be a non-empty string"
+    arguments = {"query": query, "guardrails": body.get("guardrails") or ""}
+    for name in ("risk_weight", "accuracy_weight", "latency_weight", "cost_weight"):
+        value = body.get(name, 0.5)
+        if not isinstance(value, (int, float)) or not 0.0 <= value <= 1.0:
+            return None, f"'{name}' must be a number between 0 and 1"
+        arguments[name] = float(value)
+    tenant = body.get("tenant")
+    if tenant is not None and not isinstance(tenant, str):
+        return None, "'tenant' must be a string"
+    if tenant and not tenant_exists(tenant):
+        return None, f"Unknown tenant '{tenant}'"
+    arguments["tenant"] = tenant
+    filters = body.get("filters")
+    if filters is not None and not isinstance(filters, dict):
+        return None, "'filters' must be an object"
+    arguments["filters"] = filters or None
+    deadline = body.get("deadline_seconds", ResilienceConfig.REQUEST_DEADLINE_SECONDS)
+    if not isinstance(deadline, (int, float)) or deadline <= 0:
+        return None, "'deadline_seconds' must be a positive number"
+    # Callers may ask for less time than the configured deadline, never more
+    arguments["deadline_seconds"] = min(float(deadline), ResilienceConfig.REQUEST_DEADLINE_SECONDS)
+    return arguments, None
+
+class AgentHTTPServer(ThreadingHTTPServer):
+    """HTTP front end sharing one backend and worker pool between all connections"""
+    daemon_threads = True
+    request_queue_size = 128
+    
+    def __init__(self, address: Tuple[str, int], backend: AgentBackend, pool: WorkerPool):
+        super().__init__(address, AgentRequestHandler)
+        self.backend = backend
+        self.pool = pool
+        self.draining = False
+    
+    def is_ready(self) -> Tuple[bool, str]:
+        """Whether the load balancer should send traffic here"""
+        if self.draining:
+            return False, "draining"
+        if not self.backend.aws_service.is_connected() or self.backend.rag_agent is None:
+            return False, "backend not connected"
+        return True, "ready"
+
+class AgentRequestHandler(BaseHTTPRequestHandler):
+    """JSON and server-sent event endpoints of the agent server"""
+    server: AgentHTTPServer
+    
+    def log_message(self, format: str, *args) -> None:
+        """Access log to stderr unless ServerConfig.ACCESS_LOG is off"""
+        if ServerConfig.ACCESS_LOG:
+            super().log_message(format, *args)
+    
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        """Write a complete JSON response"""
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self) -> None:
+        """Health, readiness and stats endpoints"""
+        if self.path == "/healthz":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/readyz":
+            ready, status = self.server.is_ready()
+            self._send_json(200 if ready else 503, dict(self.server.pool.get_stats(), status=status))
+        elif self.path == "/stats":
+            self._send_json(200, {
+                "pool": self.server.pool.get_stats(),
+                "bulkheads": get_bulkhead_stats(),
+                "breakers": get_breaker_stats(),
+                "routing": self.server.backend.model_router.get_stats()
+            })
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+    
+    def do_POST(self) -> None:
+        """Run an agent flow on the worker pool"""
+        if self.path != "/query":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        ready, status = self.server.is_ready()
+        if not ready:
+            self._send_json(503, {"error": f"Not accepting requests: {status}"},
+                            {"Retry-After": str(ServerConfig.RETRY_AFTER_SECONDS)})
+            return
+        
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+        except ValueError:
+            length = -1
+        if length <= 0 or length > ServerConfig.MAX_BODY_BYTES:
+            self._send_json(400 if length <= 0 else 413, {"error": "A JSON body up to "
+                                                          f"{ServerConfig.MAX_BODY_BYTES} bytes is required"})
+            return
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._send_json(400, {"error": "Body is not valid JSON"})
+            return
+        if not isinstance(body, dict):
+            self._send_json(400, {"error": "Body must be an object"})
+            return
+        arguments, error = parse_query_request(body, self.server.backend.vector_db_service.tenant_exists)
+        if error:
+            self._send_json(400, {"error": error})
+            return
+        
+        if not self.server.pool.try_admit():
+            self._send_json(429, {"error": "Server busy: all workers and queue slots are taken"},
+                            {"Retry-After": str(ServerConfig.RETRY_AFTER_SECONDS)})
+            return
+        
+        try:
+            stream = body.get("stream") is True or "text/event-stream" in self.headers.get("Accept", "")
+            if stream:
+                self._stream_flow(arguments)
+            else:
+                self._run_flow(arguments)
+        finally:
+            self.server.pool.release()
+    
+    def _submit(self, arguments: Dict[str, Any], on_text: Optional[Callable[[str], None]] = None) -> Future:
+        """Queue a flow, giving it whatever deadline remains when a worker starts it"""
+        backend = self.server.backend
+        
+        def run(remaining: float) -> Dict[str, Any]:
+            return backend.execute_agentic_flow(
+                arguments["query"], arguments["risk_weight"], arguments["accuracy_weight"],
+                arguments["latency_weight"], arguments["cost_weight"], arguments["guardrails"],
+                tenant=arguments["tenant"], deadline_seconds=remaining,
+                filters=arguments["filters"], on_text=on_text
+            )
+        
+        return self.server.pool.submit(run, arguments["deadline_seconds"])
+    
+    def _run_flow(self, arguments: Dict[str, Any]) -> None:
+        """Answer with the whole flow result once it completes"""
+        start = time.perf_counter()
+        try:
+            result = self._submit(arguments).result()
+        except QueueTimeoutError as e:
+            self._send_json(503, {"error": f"Deadline expired in the queue: {e}"},
+                            {"Retry-After": str(ServerConfig.RETRY_AFTER_SECONDS)})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": f"Agent flow failed: {str(e)}"})
+            return
+        self._send_json(200, dict(serialize_result(result), latency_ms=(time.perf_counter() - start) * 1000))
+    
+    def _send_event(self, event: str, payload: Dict[str, Any]) -> None:
+        """Write one server-sent event"""
+        data = json.dumps(payload, default=str)
+        self.wfile.write(f"event: {event}\ndata: {data}\n\n".encode("utf-8"))
+        self.wfile.flush()
+    
+    def _stream_flow(self, arguments: Dict[str, Any]) -> None:
+        """
+        Answer with server-sent events: delta events as the Response Agent's output arrives, then
+        a result event whose final_response is authoritative (it adds preambles and replaces the
+        streamed text when the answer was escalated or degraded), or an error event
+        """
+        start = time.perf_counter()
+        events: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        future = self._submit(arguments, on_text=lambda text: events.put(("delta", text)))
+        future.add_done_callback(lambda _: events.put(("done", None)))
+        
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            self._send_event("accepted", self.server.pool.get_stats())
+            while True:
+                try:
+                    kind, text = events.get(timeout=ServerConfig.SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                if kind == "delta":
+                    self._send_event("delta", {"text": text})
+                    continue
+                try:
+                    result = future.result()
+                except QueueTimeoutError as e:
+                    self._send_event("error", {"error": f"Deadline expired in the queue: {e}"})
+                except Exception as e:
+                    self._send_event("error", {"error": f"Agent flow failed: {str(e)}"})
+                else:
+                    self._send_event("result", dict(serialize_result(result),
+                                                    latency_ms=(time.perf_counter() - start) * 1000))
+                return
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away; the flow finishes on its worker and its output is dropped
+            return
+
+def serve(host: str = ServerConfig.HOST, port: int = ServerConfig.PORT,
+          workers: int = ServerConfig.WORKERS, max_queue: int = ServerConfig.MAX_QUEUE) -> None:
+    """Connect the backend and serve until SIGTERM or SIGINT, then drain admitted requests"""
+    backend = AgentBackend()
+    success, message = backend.connect_aws(
+        os.environ.get("AWS_ACCESS_KEY_ID", ""), os.environ.get("AWS_SECRET_ACCESS_KEY", ""),
+        os.environ.get("AWS_DEFAULT_REGION", AppConfig.AWS_DEFAULT_REGION)
+    )
+    print(message)
+    
+    # Every flow runs steps on each of these bulkheads, which refuse rather than queue; more workers
+    # than the smallest one's slots would turn load into degraded answers instead of queueing or 429s
+    dependencies = set(ResilienceConfig.AGENT_DEPENDENCIES.values()) | {"local"}
+    slots, pool_name = min((ResilienceConfig.POOL_SIZES[name], name) for name in dependencies)
+    if ResilienceConfig.ENABLED and workers > slots:
+        print(f"Limiting workers to {slots}, the size of the {pool_name} bulkhead "
+              "(ResilienceConfig.POOL_SIZES)")
+        workers = slots
+    pool = WorkerPool(workers, max_queue)
+    server = AgentHTTPServer((host, port), backend, pool)
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+    # serve_forever runs on its own thread so the main thread can stop it after draining
+    threading.Thread(target=server.serve_forever, name="http-server", daemon=True).start()
+    print(f"Serving on http://{host}:{port} with {workers} workers and {max_queue} queue slots")
+    
+    while not stop.wait(0.5):
+        pass
+    # Readiness fails first so the load balancer stops routing here, while admitted requests finish
+    server.draining = True
+    stats = pool.get_stats()
+    print(f"Draining {stats['running']} running and {stats['queued']} queued request(s)")
+    drained = pool.wait_idle(ServerConfig.DRAIN_TIMEOUT_SECONDS)
+    if not drained:
+        print(f"Drain timed out after {ServerConfig.DRAIN_TIMEOUT_SECONDS:.0f}s; stopping anyway")
+    server.shutdown()
+    server.server_close()
+    pool.shutdown(wait=drained)
+    print("Server stopped")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless HTTP server for the agent backend")
+    parser.add_argument("--host", default=ServerConfig.HOST)
+    parser.add_argument("--port", type=int, default=ServerConfig.PORT)
+    parser.add_argument("--workers", type=int, default=ServerConfig.WORKERS)
+    parser.add_argument("--max-queue", type=int, default=ServerConfig.MAX_QUEUE)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.max_queue)
@@ -4,10 +4,43 @@ from .aws_service import AWSService
 from .langfuse_service import LangfuseService
 from .vector_db_service import VectorDBService
 from .document_processor import DocumentProcessor
+from .pdf_extractors import PDFExtractor, ExtractionCache
+from .rerank_service import RerankService
+from .context_compressor import ContextCompressor
+from .chunk_deduplicator import ChunkDeduplicator
+from .model_router import ModelRouter, RoutingDecision
+from .single_flight import SingleFlight
+from .ingestion_pipeline import IngestionPipeline
+from .ingestion_queue import IngestionQueue, IngestionServices
+from .extractive_answerer import ExtractiveAnswerer
+from .profiler import StackSampler
+from .resilience import (
+    Deadline, CircuitBreaker, Bulkhead, DeadlineExceeded, CircuitOpenError, BulkheadFullError, StreamCancelled
+)
 
 __all__ = [
     'AWSService',
     'LangfuseService',
     'VectorDBService',
-    'DocumentProcessor'
+    'DocumentProcessor',
+    'PDFExtractor',
+    'ExtractionCache',
+    'RerankService',
+    'ContextCompressor',
+    'ChunkDeduplicator',
+    'ModelRouter',
+    'RoutingDecision',
+    'SingleFlight',
+    'IngestionPipeline',
+    'IngestionQueue',
+    'IngestionServices',
+    'ExtractiveAnswerer',
+    'StackSampler',
+    'Deadline',
+    'CircuitBreaker',
+    'Bulkhead',
+    'DeadlineExceeded',
+    'CircuitOpenError',
+    'BulkheadFullError',
+    'StreamCancelled'
 ]
@@ -1,6 +1,19 @@
 import json
+import hashlib
+import random
+import time
 import boto3
-from typing import Tuple, Optional
+from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectTimeoutError, ReadTimeoutError
+from typing import Tuple, Optional, Dict, Any, Callable
+from config.settings import ResilienceConfig, CassetteConfig, SimulatorConfig
+from services.resilience import get_breaker, StreamCancelled
+from services.bedrock_cassette import CassetteClient
+from services.bedrock_simulator import BedrockSimulator, get_simulator
+
+# Errors worth another attempt: the same set botocore's standard retry mode retries for Bedrock
+_RETRYABLE_CODES = {"ThrottlingException", "ServiceUnavailableException", "ModelNotReadyException",
+                    "InternalServerException"}
 
 class AWSService:
     """Service for AWS Bedrock interactions"""
@@ -9,17 +22,52 @@ class AWSService:
         self.client: Optional[boto3.client] = None
         self.session: Optional[boto3.Session] = None
         self.region: Optional[str] = None
+        # Which Bedrock endpoint and account answers this service's calls; holds no secrets
+        self.endpoint_key: Tuple = ()
+        self.breaker = get_breaker("bedrock")
+        # botocore retries real clients itself; other clients are retried here
+        self.max_attempts = 1
+        self.retries = 0
         
     def connect(self, access_key: str, secret_key: str, region: str) -> Tuple[bool, str]:
-        """Connect to AWS Bedrock"""
+        """
+        Connect to AWS Bedrock, through the cassette recorder when CassetteConfig.MODE is set
+        With SimulatorConfig.ENABLED, connects to the local Bedrock simulator instead
+        """
         try:
+            self.max_attempts = 1
+            if SimulatorConfig.ENABLED:
+                self.client = get_simulator()
+                self.max_attempts = ResilienceConfig.BEDROCK_MAX_ATTEMPTS
+                self.region = region
+                self.endpoint_key = ("simulator", SimulatorConfig.PROFILE)
+                return True, f"Connected to the Bedrock simulator (profile: {SimulatorConfig.PROFILE})"
+            
+            if CassetteConfig.MODE == "replay":
+                # Served entirely from recorded cassettes: no credentials or network needed
+                self.client = CassetteClient(mode="replay")
+                self.region = region
+                self.endpoint_key = ("replay",)
+                return True, "Replaying recorded Bedrock responses"
+            
             self.session = boto3.Session(
                 aws_access_key_id=access_key,
                 aws_secret_access_key=secret_key,
                 region_name=region
             )
-            self.client = self.session.client('bedrock-runtime')
+            # Bounded timeouts and retries: a stuck call gives up within the Response Agent's cap
+            self.client = self.session.client('bedrock-runtime', config=Config(
+                connect_timeout=ResilienceConfig.BEDROCK_CONNECT_TIMEOUT_SECONDS,
+                read_timeout=ResilienceConfig.BEDROCK_READ_TIMEOUT_SECONDS,
+                retries={"max_attempts": ResilienceConfig.BEDROCK_MAX_ATTEMPTS, "mode": "standard"}
+            ))
             self.region = region
+            # A digest identifies the account without keeping the credentials in cache keys
+            credentials_digest = hashlib.sha256(f"{access_key}:{secret_key}".encode("utf-8")).hexdigest()[:16]
+            self.endpoint_key = ("bedrock", region, credentials_digest, CassetteConfig.MODE)
+            if CassetteConfig.MODE != "off":
+                self.client = CassetteClient(self.client)
+                return True, f"AWS Connected Successfully (cassette mode: {CassetteConfig.MODE})"
             return True, "AWS Connected Successfully"
         except Exception as e:
             return False, f"AWS Connection Failed: {str(e)}"
@@ -31,24 +79,138 @@ class AWSService:
     def invoke_model(self, prompt: str, max_tokens: int = 4000, 
                      temperature: float = 0.7, model_id: str = None) -> str:
         """Invoke Claude model on Bedrock"""
+        return self.invoke(prompt, max_tokens, temperature, model_id)["text"]
+    
+    def invoke(self, prompt: str, max_tokens: int = 4000,
+               temperature: float = 0.7, model_id: str = None) -> Dict[str, Any]:
+        """Invoke Claude model on Bedrock, returning text, token usage and latency"""
         if not self.client:
             raise Exception("AWS Bedrock not connected")
         
+        model_id = self._resolve_model(model_id)
+        start = time.perf_counter()
+        response = self._guarded(
+            self._with_retries,
+            self.client.invoke_model,
+            modelId=model_id,
+            body=self._request_body(prompt, max_tokens, temperature)
+        )
+        
+        response_body = json.loads(response['body'].read())
+        return {
+            "text": response_body['content'][0]['text'],
+            "usage": response_body.get('usage', {}),
+            "latency_ms": (time.perf_counter() - start) * 1000,
+            "model_id": model_id
+        }
+    
+    @staticmethod
+    def _resolve_model(model_id: Optional[str]) -> str:
+        """Requested model, or the configured default"""
         if model_id is None:
             from config.settings import ModelConfig
             model_id = ModelConfig.BEDROCK_MODEL_ID
-        
-        request_body = {
+        return model_id
+    
+    @staticmethod
+    def _request_body(prompt: str, max_tokens: int, temperature: float) -> str:
+        """Anthropic messages request body"""
+        return json.dumps({
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": max_tokens,
             "messages": [{"role": "user", "content": prompt}],
             "temperature": temperature
-        }
+        })
+    
+    def invoke_stream(self, prompt: str, max_tokens: int = 4000, temperature: float = 0.7,
+                      model_id: str = None, on_text: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Invoke Claude with a streamed response, calling on_text with each text delta as it arrives
+        on_text may raise StreamCancelled to stop reading; the text so far is returned
+        Returns the same fields as invoke plus ttft_ms, the time to the first text delta
+        """
+        if not self.client:
+            raise Exception("AWS Bedrock not connected")
+        model_id = self._resolve_model(model_id)
         
-        response = self.client.invoke_model(
-            modelId=model_id,
-            body=json.dumps(request_body)
-        )
+        def stream() -> Dict[str, Any]:
+            start = time.perf_counter()
+            response = self._with_retries(
+                self.client.invoke_model_with_response_stream,
+                modelId=model_id, body=self._request_body(prompt, max_tokens, temperature)
+            )
+            parts, usage, ttft_ms = [], {}, None
+            for event in response["body"]:
+                if "chunk" not in event:
+                    continue
+                chunk = json.loads(event["chunk"]["bytes"])
+                if chunk["type"] == "message_start":
+                    usage.update(chunk["message"].get("usage", {}))
+                elif chunk["type"] == "content_block_delta" and chunk["delta"].get("type") == "text_delta":
+                    if ttft_ms is None:
+                        ttft_ms = (time.perf_counter() - start) * 1000
+                    parts.append(chunk["delta"]["text"])
+                    if on_text:
+                        try:
+                            on_text(chunk["delta"]["text"])
+                        except StreamCancelled:
+                            # Stop now so the connection and the caller's worker slot are freed,
+                            # without counting the abandoned stream as a Bedrock failure
+                            close = getattr(response["body"], "close", None)
+                            if close:
+                                close()
+                            break
+                elif chunk["type"] == "message_delta":
+                    usage.update(chunk.get("usage", {}))
+            return {
+                "text": "".join(parts),
+                "usage": usage,
+                "latency_ms": (time.perf_counter() - start) * 1000,
+                "ttft_ms": ttft_ms,
+                "model_id": model_id
+            }
         
-        response_body = json.loads(response['body'].read())
-        return response_body['content'][0]['text']
+        # The whole stream counts as one call, so a connection dropped mid-stream trips the breaker
+        return self._guarded(stream)
+    
+    def _guarded(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a Bedrock call through the shared breaker
+        Replayed calls never reach Bedrock, so they bypass it: a cassette miss is a test failure,
+        not an outage, and must not open the breaker for the other sessions
+        """
+        if isinstance(self.client, CassetteClient) and self.client.mode == "replay":
+            return fn(*args, **kwargs)
+        return self.breaker.call(fn, *args, **kwargs)
+    
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Whether a failed Bedrock call may succeed when repeated"""
+        if isinstance(error, (ReadTimeoutError, ConnectTimeoutError)):
+            return True
+        return isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") in _RETRYABLE_CODES
+    
+    def _with_retries(self, fn: Callable[..., Any], **kwargs) -> Any:
+        """Call fn, retrying throttling and timeouts with full-jitter exponential backoff up to max_attempts"""
+        attempt = 1
+        while True:
+            try:
+                return fn(**kwargs)
+            except Exception as e:
+                if attempt >= self.max_attempts or not self._is_retryable(e):
+                    raise
+            delay = min(ResilienceConfig.BEDROCK_RETRY_MAX_SECONDS,
+                        ResilienceConfig.BEDROCK_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+            time.sleep(random.uniform(0, delay))
+            attempt += 1
+            self.retries += 1
+    
+    def get_simulator_stats(self) -> Optional[Dict[str, Any]]:
+        """Simulator counters and application-level retries, or None when not connected to the simulator"""
+        if not isinstance(self.client, BedrockSimulator):
+            return None
+        return dict(self.client.get_stats(), retries=self.retries)
+    
+    def get_cassette_stats(self) -> Optional[Dict[str, Any]]:
+        """Record/replay counts, or None when Bedrock calls are not going through cassettes"""
+        return self.client.get_stats() if isinstance(self.client, CassetteClient) else None
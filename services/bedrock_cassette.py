@@ -0,0 +1,145 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, Iterator
+from config.settings import CassetteConfig
+
+class CassetteMissError(Exception):
+    """A replayed request has no recorded cassette"""
+
+class CassetteClient:
+    """
+    Stand-in for a bedrock-runtime client that records responses to cassette files and replays them
+    Modes: "record" always calls the inner client and overwrites the cassette, "replay" serves
+    cassettes only, and "auto" replays when a cassette exists and records otherwise
+    """
+    
+    def __init__(self, inner=None, directory: str = CassetteConfig.DIRECTORY,
+                 mode: str = CassetteConfig.MODE, latency: str = CassetteConfig.REPLAY_LATENCY):
+        if mode not in ("record", "replay", "auto"):
+            raise ValueError(f"Unknown cassette mode '{mode}'")
+        if inner is None and mode != "replay":
+            raise ValueError(f"Cassette mode '{mode}' needs a Bedrock client to record from")
+        self.inner = inner
+        self.directory = directory
+        self.mode = mode
+        self.latency = latency
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def request_key(operation: str, model_id: str, body: str) -> str:
+        """Hash identifying a request; the body is canonicalized so key order does not matter"""
+        canonical = json.dumps({"operation": operation, "model_id": model_id, "body": json.loads(body)},
+                               sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        """Cassette file of a request key, sharded by its first two hex digits"""
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+    
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Recorded cassette of a request key, or None when missing or unreadable"""
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _save(self, key: str, cassette: Dict[str, Any]) -> None:
+        """Write a cassette atomically so a concurrent replay never reads a partial file"""
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(cassette, f, indent=1)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self.recorded += 1
+        except OSError as e:
+            print(f"Error writing cassette: {e}")
+    
+    def _lookup(self, operation: str, model_id: str, body: str):
+        """(key, cassette) for a request; the cassette is None when it must be recorded"""
+        key = self.request_key(operation, model_id, body)
+        cassette = None if self.mode == "record" else self._load(key)
+        with self._lock:
+            if cassette is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if cassette is None and self.mode == "replay":
+            raise CassetteMissError(f"No cassette for {operation} on {model_id} (key {key[:12]})")
+        return key, cassette
+    
+    def _request(self, operation: str, model_id: str, body: str) -> Dict[str, Any]:
+        """Request stored alongside the response so cassettes can be inspected and diffed"""
+        return {"operation": operation, "model_id": model_id, "body": json.loads(body)}
+    
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        """bedrock-runtime invoke_model, recorded or replayed"""
+        key, cassette = self._lookup("invoke_model", modelId, body)
+        if cassette is not None:
+            if self.latency == "recorded":
+                time.sleep(cassette["latency_ms"] / 1000)
+            return {"body": io.BytesIO(cassette["response"]["body"].encode("utf-8")),
+                    "contentType": "application/json"}
+        
+        start = time.perf_counter()
+        response = self.inner.invoke_model(modelId=modelId, body=body, **kwargs)
+        response_body = response["body"].read()
+        self._save(key, {
+            "request": self._request("invoke_model", modelId, body),
+            "response": {"body": response_body.decode("utf-8")},
+            "latency_ms": (time.perf_counter() - start) * 1000,
+            "recorded_at": datetime.now().isoformat()
+        })
+        return {"body": io.BytesIO(response_body), "contentType": response.get("contentType", "application/json")}
+    
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        """bedrock-runtime invoke_model_with_response_stream, recorded or replayed chunk by chunk"""
+        key, cassette = self._lookup("invoke_model_with_response_stream", modelId, body)
+        if cassette is not None:
+            return {"body": self._replay_stream(cassette), "contentType": "application/json"}
+        response = self.inner.invoke_model_with_response_stream(modelId=modelId, body=body, **kwargs)
+        return {"body": self._record_stream(key, modelId, body, response["body"]),
+                "contentType": response.get("contentType", "application/json")}
+    
+    def _replay_stream(self, cassette: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Stream events of a cassette, spaced by their recorded offsets when latency is replayed"""
+        start = time.perf_counter()
+        for chunk in cassette["response"]["chunks"]:
+            if self.latency == "recorded":
+                delay = chunk["offset_ms"] / 1000 - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            yield {"chunk": {"bytes": chunk["bytes"].encode("utf-8")}}
+    
+    def _record_stream(self, key: str, model_id: str, body: str, events) -> Iterator[Dict[str, Any]]:
+        """Pass stream events through, saving the cassette once the stream completes"""
+        start = time.perf_counter()
+        chunks = []
+        for event in events:
+            if "chunk" in event:
+                chunks.append({"bytes": event["chunk"]["bytes"].decode("utf-8"),
+                               "offset_ms": (time.perf_counter() - start) * 1000})
+            yield event
+        self._save(key, {
+            "request": self._request("invoke_model_with_response_stream", model_id, body),
+            "response": {"chunks": chunks},
+            "latency_ms": (time.perf_counter() - start) * 1000,
+            "recorded_at": datetime.now().isoformat()
+        })
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Replay hits, misses and recordings since start"""
+        with self._lock:
+            return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "recorded": self.recorded}
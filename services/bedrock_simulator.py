@@ -0,0 +1,239 @@
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+from typing import Dict, Any, List, Iterator, Callable, Optional
+from botocore.exceptions import ClientError, ReadTimeoutError
+from config.settings import SimulatorConfig
+
+_FILLER_WORDS = [
+    "the", "policy", "customer", "account", "request", "support", "process", "team", "update",
+    "order", "review", "service", "details", "please", "note", "within", "days", "information"
+]
+
+class _SimulatedStream:
+    """
+    Response stream body that holds a concurrency slot until it is read to the end, closed or
+    garbage-collected, so a caller that never iterates it does not leak the slot
+    """
+    
+    def __init__(self, events: Iterator[Dict[str, Any]], release: Callable[[bool], None]):
+        self._events = events
+        self._release = release
+        self._released = False
+        self._lock = threading.Lock()
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        completed = False
+        try:
+            for event in self._events:
+                yield event
+            completed = True
+        finally:
+            self._finish(completed)
+    
+    def close(self) -> None:
+        """Stop the stream and free its slot, like closing botocore's EventStream"""
+        self._events.close()
+        self._finish(False)
+    
+    def _finish(self, completed: bool) -> None:
+        """Release the slot exactly once"""
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._release(completed)
+    
+    def __del__(self):
+        self._finish(False)
+
+class BedrockSimulator:
+    """
+    Local stand-in for a bedrock-runtime client that generates synthetic completions
+    Latency, concurrency limit and injected failures follow a SimulatorConfig profile, and
+    failures use the same botocore exception types as the real client
+    """
+    
+    def __init__(self, profile: Optional[str] = None, seed=None, **overrides):
+        # Read at construction, not import, so settings changed at runtime take effect
+        profile = profile or SimulatorConfig.PROFILE
+        seed = SimulatorConfig.SEED if seed is None else seed
+        if profile not in SimulatorConfig.PROFILES:
+            raise ValueError(f"Unknown simulator profile '{profile}'")
+        settings = dict(SimulatorConfig.PROFILES[profile], **overrides)
+        self.profile = profile
+        self.ttft_ms = settings["ttft_ms"]
+        self.ms_per_token = settings["ms_per_token"]
+        self.prefill_ms_per_1k = settings["prefill_ms_per_1k"]
+        self.max_concurrency = settings["max_concurrency"]
+        self.throttle_rate = settings["throttle_rate"]
+        self.timeout_rate = settings["timeout_rate"]
+        self.output_tokens = settings.get("output_tokens", SimulatorConfig.OUTPUT_TOKENS)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.timed_out = 0
+        self.completed = 0
+        self.peak_concurrency = 0
+        self.output_token_total = 0
+    
+    def _admit(self, operation: str) -> None:
+        """Take a concurrency slot, or throttle when none is free or a throttle is injected"""
+        with self._lock:
+            self.requests += 1
+            injected = self._rng.random() < self.throttle_rate
+            if injected or self._in_flight >= self.max_concurrency:
+                self.throttled += 1
+                raise ClientError({
+                    "Error": {"Code": "ThrottlingException",
+                              "Message": "Too many requests, please wait before trying again."},
+                    "ResponseMetadata": {"HTTPStatusCode": 429}
+                }, operation)
+            self._in_flight += 1
+            self.peak_concurrency = max(self.peak_concurrency, self._in_flight)
+    
+    def _release(self, output_tokens: int = 0, completed: bool = True) -> None:
+        """Free a concurrency slot"""
+        with self._lock:
+            self._in_flight -= 1
+            if completed:
+                self.completed += 1
+                self.output_token_total += output_tokens
+    
+    def _timeout(self, model_id: str) -> None:
+        """Hang like a stalled connection, then fail the way botocore does"""
+        time.sleep(SimulatorConfig.TIMEOUT_SECONDS)
+        with self._lock:
+            self.timed_out += 1
+        raise ReadTimeoutError(endpoint_url=f"simulator://{model_id}")
+    
+    def _plan(self, model_id: str, body: str) -> Dict[str, Any]:
+        """Completion tokens, usage and timing of a request"""
+        request = json.loads(body)
+        prompt = " ".join(
+            message["content"] if isinstance(message["content"], str)
+            else " ".join(block.get("text", "") for block in message["content"])
+            for message in request.get("messages", [])
+        )
+        # Completions are deterministic per request, so repeated requests are cacheable
+        seed = hashlib.sha256(f"{model_id}\n{body}".encode("utf-8")).digest()
+        words = [word for word in prompt.split() if word.isalpha()] or _FILLER_WORDS
+        rng = random.Random(seed)
+        count = max(1, min(self.output_tokens, request.get("max_tokens", self.output_tokens)))
+        tokens = [rng.choice(words) for _ in range(count)]
+        input_tokens = max(1, len(prompt) // 4)
+        speed = SimulatorConfig.MODEL_SPEED.get(model_id, 1.0)
+        with self._lock:
+            times_out = self._rng.random() < self.timeout_rate
+        return {
+            "tokens": tokens,
+            "input_tokens": input_tokens,
+            "stop_reason": "max_tokens" if count < self.output_tokens else "end_turn",
+            "ttft_seconds": (self.ttft_ms + self.prefill_ms_per_1k * input_tokens / 1000) / 1000,
+            "token_seconds": self.ms_per_token / speed / 1000,
+            "times_out": times_out
+        }
+    
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        """bedrock-runtime invoke_model with a synthetic Anthropic messages response"""
+        self._admit("InvokeModel")
+        plan = None
+        try:
+            plan = self._plan(modelId, body)
+            if plan["times_out"]:
+                self._timeout(modelId)
+            time.sleep(plan["ttft_seconds"] + plan["token_seconds"] * len(plan["tokens"]))
+            response = {
+                "id": f"msg_sim_{self._rng.getrandbits(48):012x}",
+                "type": "message",
+                "role": "assistant",
+                "model": modelId,
+                "content": [{"type": "text", "text": " ".join(plan["tokens"])}],
+                "stop_reason": plan["stop_reason"],
+                "usage": {"input_tokens": plan["input_tokens"], "output_tokens": len(plan["tokens"])}
+            }
+        except Exception:
+            self._release(completed=False)
+            raise
+        self._release(len(plan["tokens"]))
+        return {"body": io.BytesIO(json.dumps(response).encode("utf-8")), "contentType": "application/json"}
+    
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        """
+        bedrock-runtime invoke_model_with_response_stream with synthetic events paced per token
+        Throttling is raised by this call; timeouts surface while the stream is read
+        The concurrency slot is held until the stream is read to the end, closed or dropped
+        """
+        self._admit("InvokeModelWithResponseStream")
+        try:
+            plan = self._plan(modelId, body)
+        except Exception:
+            self._release(completed=False)
+            raise
+        body_stream = _SimulatedStream(
+            self._stream(modelId, plan),
+            lambda completed: self._release(len(plan["tokens"]), completed=completed)
+        )
+        return {"body": body_stream, "contentType": "application/json"}
+    
+    def _stream(self, model_id: str, plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Anthropic streaming events of a planned completion"""
+        if plan["times_out"]:
+            self._timeout(model_id)
+        time.sleep(plan["ttft_seconds"])
+        tokens: List[str] = plan["tokens"]
+        events = [
+            {"type": "message_start", "message": {
+                "id": f"msg_sim_{self._rng.getrandbits(48):012x}", "type": "message", "role": "assistant",
+                "model": model_id, "content": [],
+                "usage": {"input_tokens": plan["input_tokens"], "output_tokens": 1}
+            }},
+            {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}
+        ]
+        for event in events:
+            yield {"chunk": {"bytes": json.dumps(event).encode("utf-8")}}
+        for position, token in enumerate(tokens):
+            if position:
+                time.sleep(plan["token_seconds"])
+            delta = {"type": "content_block_delta", "index": 0,
+                     "delta": {"type": "text_delta", "text": token if position == 0 else f" {token}"}}
+            yield {"chunk": {"bytes": json.dumps(delta).encode("utf-8")}}
+        for event in (
+            {"type": "content_block_stop", "index": 0},
+            {"type": "message_delta", "delta": {"stop_reason": plan["stop_reason"]},
+             "usage": {"output_tokens": len(tokens)}},
+            {"type": "message_stop"}
+        ):
+            yield {"chunk": {"bytes": json.dumps(event).encode("utf-8")}}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Request, throttling, timeout and concurrency counters since start"""
+        with self._lock:
+            return {
+                "profile": self.profile,
+                "requests": self.requests,
+                "completed": self.completed,
+                "throttled": self.throttled,
+                "timed_out": self.timed_out,
+                "in_flight": self._in_flight,
+                "peak_concurrency": self.peak_concurrency,
+                "output_tokens": self.output_token_total
+            }
+
+# One simulator per profile for the whole process: every session shares the simulated endpoint,
+# so its concurrency limit and throttling apply across sessions as Bedrock's quota would
+_simulators: Dict[str, BedrockSimulator] = {}
+_simulators_lock = threading.Lock()
+
+def get_simulator(profile: Optional[str] = None) -> BedrockSimulator:
+    """Process-wide simulator of a profile, SimulatorConfig.PROFILE by default"""
+    profile = profile or SimulatorConfig.PROFILE
+    with _simulators_lock:
+        if profile not in _simulators:
+            _simulators[profile] = BedrockSimulator(profile)
+        return _simulators[profile]
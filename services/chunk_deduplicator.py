@@ -0,0 +1,92 @@
+import re
+import zlib
+import numpy as np
+from typing import List, Optional, Dict, Tuple, Hashable
+from config.settings import DedupConfig
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+class ChunkDeduplicator:
+    """Service for near-duplicate chunk detection with MinHash-LSH"""
+    
+    def __init__(self, shingle_size: int = DedupConfig.SHINGLE_SIZE,
+                 num_permutations: int = DedupConfig.NUM_PERMUTATIONS,
+                 bands: int = DedupConfig.BANDS,
+                 threshold: float = DedupConfig.SIMILARITY_THRESHOLD,
+                 seed: int = 1):
+        if num_permutations % bands != 0:
+            raise ValueError("num_permutations must be divisible by bands")
+        self.shingle_size = shingle_size
+        self.num_permutations = num_permutations
+        self.bands = bands
+        self.rows = num_permutations // bands
+        self.threshold = threshold
+        
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MERSENNE_PRIME, size=(num_permutations, 1)).astype(np.uint64)
+        self._b = rng.randint(0, _MERSENNE_PRIME, size=(num_permutations, 1)).astype(np.uint64)
+    
+    def _shingles(self, text: str) -> np.ndarray:
+        """Hash word shingles of the normalized text"""
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        if len(tokens) <= self.shingle_size:
+            grams = {' '.join(tokens)}
+        else:
+            grams = {
+                ' '.join(tokens[i:i + self.shingle_size])
+                for i in range(len(tokens) - self.shingle_size + 1)
+            }
+        return np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams),
+                           dtype=np.uint64, count=len(grams))
+    
+    def signature(self, text: str) -> np.ndarray:
+        """Compute the MinHash signature of a chunk"""
+        hashes = self._shingles(text)
+        return ((self._a * hashes + self._b) % _MERSENNE_PRIME).min(axis=1)
+    
+    def find_duplicates(self, texts: List[str]) -> List[Optional[int]]:
+        """
+        Map every chunk to the index of the earlier chunk it duplicates
+        Returns: list where entry i is None for canonical chunks, else the canonical index
+        """
+        index = DuplicateIndex(self)
+        return [index.add(idx, text) for idx, text in enumerate(texts)]
+
+class DuplicateIndex:
+    """LSH buckets of the canonical chunks seen so far, for finding duplicates one chunk at a time"""
+    
+    def __init__(self, deduplicator: ChunkDeduplicator):
+        self.deduplicator = deduplicator
+        self._buckets: Dict[Tuple[int, bytes], List[Hashable]] = {}
+        # Only canonical chunks are candidates, so only their signatures are kept
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+        self._positions: Dict[Hashable, int] = {}
+    
+    def add(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """Register a chunk under key; returns the key of the earliest chunk it duplicates, or None"""
+        deduplicator = self.deduplicator
+        sig = deduplicator.signature(text)
+        band_keys = [
+            (band, sig[band * deduplicator.rows:(band + 1) * deduplicator.rows].tobytes())
+            for band in range(deduplicator.bands)
+        ]
+        
+        match = None
+        checked = set()
+        for band_key in band_keys:
+            for candidate in self._buckets.get(band_key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                # Fraction of agreeing MinHash slots estimates Jaccard similarity
+                if np.mean(self._signatures[candidate] == sig) >= deduplicator.threshold:
+                    if match is None or self._positions[candidate] < self._positions[match]:
+                        match = candidate
+        
+        if match is None:
+            self._positions[key] = len(self._positions)
+            self._signatures[key] = sig
+            for band_key in band_keys:
+                self._buckets.setdefault(band_key, []).append(key)
+        return match
@@ -0,0 +1,138 @@
+import re
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from config.settings import CompressionConfig
+from utils.helpers import estimate_tokens
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+class ContextCompressor:
+    """Service for extractive context compression with MMR sentence selection"""
+    
+    def __init__(self, vector_db_service, token_budget: int = CompressionConfig.TOKEN_BUDGET,
+                 mmr_lambda: float = CompressionConfig.MMR_LAMBDA,
+                 min_sentence_length: int = CompressionConfig.MIN_SENTENCE_LENGTH,
+                 cache_size: int = CompressionConfig.CACHE_SIZE):
+        self.vector_db = vector_db_service
+        self.token_budget = token_budget
+        self.mmr_lambda = mmr_lambda
+        self.min_sentence_length = min_sentence_length
+        self.cache_size = cache_size
+        self._embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _split_sentences(self, documents: List[str]) -> List[Tuple[int, int, str]]:
+        """Split chunks into (chunk index, sentence index, sentence), dropping exact repeats"""
+        seen = set()
+        sentences = []
+        for doc_idx, doc in enumerate(documents):
+            for sent_idx, sentence in enumerate(_SENTENCE_SPLIT.split(doc)):
+                sentence = sentence.strip()
+                if len(sentence) < self.min_sentence_length:
+                    continue
+                normalized = ' '.join(sentence.lower().split())
+                if normalized in seen:
+                    continue
+                seen.add(normalized)
+                sentences.append((doc_idx, sent_idx, sentence))
+        return sentences
+    
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed sentences in one batch, reusing cached vectors for repeated boilerplate"""
+        # Vectors are collected locally, so eviction below cannot drop one this call still needs
+        found: Dict[str, np.ndarray] = {}
+        missing = []
+        with self._lock:
+            for text in dict.fromkeys(texts):
+                vector = self._embedding_cache.get(text)
+                if vector is None:
+                    missing.append(text)
+                else:
+                    self._embedding_cache.move_to_end(text)
+                    found[text] = vector
+        
+        if missing:
+            # Embedded outside the lock: other requests keep using the cache meanwhile
+            for text, vector in zip(missing, self.vector_db.embed_texts(missing)):
+                vector = np.asarray(vector, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                found[text] = vector / norm if norm else vector
+            with self._lock:
+                for text in missing:
+                    self._embedding_cache[text] = found[text]
+                while len(self._embedding_cache) > self.cache_size:
+                    self._embedding_cache.popitem(last=False)
+        
+        return np.vstack([found[text] for text in texts])
+    
+    def compress(self, query: str, documents: List[str],
+                 query_embedding: Optional[List[float]] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Select a relevant, diverse subset of sentences under the token budget
+        Returns: (context text, stats)
+        """
+        start = time.perf_counter()
+        original_tokens = sum(estimate_tokens(doc) for doc in documents)
+        # Context that already fits the budget is sent as is, without embedding its sentences
+        sentences = self._split_sentences(documents) if original_tokens > self.token_budget else []
+        
+        if not sentences:
+            context_text = "\n\n---\n\n".join(documents)
+            return context_text, {
+                "original_tokens": original_tokens,
+                "compressed_tokens": original_tokens,
+                "ratio": 1.0,
+                "sentences_total": 0,
+                "sentences_selected": 0,
+                "elapsed_ms": (time.perf_counter() - start) * 1000
+            }
+        
+        if query_embedding is None:
+            query_embedding = self.vector_db.encode_query(query)
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query_vector)
+        if query_norm:
+            query_vector = query_vector / query_norm
+        
+        embeddings = self._embed([sentence for _, _, sentence in sentences])
+        relevance = embeddings @ query_vector
+        token_counts = [estimate_tokens(sentence) for _, _, sentence in sentences]
+        
+        # Maximal marginal relevance: trade query relevance against redundancy with picks so far
+        selected: List[int] = []
+        max_similarity = np.zeros(len(sentences), dtype=np.float32)
+        available = np.ones(len(sentences), dtype=bool)
+        used_tokens = 0
+        smallest = min(token_counts)
+        
+        while available.any() and used_tokens + smallest <= self.token_budget:
+            mmr = self.mmr_lambda * relevance - (1 - self.mmr_lambda) * max_similarity
+            mmr[~available] = -np.inf
+            best = int(np.argmax(mmr))
+            available[best] = False
+            if used_tokens + token_counts[best] > self.token_budget:
+                continue
+            selected.append(best)
+            used_tokens += token_counts[best]
+            max_similarity = np.maximum(max_similarity, embeddings @ embeddings[best])
+        
+        # Keep the selected sentences in their original document order
+        grouped: Dict[int, List[Tuple[int, str]]] = {}
+        for idx in sorted(selected, key=lambda i: sentences[i][:2]):
+            doc_idx, sent_idx, sentence = sentences[idx]
+            grouped.setdefault(doc_idx, []).append((sent_idx, sentence))
+        context_text = "\n\n---\n\n".join(
+            ' '.join(sentence for _, sentence in grouped[doc_idx]) for doc_idx in sorted(grouped)
+        )
+        
+        return context_text, {
+            "original_tokens": original_tokens,
+            "compressed_tokens": used_tokens,
+            "ratio": used_tokens / original_tokens if original_tokens else 1.0,
+            "sentences_total": len(sentences),
+            "sentences_selected": len(selected),
+            "elapsed_ms": (time.perf_counter() - start) * 1000
+        }
@@ -1,46 +1,121 @@
-import io
-import PyPDF2
-from typing import List, Tuple
+import threading
+from typing import List, Tuple, Callable, Optional, Dict, Any
+from config.settings import ExtractionConfig
+from services.pdf_extractors import EXTRACTORS, ExtractionCache, PDFExtractor, available_extractors, benchmark_extractors
+
+# Bump when the paragraph splitting below changes so cached paragraphs are rebuilt
+_PARAGRAPH_FORMAT = 1
 
 class DocumentProcessor:
     """Service for processing PDF documents"""
     
+    def __init__(self, extractor: str = ExtractionConfig.EXTRACTOR,
+                 cache_dir: Optional[str] = ExtractionConfig.CACHE_DIR if ExtractionConfig.CACHE_ENABLED else None):
+        self.extractor_name = extractor
+        self.extractor: Optional[PDFExtractor] = None
+        self.benchmark: List[Dict[str, Any]] = []
+        self.cache = ExtractionCache(cache_dir) if cache_dir else None
+        self._lock = threading.Lock()
+        self._benchmark_thread: Optional[threading.Thread] = None
+        if extractor != "auto":
+            if extractor not in EXTRACTORS or not EXTRACTORS[extractor].is_available():
+                raise ValueError(f"PDF extractor '{extractor}' is not installed")
+            self.extractor = EXTRACTORS[extractor]
+    
+    def _resolve_extractor(self, pdf_bytes: bytes) -> PDFExtractor:
+        """
+        Configured extractor, or in auto mode the fastest one on the first file seen
+        The auto benchmark runs in the background; until it finishes, the first installed
+        extractor in ExtractionConfig.EXTRACTOR_PREFERENCE order is used
+        """
+        if self.extractor is not None:
+            return self.extractor
+        installed = available_extractors()
+        if not installed:
+            raise RuntimeError("No PDF extraction library installed (pypdfium2, pypdf, pdfminer.six or PyPDF2)")
+        with self._lock:
+            if self._benchmark_thread is None:
+                self._benchmark_thread = threading.Thread(
+                    target=self._run_benchmark, args=(pdf_bytes,), name="extractor-benchmark", daemon=True
+                )
+                self._benchmark_thread.start()
+        return self.extractor or installed[0]
+    
+    def wait_for_benchmark(self, timeout: Optional[float] = None) -> None:
+        """Block until a started auto benchmark has picked the extractor"""
+        thread = self._benchmark_thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def _run_benchmark(self, pdf_bytes: bytes) -> None:
+        """Time the installed extractors on a sample file and switch to the fastest"""
+        benchmark = benchmark_extractors(pdf_bytes)
+        self.benchmark = benchmark
+        self.extractor = EXTRACTORS[benchmark[0]["name"]]
+    
     @staticmethod
-    def extract_text_from_pdf(pdf_file) -> Tuple[bool, str, List[str]]:
+    def split_paragraphs(page_texts: List[str]) -> List[str]:
+        """Split page texts into cleaned paragraphs of at least 50 characters"""
+        # Joining once avoids re-copying the growing text on every page
+        content = "\n\n".join(text for text in page_texts if text)
+        
+        # Split into paragraphs
+        content = '\n\n'.join([line.strip() for line in content.split('\n') if line.strip()])
+        paragraphs = content.split('\n\n')
+        
+        # Clean and filter paragraphs
+        valid_paragraphs = []
+        for para in paragraphs:
+            para = para.strip()
+            if len(para) >= 50:  # Minimum paragraph length
+                para = ' '.join(para.split())  # Clean whitespace
+                valid_paragraphs.append(para)
+        return valid_paragraphs
+    
+    def extract_text_from_pdf(self, pdf_file, progress_callback: Optional[Callable[[int, int], None]] = None
+                              ) -> Tuple[bool, str, List[str]]:
         """
         Extract text from PDF and split into paragraphs
+        progress_callback, if given, is called with (pages_done, pages_total) after each page
         Returns: (success, message, paragraphs)
         """
         try:
             pdf_bytes = pdf_file.read()
-            pdf_file_obj = io.BytesIO(pdf_bytes)
-            pdf_reader = PyPDF2.PdfReader(pdf_file_obj)
+            extractor = self._resolve_extractor(pdf_bytes)
             
-            num_pages = len(pdf_reader.pages)
-            content = ""
+            file_hash = None
+            if self.cache is not None:
+                file_hash = ExtractionCache.file_hash(pdf_bytes)
+                entry = self.cache.get(file_hash, extractor, _PARAGRAPH_FORMAT)
+                if entry is not None:
+                    if progress_callback:
+                        progress_callback(entry["pages"], entry["pages"])
+                    if not entry["readable"]:
+                        return False, "No readable text found in PDF", []
+                    return True, f"Extracted {len(entry['paragraphs'])} paragraphs (cached)", entry["paragraphs"]
             
-            for page_num in range(num_pages):
-                page = pdf_reader.pages[page_num]
-                page_text = page.extract_text()
-                if page_text:
-                    content += page_text + "\n\n"
+            page_texts = extractor.extract_pages(pdf_bytes, progress_callback=progress_callback)
+            readable = sum(len(text) for text in page_texts) >= 50
+            valid_paragraphs = self.split_paragraphs(page_texts) if readable else []
+            if file_hash is not None:
+                self.cache.put(file_hash, extractor, _PARAGRAPH_FORMAT,
+                               {"pages": len(page_texts), "readable": readable, "paragraphs": valid_paragraphs})
             
-            if not content or len(content) < 50:
+            if not readable:
                 return False, "No readable text found in PDF", []
-            
-            # Split into paragraphs
-            content = '\n\n'.join([line.strip() for line in content.split('\n') if line.strip()])
-            paragraphs = content.split('\n\n')
-            
-            # Clean and filter paragraphs
-            valid_paragraphs = []
-            for para in paragraphs:
-                para = para.strip()
-                if len(para) >= 50:  # Minimum paragraph length
-                    para = ' '.join(para.split())  # Clean whitespace
-                    valid_paragraphs.append(para)
-            
-            return True, f"Extracted {len(valid_paragraphs)} paragraphs", valid_paragraphs
-            
+            return True, f"Extracted {len(valid_paragraphs)} paragraphs ({extractor.name})", valid_paragraphs
+        
         except Exception as e:
             return False, f"PDF processing error: {str(e)}", []
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Selected extractor, auto-benchmark results and cache hit counts"""
+        extractor = self.extractor
+        return {
+            "mode": self.extractor_name,
+            "extractor": extractor.name if extractor else None,
+            "version": extractor.version() if extractor else None,
+            "available": [e.name for e in available_extractors()],
+            "benchmark": self.benchmark,
+            "cache": self.cache.get_stats() if self.cache else None
+        }
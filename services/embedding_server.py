@@ -0,0 +1,467 @@
+"""
+Local embedding server shared by every backend in the process and by other workers
+
+Run standalone with: python -m services.embedding_server [--socket PATH] [--model NAME]
+"""
+import argparse
+import fcntl
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
+from config.settings import EmbeddingServerConfig
+
+_REQUEST = struct.Struct("<BI")  # op, payload length
+_RESPONSE = struct.Struct("<BIII")  # status, rows, dim, payload length
+_OP_EMBED = 1
+_OP_STATS = 2
+_OP_INFO = 3
+_STATUS_OK = 0
+_STATUS_ERROR = 1
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Read exactly size bytes, raising ConnectionError if the peer closes first"""
+    chunks, remaining = [], size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise ConnectionError("embedding server connection closed")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+def default_socket_path() -> str:
+    """
+    Socket in a directory only the current user can access: $XDG_RUNTIME_DIR when set,
+    otherwise a per-user directory under the system temp directory
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if not runtime_dir:
+        runtime_dir = os.path.join(tempfile.gettempdir(), f"agent-embeddings-{os.getuid()}")
+        os.makedirs(runtime_dir, mode=0o700, exist_ok=True)
+        info = os.stat(runtime_dir)
+        if info.st_uid != os.getuid() or info.st_mode & 0o077:
+            raise PermissionError(f"{runtime_dir} must be owned by this user and not accessible to others")
+    return os.path.join(runtime_dir, "agent-embeddings.sock")
+
+def resolve_socket_path(socket_path: Optional[str] = None) -> str:
+    """Explicit path, else EmbeddingServerConfig.SOCKET_PATH, else the per-user default"""
+    return socket_path or EmbeddingServerConfig.SOCKET_PATH or default_socket_path()
+
+class _StartupLock:
+    """Exclusive lock file next to the socket, so only one process checks and binds at a time"""
+    
+    def __init__(self, socket_path: str):
+        self.path = socket_path + ".lock"
+        self._fd: Optional[int] = None
+    
+    def __enter__(self) -> "_StartupLock":
+        self._fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+def _percentile(values: List[float], pct: float) -> float:
+    return float(np.percentile(values, pct)) if values else 0.0
+
+class _PendingRequest:
+    """Texts of one client request waiting to be batched"""
+    __slots__ = ("texts", "enqueued_at", "done", "result", "error", "cancelled")
+    
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[str] = None
+        self.cancelled = False
+
+class DynamicBatcher:
+    """Groups concurrent embedding requests into batches and encodes them on a worker pool"""
+    
+    def __init__(self, model, max_batch_size: int = EmbeddingServerConfig.MAX_BATCH_SIZE,
+                 max_wait_ms: float = EmbeddingServerConfig.MAX_WAIT_MS,
+                 workers: int = EmbeddingServerConfig.WORKER_THREADS,
+                 stats_window: int = EmbeddingServerConfig.STATS_WINDOW):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self._queue: "queue.Queue[_PendingRequest]" = queue.Queue()
+        self._carry: Optional[_PendingRequest] = None
+        # A batch is only formed once a worker is free, so requests arriving while all
+        # workers are busy accumulate into larger batches
+        self._free_workers = threading.Semaphore(workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed-worker")
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.batch_sizes: Counter = Counter()
+        self.queue_wait_ms = deque(maxlen=stats_window)
+        self.encode_ms = deque(maxlen=stats_window)
+        self._thread = threading.Thread(target=self._batch_loop, name="embed-batcher", daemon=True)
+        self._thread.start()
+    
+    def submit(self, texts: List[str], timeout: Optional[float] = None) -> np.ndarray:
+        """Embed texts as part of the next batch, blocking until the result is ready"""
+        request = _PendingRequest(texts)
+        self._queue.put(request)
+        if not request.done.wait(timeout):
+            # Nobody waits for the result any more, so a still queued request is not encoded
+            request.cancelled = True
+            raise TimeoutError(f"embedding not ready within {timeout}s")
+        if request.error is not None:
+            raise RuntimeError(request.error)
+        return request.result
+    
+    def _next_request(self, timeout: Optional[float]) -> Optional[_PendingRequest]:
+        if self._carry is not None:
+            request, self._carry = self._carry, None
+            if not request.cancelled:
+                return request
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if not request.cancelled:
+                return request
+    
+    def _batch_loop(self) -> None:
+        """Collect requests for up to max_wait after the first one, then hand the batch to a worker"""
+        while True:
+            self._free_workers.acquire()
+            first = self._next_request(None)
+            batch, size = [first], len(first.texts)
+            window_ends = time.perf_counter() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = window_ends - time.perf_counter()
+                if remaining <= 0:
+                    break
+                request = self._next_request(remaining)
+                if request is None:
+                    break
+                if size + len(request.texts) > self.max_batch_size:
+                    self._carry = request
+                    break
+                batch.append(request)
+                size += len(request.texts)
+            self._executor.submit(self._encode_batch, batch)
+    
+    def _encode_batch(self, batch: List[_PendingRequest]) -> None:
+        """Encode a batch in one call and split the rows back to their requests"""
+        started = time.perf_counter()
+        texts = [text for request in batch for text in request.texts]
+        try:
+            vectors = np.asarray(
+                self.model.encode(texts, batch_size=max(len(texts), 1), show_progress_bar=False,
+                                  normalize_embeddings=True),
+                dtype=np.float32
+            )
+            offset = 0
+            for request in batch:
+                request.result = vectors[offset:offset + len(request.texts)]
+                offset += len(request.texts)
+        except Exception as e:
+            for request in batch:
+                request.error = f"Embedding error: {str(e)}"
+        finally:
+            self._free_workers.release()
+        
+        encode_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.batches += 1
+            self.requests += len(batch)
+            self.texts += len(texts)
+            self.batch_sizes[len(texts)] += 1
+            self.encode_ms.append(encode_ms)
+            self.queue_wait_ms.extend((started - request.enqueued_at) * 1000 for request in batch)
+        for request in batch:
+            request.done.set()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Batch size distribution and queue/encode latency for tuning the batching window"""
+        with self._lock:
+            waits = list(self.queue_wait_ms)
+            encodes = list(self.encode_ms)
+            sizes = dict(self.batch_sizes)
+            batches, requests, texts = self.batches, self.requests, self.texts
+        
+        # Power-of-two buckets keep the distribution readable for any batch size limit
+        histogram: Dict[str, int] = {}
+        for size, count in sorted(sizes.items()):
+            low = 1 << (size.bit_length() - 1) if size else 0
+            label = str(low) if low <= 1 else f"{low}-{2 * low - 1}"
+            histogram[label] = histogram.get(label, 0) + count
+        return {
+            "requests": requests,
+            "texts": texts,
+            "batches": batches,
+            "avg_batch_size": texts / batches if batches else 0.0,
+            "batch_size_histogram": histogram,
+            "queue_wait_p50_ms": _percentile(waits, 50),
+            "queue_wait_p95_ms": _percentile(waits, 95),
+            "encode_p50_ms": _percentile(encodes, 50),
+            "encode_p95_ms": _percentile(encodes, 95),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "workers": self.workers,
+            "pending": self._queue.qsize()
+        }
+
+class _EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    """Serves framed requests of one client connection until it disconnects"""
+    
+    def handle(self) -> None:
+        batcher: DynamicBatcher = self.server.batcher
+        while True:
+            try:
+                op, length = _REQUEST.unpack(_recv_exact(self.request, _REQUEST.size))
+                payload = _recv_exact(self.request, length)
+            except ConnectionError:
+                return
+            
+            rows = dim = 0
+            try:
+                if op == _OP_EMBED:
+                    vectors = batcher.submit(json.loads(payload), EmbeddingServerConfig.REQUEST_TIMEOUT_SECONDS)
+                    rows, dim = vectors.shape if vectors.ndim == 2 else (0, 0)
+                    body, status = np.ascontiguousarray(vectors, dtype=np.float32).tobytes(), _STATUS_OK
+                elif op == _OP_STATS:
+                    body, status = json.dumps(batcher.get_stats()).encode("utf-8"), _STATUS_OK
+                elif op == _OP_INFO:
+                    info = {"dimension": batcher.model.get_sentence_embedding_dimension(), "pid": os.getpid()}
+                    body, status = json.dumps(info).encode("utf-8"), _STATUS_OK
+                else:
+                    body, status = f"Unknown operation {op}".encode("utf-8"), _STATUS_ERROR
+            except Exception as e:
+                body, status = str(e).encode("utf-8"), _STATUS_ERROR
+            try:
+                self.request.sendall(_RESPONSE.pack(status, rows, dim, len(body)) + body)
+            except OSError:
+                # The client gave up on this request and closed its connection
+                return
+
+class _EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+def serve(socket_path: Optional[str] = None,
+          model_name: str = EmbeddingServerConfig.MODEL_NAME,
+          parent_pid: Optional[int] = None) -> None:
+    """
+    Load the model and serve embedding requests on a Unix socket until stopped
+    An autostarted server (parent_pid set) binds under its parent's startup lock
+    """
+    socket_path = resolve_socket_path(socket_path)
+    if parent_pid:
+        _serve_forever(_bind(socket_path, model_name), socket_path, parent_pid)
+        return
+    with _StartupLock(socket_path):
+        if _is_listening(socket_path):
+            print(f"Embedding server already listening on {socket_path}")
+            return
+        server = _bind(socket_path, model_name)
+    _serve_forever(server, socket_path, parent_pid)
+
+def _bind(socket_path: str, model_name: str) -> "_EmbeddingServer":
+    """Load the model, then bind the socket, readable and writable by this user only"""
+    if EmbeddingServerConfig.CPU_AFFINITY and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, EmbeddingServerConfig.CPU_AFFINITY)
+    if EmbeddingServerConfig.TORCH_THREADS:
+        import torch
+        torch.set_num_threads(EmbeddingServerConfig.TORCH_THREADS)
+    
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+    
+    # The socket is bound only once the model is loaded, so a successful connect means ready
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    previous_umask = os.umask(0o177)
+    try:
+        server = _EmbeddingServer(socket_path, _EmbeddingRequestHandler)
+    finally:
+        os.umask(previous_umask)
+    server.batcher = DynamicBatcher(model)
+    return server
+
+def _serve_forever(server: "_EmbeddingServer", socket_path: str, parent_pid: Optional[int]) -> None:
+    """Serve until stopped or, for an autostarted server, until the parent process exits"""
+    if parent_pid:
+        def watch_parent():
+            # An autostarted server exits with the app process that spawned it
+            while True:
+                time.sleep(1.0)
+                try:
+                    os.kill(parent_pid, 0)
+                except OSError:
+                    server.shutdown()
+                    return
+        threading.Thread(target=watch_parent, name="parent-watch", daemon=True).start()
+    
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+def _is_listening(socket_path: str) -> bool:
+    """Whether a server accepts connections on socket_path"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+class EmbeddingClient:
+    """
+    Client of the embedding server with the encode interface of SentenceTransformer,
+    so VectorDBService can use it in place of an in-process model
+    """
+    
+    def __init__(self, socket_path: Optional[str] = None,
+                 timeout: float = EmbeddingServerConfig.REQUEST_TIMEOUT_SECONDS):
+        self.socket_path = resolve_socket_path(socket_path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._dimension: Optional[int] = None
+    
+    def _connection(self) -> socket.socket:
+        """Per-thread connection, so concurrent callers reach the server's batcher in parallel"""
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            # A blocking connect waits for a backlog slot instead of failing with EAGAIN under bursts
+            sock.connect(self.socket_path)
+            sock.settimeout(self.timeout)
+            self._local.sock = sock
+        return sock
+    
+    def _close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+    
+    def _call(self, op: int, payload: bytes):
+        """
+        Send one request, reconnecting once if the server restarted
+        Only failures before the request reached the server are retried: a failed connect, or a
+        send on a connection the server already closed. A timeout or an error while waiting for
+        the response is raised at once, since the server may still be working on the request
+        """
+        for attempt in range(2):
+            reused = getattr(self._local, "sock", None) is not None
+            try:
+                sock = self._connection()
+                sock.sendall(_REQUEST.pack(op, len(payload)) + payload)
+            except OSError:
+                self._close()
+                if attempt:
+                    raise
+                if not reused:
+                    time.sleep(0.1)
+                continue
+            try:
+                status, rows, dim, length = _RESPONSE.unpack(_recv_exact(sock, _RESPONSE.size))
+                body = _recv_exact(sock, length)
+                break
+            except OSError:
+                # The connection may still deliver this response later, so it cannot be reused
+                self._close()
+                raise
+        if status != _STATUS_OK:
+            raise RuntimeError(body.decode("utf-8"))
+        return rows, dim, body
+    
+    def encode(self, sentences: Union[str, List[str]], **kwargs) -> np.ndarray:
+        """Embed one text (1-D result) or a list of texts (2-D result) on the server"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        rows, dim, body = self._call(_OP_EMBED, json.dumps(texts).encode("utf-8"))
+        vectors = np.frombuffer(body, dtype=np.float32).reshape(rows, dim)
+        return vectors[0] if single else vectors
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        """Embedding size of the server's model"""
+        if self._dimension is None:
+            self._dimension = json.loads(self._call(_OP_INFO, b"")[2])["dimension"]
+        return self._dimension
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Server-side batching stats"""
+        return json.loads(self._call(_OP_STATS, b"")[2])
+
+_client: Optional[EmbeddingClient] = None
+_client_lock = threading.Lock()
+
+def get_embedding_client(socket_path: Optional[str] = None) -> EmbeddingClient:
+    """
+    Process-wide client of the embedding server, starting the server first when
+    EmbeddingServerConfig.AUTOSTART is set and none is listening
+    """
+    global _client
+    socket_path = resolve_socket_path(socket_path)
+    with _client_lock:
+        if _client is None:
+            if not _is_listening(socket_path):
+                if not EmbeddingServerConfig.AUTOSTART:
+                    raise ConnectionError(f"No embedding server listening on {socket_path}")
+                # Other processes may autostart at the same time; the first one under the lock wins
+                with _StartupLock(socket_path):
+                    if not _is_listening(socket_path):
+                        _start_server(socket_path)
+            _client = EmbeddingClient(socket_path)
+        return _client
+
+def _start_server(socket_path: str) -> None:
+    """Spawn the server process and wait until it accepts connections"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "services.embedding_server", "--socket", socket_path,
+         "--model", EmbeddingServerConfig.MODEL_NAME, "--parent-pid", str(os.getpid())],
+        cwd=root
+    )
+    deadline = time.monotonic() + EmbeddingServerConfig.STARTUP_TIMEOUT_SECONDS
+    while not _is_listening(socket_path):
+        if process.poll() is not None:
+            raise ConnectionError(f"Embedding server exited with code {process.returncode}")
+        if time.monotonic() > deadline:
+            process.terminate()
+            raise ConnectionError("Embedding server did not start in time")
+        time.sleep(0.2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local dynamic-batching embedding server")
+    parser.add_argument("--socket", default=None, help="defaults to a per-user runtime directory")
+    parser.add_argument("--model", default=EmbeddingServerConfig.MODEL_NAME)
+    parser.add_argument("--parent-pid", type=int, default=None)
+    args = parser.parse_args()
+    serve(args.socket, args.model, args.parent_pid)
@@ -0,0 +1,99 @@
+import re
+import threading
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
+from config.settings import FastPathConfig
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+_STOPWORDS = {
+    "a", "an", "and", "are", "can", "did", "do", "does", "for", "from", "have", "how", "i",
+    "in", "is", "it", "me", "my", "of", "on", "or", "please", "should", "the", "there", "to",
+    "what", "when", "where", "which", "who", "why", "with", "you", "your"
+}
+
+class ExtractiveAnswerer:
+    """Service answering simple queries straight from the best retrieved chunk, skipping the LLM"""
+    
+    def __init__(self, vector_db_service,
+                 min_similarity: float = FastPathConfig.MIN_SIMILARITY,
+                 min_overlap: float = FastPathConfig.MIN_OVERLAP,
+                 max_answer_chars: int = FastPathConfig.MAX_ANSWER_CHARS):
+        self.vector_db = vector_db_service
+        self.min_similarity = min_similarity
+        self.min_overlap = min_overlap
+        self.max_answer_chars = max_answer_chars
+        self.history = deque(maxlen=FastPathConfig.HISTORY_SIZE)
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _content_words(text: str) -> set:
+        """Lowercased words of a text without stopwords and very short tokens"""
+        return {
+            token for token in _TOKEN_PATTERN.findall(text.lower())
+            if len(token) > 2 and token not in _STOPWORDS
+        }
+    
+    def query_overlap(self, query: str, chunk: str) -> float:
+        """Fraction of the query's content words that appear in the chunk"""
+        query_words = self._content_words(query)
+        if not query_words:
+            return 0.0
+        return len(query_words & self._content_words(chunk)) / len(query_words)
+    
+    def try_answer(self, query: str, tenant: Optional[str] = None,
+                   query_embedding: Optional[List[float]] = None,
+                   filters: Optional[Dict[str, Any]] = None) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Answer from the top chunk when retrieval confidence and query overlap are high enough
+        Returns: (answer or None to fall through to the LLM, stats)
+        """
+        start = time.perf_counter()
+        stats = {"answered": False, "similarity": 0.0, "overlap": 0.0, "reason": ""}
+        
+        candidates = self.vector_db.query_with_scores(
+            query, 1, query_embedding=query_embedding, tenant=tenant, filters=filters
+        )
+        if not candidates:
+            stats["reason"] = "no documents"
+        else:
+            top = candidates[0]
+            # VectorDBService and the embedding server normalize every embedding, so the collection's
+            # squared L2 distance d is exactly 2 - 2 * cosine
+            stats["similarity"] = 1 - top["distance"] / 2
+            stats["overlap"] = self.query_overlap(query, top["document"])
+            if stats["similarity"] < self.min_similarity:
+                stats["reason"] = f"similarity {stats['similarity']:.2f} < {self.min_similarity}"
+            elif stats["overlap"] < self.min_overlap:
+                stats["reason"] = f"query overlap {stats['overlap']:.2f} < {self.min_overlap}"
+            else:
+                stats["answered"] = True
+                stats["reason"] = "confident match"
+                stats["source"] = top["metadata"].get("source", "")
+        
+        answer = None
+        if stats["answered"]:
+            text = top["document"]
+            if len(text) > self.max_answer_chars:
+                text = text[:self.max_answer_chars].rsplit(' ', 1)[0] + "..."
+            answer = f"{text}\n\n_Source: {stats['source']}_" if stats["source"] else text
+        
+        stats["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.history.append(stats)
+        return answer, stats
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate and latency of fast-path attempts"""
+        with self._lock:
+            entries = list(self.history)
+        answered = [e for e in entries if e["answered"]]
+        latencies = sorted(e["elapsed_ms"] for e in answered)
+        return {
+            "attempts": len(entries),
+            "answered": len(answered),
+            "fallthrough": len(entries) - len(answered),
+            "hit_rate": len(answered) / len(entries) if entries else 0.0,
+            "p50_ms": latencies[len(latencies) // 2] if latencies else 0.0,
+            "avg_similarity": sum(e["similarity"] for e in answered) / len(answered) if answered else 0.0
+        }
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+import uuid
+import numpy as np
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from config.settings import SnapshotConfig, VectorDBConfig
+
+# File layout: magic, uint64 header length, JSON header (ids, texts, metadata, per-source row
+# ranges), zero padding to ALIGNMENT, then one row-major float32 embedding block
+MAGIC = b"AGSNAP01"
+ALIGNMENT = 64
+_PREFIX = struct.Struct("<8sQ")
+
+# One export at a time per process: concurrent exports of a tenant would race on the file
+_export_lock = threading.Lock()
+
+class IndexSnapshot:
+    """Read-only view of a snapshot file with its embeddings memory-mapped"""
+    
+    def __init__(self, path: str, header: Dict[str, Any], embeddings: np.ndarray):
+        self.path = path
+        self.header = header
+        self.embeddings = embeddings
+    
+    @staticmethod
+    def embeddings_offset(header_length: int) -> int:
+        """File offset of the embedding block for a header of the given length"""
+        end = _PREFIX.size + header_length
+        return (end + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+    
+    @classmethod
+    def open(cls, path: str) -> "IndexSnapshot":
+        """Read the header and map the embeddings without loading them"""
+        with open(path, "rb") as f:
+            magic, header_length = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an index snapshot")
+            header = json.loads(f.read(header_length).decode("utf-8"))
+        shape = (header["count"], header["embedding_dim"])
+        if header["count"]:
+            embeddings = np.memmap(path, dtype="<f4", mode="r",
+                                   offset=cls.embeddings_offset(header_length), shape=shape)
+        else:
+            embeddings = np.zeros(shape, dtype=np.float32)
+        return cls(path, header, embeddings)
+    
+    @staticmethod
+    def write(path: str, header: Dict[str, Any], blocks) -> int:
+        """
+        Write a snapshot atomically, streaming embeddings from blocks (float32 arrays in row order)
+        Returns: file size in bytes
+        """
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        offset = IndexSnapshot.embeddings_offset(len(header_bytes))
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_PREFIX.pack(MAGIC, len(header_bytes)))
+                f.write(header_bytes)
+                f.write(b"\0" * (offset - _PREFIX.size - len(header_bytes)))
+                for block in blocks:
+                    f.write(np.ascontiguousarray(block, dtype="<f4").tobytes())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return os.path.getsize(path)
+    
+    def source_rows(self, source: str) -> Optional[np.ndarray]:
+        """Embedding rows of one source, still memory-mapped"""
+        entry = self.header["sources"].get(source)
+        if entry is None:
+            return None
+        return self.embeddings[entry["row"]:entry["row"] + entry["count"]]
+
+class SnapshotService:
+    """Service exporting a tenant's index to a snapshot file and restoring one into a tenant"""
+    
+    def __init__(self, vector_db_service, directory: str = SnapshotConfig.DIRECTORY):
+        self.vector_db = vector_db_service
+        self.directory = directory
+    
+    def snapshot_path(self, tenant: Optional[str] = None) -> str:
+        """Snapshot file of a tenant"""
+        name = self.vector_db.normalize_tenant(tenant) if tenant else self.vector_db.active_tenant
+        return os.path.join(self.directory, f"{name}.snap")
+    
+    def list_snapshots(self) -> List[str]:
+        """Tenants that have a snapshot file"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-len(".snap")] for name in os.listdir(self.directory) if name.endswith(".snap"))
+    
+    def delete(self, tenant: Optional[str] = None) -> bool:
+        """Remove a tenant's snapshot file; returns whether one existed"""
+        with _export_lock:
+            try:
+                os.remove(self.snapshot_path(tenant))
+                return True
+            except FileNotFoundError:
+                return False
+    
+    @staticmethod
+    def _source_digest(ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]) -> str:
+        """Digest of a source's chunks; unchanged digests let an export reuse the stored embeddings"""
+        payload = json.dumps([ids, documents, metadatas], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _read_chunks(self, collection) -> Dict[str, Dict[str, list]]:
+        """Chunk IDs, texts and metadata of a collection grouped by source, without embeddings"""
+        by_source: Dict[str, Dict[str, list]] = {}
+        for offset in range(0, collection.count(), VectorDBConfig.BROWSE_PAGE_SIZE):
+            page = collection.get(include=["documents", "metadatas"],
+                                  limit=VectorDBConfig.BROWSE_PAGE_SIZE, offset=offset)
+            for chunk_id, doc, meta in zip(page["ids"], page["documents"], page["metadatas"]):
+                source = (meta or {}).get("source", "")
+                rows = by_source.setdefault(source, {"ids": [], "documents": [], "metadatas": []})
+                rows["ids"].append(chunk_id)
+                rows["documents"].append(doc)
+                rows["metadatas"].append(meta)
+        
+        # Chunk order within a source keeps digests stable across exports
+        for rows in by_source.values():
+            order = sorted(range(len(rows["ids"])), key=lambda i: (
+                (rows["metadatas"][i] or {}).get("chunk_index", 0), rows["ids"][i]
+            ))
+            for field in rows:
+                rows[field] = [rows[field][i] for i in order]
+        return by_source
+    
+    def _fetch_embeddings(self, collection, ids: List[str]) -> np.ndarray:
+        """Embeddings of the given chunks in the given order"""
+        rows: Dict[str, np.ndarray] = {}
+        for start in range(0, len(ids), SnapshotConfig.BATCH_SIZE):
+            batch = collection.get(ids=ids[start:start + SnapshotConfig.BATCH_SIZE], include=["embeddings"])
+            rows.update(zip(batch["ids"], np.asarray(batch["embeddings"], dtype=np.float32)))
+        return np.stack([rows[chunk_id] for chunk_id in ids])
+    
+    def export(self, tenant: Optional[str] = None, path: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Write a tenant's chunks, metadata and embeddings to one snapshot file
+        Sources whose chunks are unchanged since the previous snapshot at path reuse its embeddings
+        instead of reading them back from the vector store
+        """
+        start = time.perf_counter()
+        path = path or self.snapshot_path(tenant)
+        try:
+            index = self.vector_db._get_tenant(tenant)
+            if not index:
+                return False, "Database not initialized"
+            with _export_lock:
+                corpus_version = index.corpus_version
+                by_source = self._read_chunks(index.collection)
+                if not by_source:
+                    return False, "Nothing to snapshot: the tenant has no documents"
+                
+                previous = None
+                if os.path.exists(path):
+                    try:
+                        previous = IndexSnapshot.open(path)
+                    except (OSError, ValueError) as e:
+                        print(f"Ignoring unreadable snapshot {path}: {str(e)}")
+                
+                header = {
+                    "format": 1, "tenant": index.name, "collection": index.collection.name,
+                    "corpus_version": corpus_version, "created": datetime.now().isoformat(),
+                    "embedding_dim": 0, "count": 0, "sources": {},
+                    "ids": [], "documents": [], "metadatas": []
+                }
+                blocks, reused, fetched = [], 0, 0
+                for source in sorted(by_source):
+                    rows = by_source[source]
+                    digest = self._source_digest(rows["ids"], rows["documents"], rows["metadatas"])
+                    if previous and previous.header["sources"].get(source, {}).get("digest") == digest:
+                        block = previous.source_rows(source)
+                        reused += 1
+                    else:
+                        block = self._fetch_embeddings(index.collection, rows["ids"])
+                        fetched += 1
+                    if header["embedding_dim"] and block.shape[1] != header["embedding_dim"]:
+                        raise ValueError(f"Embedding dimension of '{source}' does not match the other sources")
+                    header["embedding_dim"] = block.shape[1]
+                    header["sources"][source] = {"digest": digest, "row": header["count"], "count": len(rows["ids"])}
+                    header["count"] += len(rows["ids"])
+                    for field in ("ids", "documents", "metadatas"):
+                        header[field].extend(rows[field])
+                    blocks.append(block)
+                
+                size = IndexSnapshot.write(path, header, blocks)
+                del blocks, previous
+            return True, (f"Snapshot of '{index.name}' written: {header['count']} chunks from "
+                          f"{len(header['sources'])} source(s), {reused} reused and {fetched} re-read, "
+                          f"{size / (1024 * 1024):.1f}MB in {(time.perf_counter() - start) * 1000:.0f}ms")
+        except Exception as e:
+            return False, f"Error writing snapshot: {str(e)}"
+    
+    def restore(self, tenant: Optional[str] = None, path: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Replace a tenant's collection with the contents of a snapshot
+        The snapshot is loaded into a staging collection, so queries keep using the current
+        documents until the swap
+        """
+        start = time.perf_counter()
+        path = path or self.snapshot_path(tenant)
+        try:
+            snapshot = IndexSnapshot.open(path)
+        except (OSError, ValueError) as e:
+            return False, f"Error reading snapshot: {str(e)}"
+        
+        header = snapshot.header
+        model = self.vector_db.embedding_model
+        if model and header["count"] and header["embedding_dim"] != model.get_sentence_embedding_dimension():
+            return False, (f"Snapshot embeddings have {header['embedding_dim']} dimensions, "
+                           f"the embedding model produces {model.get_sentence_embedding_dimension()}")
+        quota_error = self.vector_db.check_quota(
+            tenant, header["count"], self.vector_db.stored_bytes(header["documents"], header["metadatas"])
+        )
+        if quota_error:
+            return False, quota_error
+        
+        staging_id = uuid.uuid4().hex[:12]
+        collection = self.vector_db.get_staging_collection(tenant, staging_id)
+        try:
+            batch_size = min(SnapshotConfig.BATCH_SIZE, self.vector_db.client.get_max_batch_size())
+            for begin in range(0, header["count"], batch_size):
+                end = min(begin + batch_size, header["count"])
+                collection.add(
+                    ids=header["ids"][begin:end],
+                    documents=header["documents"][begin:end],
+                    metadatas=header["metadatas"][begin:end],
+                    embeddings=np.asarray(snapshot.embeddings[begin:end])
+                )
+            self.vector_db.promote_staging(tenant, staging_id)
+        except Exception as e:
+            self.vector_db.drop_staging_collection(tenant, staging_id)
+            return False, f"Error restoring snapshot: {str(e)}"
+        
+        return True, (f"Restored {header['count']} chunks from {len(header['sources'])} source(s) "
+                      f"(snapshot of {header['created'][:19]}) in "
+                      f"{(time.perf_counter() - start) * 1000:.0f}ms")
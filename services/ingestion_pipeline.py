@@ -0,0 +1,288 @@
+import threading
+import tracemalloc
+import numpy as np
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterable
+from config.settings import DedupConfig, IngestionConfig
+from services.chunk_deduplicator import DuplicateIndex
+
+class ChunkStream:
+    """Duplicate detection state and running totals of one ingestion run, carried across its files"""
+    
+    def __init__(self, duplicates: Optional[DuplicateIndex]):
+        self.duplicates = duplicates
+        self.duplicate_count = 0
+        # Duplicates per canonical chunk id, and canonicals stored before a later file added to theirs
+        self.duplicates_of: Dict[str, int] = {}
+        self.late_counts = set()
+        self.files = 0
+        self.chunk_count = 0
+        self.stored_bytes = 0
+    
+    def summary(self) -> str:
+        """Near-duplicate summary for status messages"""
+        if self.duplicates is None or not self.chunk_count:
+            return ""
+        action = "dropped" if DedupConfig.MODE == "drop" else "linked"
+        return (f" | Near-duplicates {action}: {self.duplicate_count} chunks, "
+                f"{self.duplicate_count} embedding computations saved")
+
+class IngestionPipeline:
+    """Service turning extracted paragraphs into deduplicated, embedded chunks in a collection"""
+    
+    def __init__(self, vector_db_service, deduplicator=None,
+                 batch_size: int = IngestionConfig.BATCH_SIZE,
+                 memory_budget_mb: float = IngestionConfig.MEMORY_BUDGET_MB):
+        self.vector_db = vector_db_service
+        self.deduplicator = deduplicator
+        self.batch_size = batch_size
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+    
+    def new_stream(self) -> ChunkStream:
+        """Fresh state for one ingestion run"""
+        return ChunkStream(DuplicateIndex(self.deduplicator) if self.deduplicator else None)
+    
+    def build_chunks(self, extracted: List[Tuple[str, List[str]]],
+                     stream: Optional[ChunkStream] = None) -> Dict[str, Any]:
+        """
+        Build chunk records for (source, paragraphs) pairs and resolve near-duplicates
+        stream carries duplicate detection and totals across calls, so files can be chunked one at a time
+        Returns: dict of parallel lists (documents, metadatas, ids, canonical ids) plus a summary
+        """
+        stream = stream or self.new_stream()
+        documents, metadatas, ids = [], [], []
+        for source, paragraphs in extracted:
+            for idx, para in enumerate(paragraphs):
+                chunk_id = self.vector_db.make_chunk_id(source, idx + 1)
+                documents.append(para)
+                ids.append(chunk_id)
+                metadatas.append({
+                    "source": source,
+                    "chunk_index": idx + 1,
+                    "chunk_type": "paragraph",
+                    "char_count": len(para),
+                    "chunk_id": chunk_id,
+                    "canonical_id": chunk_id
+                })
+        
+        canonical_ids: List[Optional[str]] = [None] * len(documents)
+        if stream.duplicates is not None and documents:
+            positions = {chunk_id: idx for idx, chunk_id in enumerate(ids)}
+            keep = []
+            for idx, document in enumerate(documents):
+                canonical = stream.duplicates.add(ids[idx], document)
+                if canonical is None:
+                    keep.append(idx)
+                    continue
+                stream.duplicate_count += 1
+                stream.duplicates_of[canonical] = stream.duplicates_of.get(canonical, 0) + 1
+                canonical_ids[idx] = canonical
+                metadatas[idx]["canonical_id"] = canonical
+                if canonical in positions:
+                    metadatas[positions[canonical]]["duplicate_count"] = stream.duplicates_of[canonical]
+                else:
+                    stream.late_counts.add(canonical)
+            
+            if DedupConfig.MODE == "drop":
+                documents = [documents[idx] for idx in keep]
+                metadatas = [metadatas[idx] for idx in keep]
+                ids = [ids[idx] for idx in keep]
+                canonical_ids = [None] * len(keep)
+        
+        stream.chunk_count += len(documents)
+        stream.stored_bytes += self.vector_db.stored_bytes(documents, metadatas)
+        return {
+            "documents": documents,
+            "metadatas": metadatas,
+            "ids": ids,
+            "canonical_ids": canonical_ids,
+            "summary": stream.summary()
+        }
+    
+    def ingest(self, files: Iterable[Tuple[str, List[str]]], collection, tenant: Optional[str] = None,
+               start: int = 0, on_chunked: Optional[Callable[[int], None]] = None,
+               on_batch: Optional[Callable[[int], None]] = None,
+               memory: Optional["StageMemoryTracker"] = None) -> ChunkStream:
+        """
+        Chunk, quota-check and store (source, paragraphs) pairs one file at a time, so only one
+        file's paragraphs and chunks are held at once; files may extract each pair lazily
+        Chunk positions count across files and the first start of them are already committed;
+        on_chunked gets the chunks built so far, on_batch the chunks committed so far
+        Raises ValueError once the tenant's quota would be exceeded
+        Returns: the run's ChunkStream with its totals
+        """
+        memory = memory or StageMemoryTracker(enabled=False)
+        stream = self.new_stream()
+        for source, paragraphs in files:
+            with memory.stage("chunk"):
+                chunks = self.build_chunks([(source, paragraphs)], stream)
+            stream.files += 1
+            quota_error = self.vector_db.check_quota(tenant, stream.chunk_count, stream.stored_bytes)
+            if quota_error:
+                raise ValueError(quota_error)
+            if on_chunked:
+                on_chunked(stream.chunk_count)
+            
+            offset = stream.chunk_count - len(chunks["documents"])
+            if stream.chunk_count > start:
+                self.store_chunks(
+                    chunks, collection, start=max(start - offset, 0), memory=memory,
+                    on_batch=(lambda committed, offset=offset: on_batch(offset + committed)) if on_batch else None
+                )
+        
+        if stream.late_counts:
+            # Chroma merges updated metadata keys into the stored metadata
+            late = sorted(stream.late_counts)
+            collection.update(ids=late, metadatas=[{"duplicate_count": stream.duplicates_of[c]} for c in late])
+        return stream
+    
+    def store_chunks(self, chunks: Dict[str, Any], collection, start: int = 0,
+                     on_batch: Optional[Callable[[int], None]] = None,
+                     memory: Optional["StageMemoryTracker"] = None) -> int:
+        """
+        Embed chunks batch_size at a time from position start, upserting whenever the
+        pending chunks would exceed the memory budget
+        on_batch is called with the number of chunks committed after each flush
+        Returns: number of chunks committed
+        """
+        memory = memory or StageMemoryTracker(enabled=False)
+        documents, ids = chunks["documents"], chunks["ids"]
+        committed = start
+        pending: List[np.ndarray] = []
+        pending_rows: Dict[str, np.ndarray] = {}
+        pending_bytes = 0
+        
+        def flush(end: int) -> None:
+            nonlocal committed, pending, pending_rows, pending_bytes
+            with memory.stage("insert"):
+                collection.upsert(
+                    ids=ids[committed:end],
+                    documents=documents[committed:end],
+                    metadatas=chunks["metadatas"][committed:end],
+                    embeddings=np.vstack(pending)
+                )
+            committed = end
+            pending, pending_rows, pending_bytes = [], {}, 0
+            if on_batch:
+                on_batch(committed)
+        
+        for batch_start in range(start, len(documents), self.batch_size):
+            batch_end = min(batch_start + self.batch_size, len(documents))
+            batch_ids = ids[batch_start:batch_end]
+            batch_canonical = chunks["canonical_ids"][batch_start:batch_end]
+            
+            with memory.stage("embed"):
+                # Only canonical chunks are embedded; duplicates reuse their canonical's vector
+                to_embed = [i for i, canonical in enumerate(batch_canonical) if canonical is None]
+                embedded = self.vector_db.embed_array([documents[batch_start + i] for i in to_embed])
+                vectors = np.empty((len(batch_ids), embedded.shape[1]), dtype=np.float32)
+                vectors[to_embed] = embedded
+                del embedded
+                
+                # A canonical chunk is in this batch, still pending, or already in the store
+                batch_rows = {batch_ids[i]: vectors[i] for i in to_embed}
+                stored_rows = {}
+                earlier = sorted({c for c in batch_canonical
+                                  if c is not None and c not in batch_rows and c not in pending_rows})
+                if earlier:
+                    stored = collection.get(ids=earlier, include=["embeddings"])
+                    stored_rows = dict(zip(stored["ids"], np.asarray(stored["embeddings"], dtype=np.float32)))
+                for i, canonical in enumerate(batch_canonical):
+                    if canonical is not None:
+                        vectors[i] = next(rows[canonical] for rows in (batch_rows, pending_rows, stored_rows)
+                                          if canonical in rows)
+            
+            batch_bytes = vectors.nbytes + sum(
+                len(documents[idx]) + len(str(chunks["metadatas"][idx]))
+                for idx in range(batch_start, batch_end)
+            )
+            if pending and pending_bytes + batch_bytes > self.memory_budget_bytes:
+                flush(batch_start)
+            pending.append(vectors)
+            pending_rows.update(zip(batch_ids, vectors))
+            pending_bytes += batch_bytes
+        
+        if pending:
+            flush(len(documents))
+        return committed
+
+# tracemalloc is process-wide: trackers share one tracing session, started by the first and
+# stopped by the last, and only measure while no other tracker is active
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_generation = 0
+_tracing_owned = False
+
+class StageMemoryTracker:
+    """Peak Python heap allocation per ingestion stage, measured with tracemalloc"""
+    
+    def __init__(self, enabled: bool = IngestionConfig.TRACK_MEMORY):
+        self.enabled = enabled
+        self.peaks: Dict[str, int] = {}
+        self.contended = False
+        self._active = False
+    
+    def __enter__(self) -> "StageMemoryTracker":
+        global _tracing_users, _tracing_generation, _tracing_owned
+        if self.enabled:
+            with _tracing_lock:
+                if _tracing_users == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _tracing_owned = True
+                _tracing_users += 1
+                _tracing_generation += 1
+                self._active = True
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        global _tracing_users, _tracing_owned
+        if self._active:
+            with _tracing_lock:
+                _tracing_users -= 1
+                if _tracing_users == 0 and _tracing_owned:
+                    tracemalloc.stop()
+                    _tracing_owned = False
+            self._active = False
+    
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Record the peak allocation above the starting level while the block runs
+        Skipped when another tracker is active, since both would share and reset one peak
+        """
+        with _tracing_lock:
+            measure = self._active and _tracing_users == 1 and tracemalloc.is_tracing()
+            if measure:
+                generation = _tracing_generation
+                baseline, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+            elif self._active:
+                self.contended = True
+        try:
+            yield
+        finally:
+            if measure:
+                with _tracing_lock:
+                    if generation == _tracing_generation and _tracing_users == 1:
+                        _, peak = tracemalloc.get_traced_memory()
+                        self.peaks[name] = max(self.peaks.get(name, 0), peak - baseline)
+                    else:
+                        self.contended = True
+    
+    def report(self) -> Dict[str, float]:
+        """Peak MB per stage in pipeline order; empty when another tracker interfered"""
+        if self.contended:
+            return {}
+        order = ["extract", "chunk", "embed", "insert"]
+        return {
+            stage: self.peaks[stage] / (1024 * 1024)
+            for stage in sorted(self.peaks, key=lambda s: order.index(s) if s in order else len(order))
+        }
+    
+    def summary(self) -> str:
+        """One-line peak memory summary for status messages"""
+        if self.contended:
+            return " | Peak memory: not measured (another ingestion was tracked at the same time)"
+        if not self.peaks:
+            return ""
+        return " | Peak memory: " + ", ".join(f"{stage} {mb:.1f}MB" for stage, mb in self.report().items())
@@ -0,0 +1,284 @@
+import io
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from typing import List, Dict, Any, Optional, Tuple
+from config.settings import IngestionConfig, SnapshotConfig
+from services.profiler import StackSampler
+from services.ingestion_pipeline import StageMemoryTracker
+
+class IngestionServices:
+    """Services one ingestion job runs with, taken from the session that submitted it"""
+    
+    def __init__(self, vector_db_service, document_processor, pipeline, snapshots=None):
+        self.vector_db = vector_db_service
+        self.document_processor = document_processor
+        self.pipeline = pipeline
+        self.snapshots = snapshots
+
+class IngestionQueue:
+    """
+    Service running document ingestion jobs on a background worker with persisted progress
+    Interrupted jobs resume after a restart; embedding resumes from the last committed batch only
+    when VectorDBConfig.PERSIST_DIRECTORY keeps the staging collection, and starts over otherwise
+    """
+    
+    def __init__(self, job_dir: str = IngestionConfig.JOB_DIR,
+                 keep_finished: int = IngestionConfig.KEEP_FINISHED_JOBS):
+        self.job_dir = job_dir
+        self.keep_finished = keep_finished
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        # Services are bound per job: the queue is shared by every session in the process
+        self._services: Dict[str, IngestionServices] = {}
+        self._attached = False
+        self._pending: "queue.Queue[str]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._load_jobs()
+    
+    def _job_path(self, job_id: str, *parts: str) -> str:
+        """Path inside a job's directory"""
+        return os.path.join(self.job_dir, job_id, *parts)
+    
+    def _load_jobs(self) -> None:
+        """Read job state persisted by earlier processes"""
+        if not os.path.isdir(self.job_dir):
+            return
+        for job_id in os.listdir(self.job_dir):
+            try:
+                with open(self._job_path(job_id, "job.json"), encoding="utf-8") as f:
+                    self.jobs[job_id] = json.load(f)
+            except (OSError, ValueError):
+                continue
+    
+    def _save(self, job: Dict[str, Any]) -> None:
+        """Persist job state atomically so a crash never leaves a half-written file"""
+        path = self._job_path(job["job_id"], "job.json")
+        with self._lock:
+            job["updated_at"] = time.time()
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(job, f)
+            os.replace(path + ".tmp", path)
+    
+    def _update(self, job: Dict[str, Any], changes: Dict[str, Any],
+                file_state: Optional[Dict[str, Any]] = None, save: bool = True) -> None:
+        """Change a job or one of its files under the lock get_job and list_jobs copy under; save persists it"""
+        with self._lock:
+            (file_state if file_state is not None else job).update(changes)
+        if save:
+            self._save(job)
+    
+    def attach(self, services: IngestionServices) -> None:
+        """
+        Start the worker; the first attach resumes jobs interrupted by a restart with its services,
+        since the sessions that submitted them are gone
+        """
+        with self._lock:
+            if not self._attached:
+                self._attached = True
+                interrupted = sorted(
+                    (job for job in self.jobs.values() if job["status"] in ("queued", "running")),
+                    key=lambda job: job["created_at"]
+                )
+                for job in interrupted:
+                    self._services[job["job_id"]] = services
+                    self._pending.put(job["job_id"])
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._work, name="ingestion-worker", daemon=True)
+                self._worker.start()
+    
+    def submit(self, uploaded_files, tenant: str, services: IngestionServices,
+               profile: bool = False) -> Tuple[bool, str]:
+        """
+        Save uploaded PDFs and queue a job that replaces the tenant's documents with them,
+        run with the submitting session's services
+        Returns: (success, job_id or error message)
+        """
+        job_id = uuid.uuid4().hex[:12]
+        duplicate_names = 0
+        try:
+            os.makedirs(self._job_path(job_id, "files"))
+            files = []
+            for uploaded_file in uploaded_files:
+                if any(f["name"] == uploaded_file.name for f in files):
+                    duplicate_names += 1
+                    continue
+                path = self._job_path(job_id, "files", f"{len(files)}.pdf")
+                with open(path, "wb") as f:
+                    f.write(uploaded_file.getvalue())
+                files.append({
+                    "name": uploaded_file.name,
+                    "path": path,
+                    "pages_total": 0,
+                    "pages_done": 0,
+                    "extracted": False,
+                    "error": None
+                })
+        except OSError as e:
+            shutil.rmtree(self._job_path(job_id), ignore_errors=True)
+            return False, f"Error saving uploaded files: {str(e)}"
+        
+        job = {
+            "job_id": job_id,
+            "tenant": tenant,
+            "status": "queued",
+            "message": "Waiting for the ingestion worker",
+            "files": files,
+            "duplicate_names": duplicate_names,
+            "chunks_total": 0,
+            "chunks_committed": 0,
+            "profile_requested": profile,
+            "profile": None,
+            "created_at": time.time()
+        }
+        with self._lock:
+            self.jobs[job_id] = job
+        self._services[job_id] = services
+        self._save(job)
+        self._pending.put(job_id)
+        return True, job_id
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of a job's state"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job else None
+    
+    def list_jobs(self, tenant: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Snapshots of all jobs, newest first, optionally for one tenant"""
+        with self._lock:
+            jobs = [json.loads(json.dumps(job)) for job in self.jobs.values()
+                    if tenant is None or job["tenant"] == tenant]
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+    
+    @staticmethod
+    def progress(job: Dict[str, Any]) -> float:
+        """Overall completion between 0 and 1, weighting extraction and embedding equally"""
+        if job["status"] == "completed":
+            return 1.0
+        pages_total = sum(f["pages_total"] for f in job["files"])
+        extracted = sum(1 for f in job["files"] if f["extracted"]) / max(len(job["files"]), 1)
+        extract_progress = sum(f["pages_done"] for f in job["files"]) / pages_total if pages_total else extracted
+        # Files are embedded as they are extracted, so chunks_total only covers the files so far
+        embed_progress = extracted * job["chunks_committed"] / job["chunks_total"] if job["chunks_total"] else 0.0
+        return 0.5 * max(extract_progress, extracted) + 0.5 * embed_progress
+    
+    def _work(self) -> None:
+        """Run queued jobs one at a time; an error in one job never stops the worker"""
+        while True:
+            job_id = self._pending.get()
+            job = self.jobs.get(job_id)
+            services = self._services.pop(job_id, None)
+            if job is None or services is None or job["status"] not in ("queued", "running"):
+                continue
+            try:
+                if job.get("profile_requested"):
+                    with StackSampler() as sampler:
+                        self._run(job, services)
+                    self._update(job, {"profile": sampler.result})
+                else:
+                    self._run(job, services)
+                self._cleanup(job_id)
+                self._prune()
+            except Exception as e:
+                print(f"Error finishing ingestion job {job_id}: {str(e)}")
+                if job["status"] in ("queued", "running"):
+                    self._update(job, {"status": "failed", "message": f"Error processing documents: {str(e)}"},
+                                 save=False)
+    
+    def _cleanup(self, job_id: str) -> None:
+        """Delete a finished job's staged uploads and extracted text, keeping only its job.json"""
+        for name in os.listdir(self._job_path(job_id)):
+            if name != "job.json":
+                path = self._job_path(job_id, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+    
+    def _prune(self) -> None:
+        """Forget finished jobs beyond the newest keep_finished, deleting their directories"""
+        with self._lock:
+            finished = sorted(
+                (job for job in self.jobs.values() if job["status"] in ("completed", "failed")),
+                key=lambda job: job["created_at"], reverse=True
+            )
+            for job in finished[self.keep_finished:]:
+                del self.jobs[job["job_id"]]
+                shutil.rmtree(self._job_path(job["job_id"]), ignore_errors=True)
+    
+    def _run(self, job: Dict[str, Any], services: IngestionServices) -> None:
+        """Extract, chunk and embed one file at a time into a staging collection, then swap it in"""
+        tenant, job_id = job["tenant"], job["job_id"]
+        self._update(job, {"status": "running", "message": "Extracting text"})
+        
+        with StageMemoryTracker() as memory:
+            try:
+                collection = services.vector_db.get_staging_collection(tenant, job_id)
+                # Upserts use deterministic chunk ids, so replaying a partly committed batch is safe;
+                # a staging collection lost with the process means starting the embedding over
+                start = job["chunks_committed"] if collection.count() >= job["chunks_committed"] else 0
+                self._update(job, {"chunks_committed": start})
+                
+                def extracted_files():
+                    """Yield each file's paragraphs, extracting it unless an earlier run already did"""
+                    for idx, file_state in enumerate(job["files"]):
+                        paragraphs_path = self._job_path(job_id, f"{idx}.json")
+                        if file_state["extracted"]:
+                            with open(paragraphs_path, encoding="utf-8") as f:
+                                paragraphs = json.load(f)
+                        else:
+                            def on_page(done, total, file_state=file_state):
+                                self._update(job, {"pages_done": done, "pages_total": total}, file_state, save=False)
+                            
+                            self._update(job, {"message": f"Extracting text from {file_state['name']}"}, save=False)
+                            with memory.stage("extract"), open(file_state["path"], "rb") as f:
+                                success, message, paragraphs = services.document_processor.extract_text_from_pdf(
+                                    io.BytesIO(f.read()), progress_callback=on_page
+                                )
+                            if not success:
+                                paragraphs = []
+                            with open(paragraphs_path, "w", encoding="utf-8") as f:
+                                json.dump(paragraphs, f)
+                            self._update(job, {"extracted": True, "error": None if success else message}, file_state)
+                        if paragraphs:
+                            yield file_state["name"], paragraphs
+                
+                def on_chunked(chunks_total):
+                    self._update(job, {"chunks_total": chunks_total, "message": "Embedding chunks"}, save=False)
+                
+                def on_batch(committed):
+                    self._update(job, {"chunks_committed": committed})
+                
+                stream = services.pipeline.ingest(
+                    extracted_files(), collection, tenant, start=start,
+                    on_chunked=on_chunked, on_batch=on_batch, memory=memory
+                )
+                if not stream.files:
+                    raise ValueError("No valid text content found in PDF files.")
+                services.vector_db.promote_staging(tenant, job_id)
+                snapshot_summary = ""
+                if services.snapshots and SnapshotConfig.AUTO_EXPORT:
+                    self._update(job, {"message": "Writing snapshot"}, save=False)
+                    snapshot_summary = f" | {services.snapshots.export(tenant)[1]}"
+                
+                failed = sum(1 for f in job["files"] if f["error"])
+                skipped = job.get("duplicate_names", 0) + failed
+                skipped_summary = f", skipped {skipped} (duplicate name or no text)" if skipped else ""
+                self._update(job, {
+                    "status": "completed",
+                    "message": (f"✓ Successfully processed {stream.files} PDF file(s){skipped_summary} → "
+                                f"{stream.chunk_count} chunks stored{stream.summary()}"
+                                f"{snapshot_summary}{memory.summary()}")
+                }, save=False)
+            except Exception as e:
+                print(f"Ingestion job {job_id} failed: {str(e)}")
+                self._update(job, {"status": "failed", "message": f"Error processing documents: {str(e)}"},
+                             save=False)
+                services.vector_db.drop_staging_collection(tenant, job_id)
+            self._update(job, {"memory_mb": memory.report()}, save=False)
+        self._save(job)
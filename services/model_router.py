@@ -0,0 +1,133 @@
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict, replace
+from typing import Dict, Any, Optional
+from config.settings import ModelConfig, RoutingConfig
+
+@dataclass
+class RoutingDecision:
+    """Model, token limit and temperature chosen for one Bedrock call"""
+    model_id: str
+    tier: str
+    max_tokens: int
+    temperature: float
+    reason: str
+    escalated: bool = False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a plain dict for flow output"""
+        return asdict(self)
+
+class ModelRouter:
+    """Service for choosing the Bedrock model per request"""
+    
+    def __init__(self):
+        self.history = deque(maxlen=RoutingConfig.HISTORY_SIZE)
+        self._lock = threading.Lock()
+    
+    def route(self, persona: str, context_tokens: int,
+              latency_weight: float, cost_weight: float) -> RoutingDecision:
+        """Pick model, max_tokens and temperature from persona, context size and sidebar weights"""
+        if not RoutingConfig.ENABLED:
+            return RoutingDecision(ModelConfig.BEDROCK_MODEL_ID, "large", ModelConfig.MAX_TOKENS,
+                                   ModelConfig.TEMPERATURE, "routing disabled")
+        
+        max_tokens, temperature = RoutingConfig.PERSONA_SETTINGS.get(
+            persona, (ModelConfig.MAX_TOKENS, ModelConfig.TEMPERATURE)
+        )
+        # Higher cost weight trims the completion budget
+        max_tokens = max(RoutingConfig.MIN_MAX_TOKENS, int(max_tokens * (1 - 0.5 * cost_weight)))
+        pressure = (latency_weight + cost_weight) / 2
+        
+        if context_tokens > RoutingConfig.MAX_FAST_CONTEXT_TOKENS:
+            return RoutingDecision(ModelConfig.BEDROCK_MODEL_ID, "large", max_tokens, temperature,
+                                   f"context {context_tokens} tokens too large for fast model")
+        
+        if persona in RoutingConfig.FAST_PERSONAS and pressure >= RoutingConfig.FAST_PRESSURE_THRESHOLD:
+            return RoutingDecision(ModelConfig.FAST_MODEL_ID, "fast", max_tokens, temperature,
+                                   f"'{persona}' with latency/cost pressure {pressure:.2f}")
+        
+        if pressure >= RoutingConfig.FORCE_FAST_PRESSURE:
+            return RoutingDecision(ModelConfig.FAST_MODEL_ID, "fast", max_tokens, temperature,
+                                   f"latency/cost pressure {pressure:.2f} overrides persona")
+        
+        return RoutingDecision(ModelConfig.BEDROCK_MODEL_ID, "large", max_tokens, temperature,
+                               f"'{persona}' needs the larger model")
+    
+    @staticmethod
+    def escalation_reason(decision: RoutingDecision, response_text: str,
+                          usage: Optional[Dict[str, Any]]) -> Optional[str]:
+        """
+        Why a fast-model answer should be regenerated with the larger model, or None to keep it
+        Only observable failures count: an empty answer or an answer cut off at max_tokens
+        """
+        if not RoutingConfig.ESCALATION_ENABLED or decision.tier != "fast":
+            return None
+        if not response_text.strip():
+            return "empty answer"
+        if usage and usage.get("output_tokens", 0) >= decision.max_tokens:
+            return f"answer truncated at {decision.max_tokens} tokens"
+        return None
+    
+    def escalate(self, decision: RoutingDecision, reason: str) -> RoutingDecision:
+        """Re-route a failed cheap answer to the larger model"""
+        return replace(
+            decision,
+            model_id=ModelConfig.BEDROCK_MODEL_ID,
+            tier="large",
+            reason=f"escalated after {reason}",
+            escalated=True
+        )
+    
+    @staticmethod
+    def estimate_cost(model_id: str, usage: Optional[Dict[str, Any]]) -> float:
+        """Cost in USD of a call's token usage"""
+        if not usage:
+            return 0.0
+        input_price, output_price = ModelConfig.MODEL_PRICING.get(
+            model_id, ModelConfig.MODEL_PRICING[ModelConfig.BEDROCK_MODEL_ID]
+        )
+        return (usage.get("input_tokens", 0) * input_price +
+                usage.get("output_tokens", 0) * output_price) / 1000
+    
+    def record(self, decision: RoutingDecision, latency_ms: float,
+               usage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Record a routed call with its latency and cost against the large-model baseline"""
+        entry = {
+            **decision.to_dict(),
+            "latency_ms": latency_ms,
+            "input_tokens": (usage or {}).get("input_tokens", 0),
+            "output_tokens": (usage or {}).get("output_tokens", 0),
+            "cost": self.estimate_cost(decision.model_id, usage),
+            "baseline_cost": self.estimate_cost(ModelConfig.BEDROCK_MODEL_ID, usage)
+        }
+        with self._lock:
+            self.history.append(entry)
+        return entry
+    
+    def mark_superseded(self, entry: Dict[str, Any]) -> None:
+        """Exclude an escalated call from the baseline, which the escalation call already covers"""
+        with self._lock:
+            entry["baseline_cost"] = 0.0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Aggregate routing decisions with their latency and cost impact"""
+        with self._lock:
+            entries = list(self.history)
+        stats = {
+            "calls": len(entries),
+            "escalations": sum(1 for e in entries if e["escalated"]),
+            "total_cost": sum(e["cost"] for e in entries),
+            "baseline_cost": sum(e["baseline_cost"] for e in entries),
+            "by_tier": {}
+        }
+        for tier in ("fast", "large"):
+            tier_entries = [e for e in entries if e["tier"] == tier]
+            if tier_entries:
+                stats["by_tier"][tier] = {
+                    "calls": len(tier_entries),
+                    "avg_latency_ms": sum(e["latency_ms"] for e in tier_entries) / len(tier_entries),
+                    "cost": sum(e["cost"] for e in tier_entries)
+                }
+        stats["savings"] = stats["baseline_cost"] - stats["total_cost"]
+        return stats
@@ -0,0 +1,253 @@
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from importlib import metadata
+from typing import Any, Callable, Dict, List, Optional
+from config.settings import ExtractionConfig
+
+ProgressCallback = Optional[Callable[[int, int], None]]
+
+class PDFExtractor(ABC):
+    """Text extraction backend; subclasses wrap one optional PDF library"""
+    name = ""
+    module = ""
+    distribution = ""
+    
+    def is_available(self) -> bool:
+        """Whether the backing library is installed"""
+        return importlib.util.find_spec(self.module) is not None
+    
+    def version(self) -> str:
+        """Installed library version, part of the extraction cache key"""
+        try:
+            return metadata.version(self.distribution)
+        except metadata.PackageNotFoundError:
+            return "unknown"
+    
+    @abstractmethod
+    def extract_pages(self, pdf_bytes: bytes, max_pages: Optional[int] = None,
+                      progress_callback: ProgressCallback = None) -> List[str]:
+        """Text of each page, calling progress_callback with (pages_done, pages_total)"""
+        pass
+
+class PyPDF2Extractor(PDFExtractor):
+    """PyPDF2, the original pure-Python backend"""
+    name = "PyPDF2"
+    module = "PyPDF2"
+    distribution = "PyPDF2"
+    
+    def extract_pages(self, pdf_bytes, max_pages=None, progress_callback=None):
+        import PyPDF2
+        return _extract_with_reader(PyPDF2.PdfReader(io.BytesIO(pdf_bytes)), max_pages, progress_callback)
+
+class PypdfExtractor(PDFExtractor):
+    """pypdf, the maintained successor of PyPDF2"""
+    name = "pypdf"
+    module = "pypdf"
+    distribution = "pypdf"
+    
+    def extract_pages(self, pdf_bytes, max_pages=None, progress_callback=None):
+        import pypdf
+        return _extract_with_reader(pypdf.PdfReader(io.BytesIO(pdf_bytes)), max_pages, progress_callback)
+
+class PdfminerExtractor(PDFExtractor):
+    """pdfminer.six layout analysis, slower but good with multi-column text"""
+    name = "pdfminer"
+    module = "pdfminer"
+    distribution = "pdfminer.six"
+    
+    def extract_pages(self, pdf_bytes, max_pages=None, progress_callback=None):
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+        from pdfminer.pdfpage import PDFPage
+        total = sum(1 for _ in PDFPage.get_pages(io.BytesIO(pdf_bytes)))
+        if max_pages is not None:
+            total = min(total, max_pages)
+        
+        page_texts = []
+        for layout in extract_pages(io.BytesIO(pdf_bytes), maxpages=max_pages or 0):
+            page_texts.append("".join(
+                element.get_text() for element in layout if isinstance(element, LTTextContainer)
+            ))
+            if progress_callback:
+                progress_callback(len(page_texts), total)
+        return page_texts
+
+class PdfiumExtractor(PDFExtractor):
+    """pypdfium2 bindings to the PDFium C++ library, usually the fastest"""
+    name = "pypdfium2"
+    module = "pypdfium2"
+    distribution = "pypdfium2"
+    
+    def extract_pages(self, pdf_bytes, max_pages=None, progress_callback=None):
+        import pypdfium2
+        document = pypdfium2.PdfDocument(pdf_bytes)
+        try:
+            total = len(document) if max_pages is None else min(len(document), max_pages)
+            page_texts = []
+            for page_num in range(total):
+                page = document[page_num]
+                text_page = page.get_textpage()
+                page_texts.append(text_page.get_text_range())
+                text_page.close()
+                page.close()
+                if progress_callback:
+                    progress_callback(page_num + 1, total)
+            return page_texts
+        finally:
+            document.close()
+
+def _extract_with_reader(reader, max_pages: Optional[int], progress_callback: ProgressCallback) -> List[str]:
+    """Page texts from a PyPDF2/pypdf PdfReader"""
+    total = len(reader.pages) if max_pages is None else min(len(reader.pages), max_pages)
+    page_texts = []
+    for page_num in range(total):
+        page_texts.append(reader.pages[page_num].extract_text() or "")
+        if progress_callback:
+            progress_callback(page_num + 1, total)
+    return page_texts
+
+EXTRACTORS: Dict[str, PDFExtractor] = {
+    extractor.name: extractor
+    for extractor in (PdfiumExtractor(), PypdfExtractor(), PdfminerExtractor(), PyPDF2Extractor())
+}
+
+def available_extractors() -> List[PDFExtractor]:
+    """Installed extractors in ExtractionConfig.EXTRACTOR_PREFERENCE order"""
+    return [
+        EXTRACTORS[name] for name in ExtractionConfig.EXTRACTOR_PREFERENCE
+        if name in EXTRACTORS and EXTRACTORS[name].is_available()
+    ]
+
+def benchmark_extractors(pdf_bytes: bytes, max_pages: int = ExtractionConfig.BENCHMARK_PAGES
+                         ) -> List[Dict[str, Any]]:
+    """
+    Time every installed extractor on the first pages of a sample PDF
+    Returns rows of name, version, ms_per_page, chars and error, fastest working extractor first
+    """
+    results = []
+    for extractor in available_extractors():
+        row = {"name": extractor.name, "version": extractor.version(), "ms_per_page": None, "chars": 0, "error": ""}
+        try:
+            # A one-page warm-up keeps library import time out of the comparison
+            extractor.extract_pages(pdf_bytes, max_pages=1)
+            start = time.perf_counter()
+            page_texts = extractor.extract_pages(pdf_bytes, max_pages=max_pages)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            row["ms_per_page"] = elapsed_ms / max(len(page_texts), 1)
+            row["chars"] = sum(len(text.strip()) for text in page_texts)
+        except Exception as e:
+            row["error"] = str(e)
+        results.append(row)
+    
+    # Extractors that found no text on a page with text are not candidates, however fast
+    most_chars = max((row["chars"] for row in results), default=0)
+    results.sort(key=lambda row: (
+        row["error"] != "" or (most_chars > 0 and row["chars"] == 0),
+        row["ms_per_page"] if row["ms_per_page"] is not None else float("inf")
+    ))
+    return results
+
+class ExtractionCache:
+    """
+    Disk cache of extracted paragraphs keyed by file SHA-256 and extractor version
+    Bounded to max_mb: least recently used entries are deleted when a write goes over it
+    """
+    
+    def __init__(self, cache_dir: str = ExtractionConfig.CACHE_DIR,
+                 max_mb: float = ExtractionConfig.CACHE_MAX_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size: Optional[int] = None  # bytes on disk, scanned on first write
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def file_hash(pdf_bytes: bytes) -> str:
+        """SHA-256 of the file contents"""
+        return hashlib.sha256(pdf_bytes).hexdigest()
+    
+    def _path(self, file_hash: str, extractor: PDFExtractor, fmt: int) -> str:
+        key = hashlib.sha256(f"{extractor.name}:{extractor.version()}:{fmt}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, file_hash[:2], f"{file_hash}-{key}.json")
+    
+    def get(self, file_hash: str, extractor: PDFExtractor, fmt: int) -> Optional[Dict[str, Any]]:
+        """Cached entry (paragraphs, pages) or None"""
+        path = self._path(file_hash, extractor, fmt)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            # The modification time records the last use for LRU eviction
+            os.utime(path)
+        except (OSError, ValueError):
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+    
+    def put(self, file_hash: str, extractor: PDFExtractor, fmt: int, entry: Dict[str, Any]) -> None:
+        """Store an entry atomically so concurrent readers never see a partial file"""
+        path = self._path(file_hash, extractor, fmt)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing extraction cache: {e}")
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = sum(entry_size for _, entry_size, _ in self._entries())
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+    
+    def _entries(self) -> List[tuple]:
+        """(path, size, mtime) of every cached entry"""
+        entries = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+    
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache is back to 90% of its limit"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self._size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._size <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            self.evictions += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit and miss counts since start"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": self.hits / lookups if lookups else 0.0}
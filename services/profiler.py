@@ -0,0 +1,134 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+from config.settings import ProfilingConfig
+
+_active_sampler: ContextVar[Optional["StackSampler"]] = ContextVar("active_sampler", default=None)
+
+class StackSampler:
+    """Sampling profiler for one request, following the threads that work on it"""
+    
+    def __init__(self, interval_ms: float = ProfilingConfig.SAMPLE_INTERVAL_MS,
+                 max_depth: int = ProfilingConfig.MAX_STACK_DEPTH):
+        self.interval = interval_ms / 1000
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self._thread_ids = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._token = None
+        self._started = 0.0
+    
+    def add_thread(self, thread_id: int) -> None:
+        """Include a thread in the samples"""
+        with self._lock:
+            self._thread_ids.add(thread_id)
+    
+    def remove_thread(self, thread_id: int) -> None:
+        """Stop sampling a thread once its work for the request is done"""
+        with self._lock:
+            self._thread_ids.discard(thread_id)
+    
+    def __enter__(self) -> "StackSampler":
+        self._started = time.perf_counter()
+        self.add_thread(threading.get_ident())
+        self._token = _active_sampler.set(self)
+        self._sampler = threading.Thread(target=self._sample_loop, name="stack-sampler", daemon=True)
+        self._sampler.start()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._sampler.join()
+        _active_sampler.reset(self._token)
+        self.result = self._summarize((time.perf_counter() - self._started) * 1000)
+    
+    def _sample_loop(self) -> None:
+        """Record the stacks of tracked threads every interval"""
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                thread_ids = list(self._thread_ids)
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+    
+    def _summarize(self, duration_ms: float) -> Dict[str, Any]:
+        """Top functions by self and total time plus folded stacks for a flame view"""
+        ms_per_sample = self.interval * 1000
+        self_samples: Counter = Counter()
+        total_samples: Counter = Counter()
+        for stack, count in self.stacks.items():
+            self_samples[stack[-1]] += count
+            # Recursive functions count once per sample towards their total
+            for function in set(stack):
+                total_samples[function] += count
+        
+        top = [
+            {
+                "function": function,
+                "self_ms": self_samples[function] * ms_per_sample,
+                "total_ms": count * ms_per_sample,
+                "total_pct": count / self.samples if self.samples else 0.0
+            }
+            for function, count in total_samples.most_common()
+        ]
+        top.sort(key=lambda row: row["self_ms"], reverse=True)
+        return {
+            "duration_ms": duration_ms,
+            "samples": self.samples,
+            "interval_ms": ms_per_sample,
+            "top_functions": top[:ProfilingConfig.TOP_FUNCTIONS],
+            "stacks": [{"stack": ";".join(stack), "samples": count}
+                       for stack, count in self.stacks.most_common(ProfilingConfig.MAX_STACKS)]
+        }
+
+def track_thread(fn: Callable[[], Any]) -> Callable[[], Any]:
+    """
+    Make fn, when run on another thread, part of the calling request's profile
+    Returns fn unchanged when no profile is being taken
+    """
+    sampler = _active_sampler.get()
+    if sampler is None:
+        return fn
+    
+    def tracked():
+        thread_id = threading.get_ident()
+        sampler.add_thread(thread_id)
+        try:
+            return fn()
+        finally:
+            sampler.remove_thread(thread_id)
+    return tracked
+
+def icicle_data(profile: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """Ids, labels, parents and sample counts of a profile's call tree for a plotly icicle chart"""
+    totals: Counter = Counter()
+    for entry in profile["stacks"]:
+        frames = entry["stack"].split(";")
+        for depth in range(1, len(frames) + 1):
+            totals[";".join(frames[:depth])] += entry["samples"]
+    
+    data = {"ids": ["all"], "labels": ["all"], "parents": [""], "values": [sum(e["samples"] for e in profile["stacks"])]}
+    for path, count in totals.items():
+        parent, _, label = path.rpartition(";")
+        data["ids"].append(path)
+        data["labels"].append(label)
+        data["parents"].append(parent or "all")
+        data["values"].append(count)
+    return data
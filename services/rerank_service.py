@@ -0,0 +1,129 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple
+from config.settings import RerankConfig
+
+class RerankService:
+    """Service for reranking retrieved chunks with a CPU cross-encoder"""
+    
+    def __init__(self, model_name: str = RerankConfig.MODEL_NAME,
+                 top_n: int = RerankConfig.TOP_N,
+                 latency_budget_ms: float = RerankConfig.LATENCY_BUDGET_MS,
+                 decisive_margin: float = RerankConfig.DECISIVE_MARGIN,
+                 cache_size: int = RerankConfig.CACHE_SIZE,
+                 initial_ms_per_pair: float = RerankConfig.INITIAL_MS_PER_PAIR):
+        self.model_name = model_name
+        self.top_n = top_n
+        self.latency_budget_ms = latency_budget_ms
+        self.decisive_margin = decisive_margin
+        self.cache_size = cache_size
+        self.model = None
+        # Shared by every thread using this service: server workers and the tenant unload callback
+        self._cache: "OrderedDict[Tuple[str, str, Any], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Seeded so the latency budget also holds for the first, uncached call
+        self._ms_per_pair: float = initial_ms_per_pair
+        self._timed = False
+    
+    def _load_model(self):
+        """Lazily load the cross-encoder so disabled reranking costs nothing"""
+        if self.model is None:
+            from sentence_transformers import CrossEncoder
+            self.model = CrossEncoder(self.model_name, device="cpu")
+        return self.model
+    
+    def evict_tenant(self, tenant: str) -> None:
+        """Drop cached scores of an unloaded tenant (corpus keys are (tenant, version))"""
+        with self._lock:
+            for key in [key for key in self._cache if key[2][0] == tenant]:
+                del self._cache[key]
+    
+    def is_decisive(self, candidates: List[Dict[str, Any]]) -> bool:
+        """Check whether dense distances already separate the top N from the rest"""
+        if len(candidates) <= self.top_n:
+            return True
+        gap = candidates[self.top_n]["distance"] - candidates[self.top_n - 1]["distance"]
+        return gap >= self.decisive_margin
+    
+    def rerank(self, query: str, candidates: List[Dict[str, Any]],
+               corpus_key: Any) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Score (query, chunk) pairs in one batch and keep the best N
+        Returns: (kept candidates, stats)
+        """
+        start = time.perf_counter()
+        stats = {
+            "candidates": len(candidates),
+            "skipped": False,
+            "cache_hits": 0,
+            "scored": 0,
+            "trimmed": 0,
+            "elapsed_ms": 0.0
+        }
+        
+        if self.is_decisive(candidates):
+            stats["skipped"] = True
+            stats["elapsed_ms"] = (time.perf_counter() - start) * 1000
+            return candidates[:self.top_n], stats
+        
+        query_hash = hashlib.sha256(query.strip().lower().encode("utf-8")).hexdigest()
+        scores: Dict[str, float] = {}
+        missing = []
+        
+        with self._lock:
+            for candidate in candidates:
+                key = (query_hash, candidate["id"], corpus_key)
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[candidate["id"]] = self._cache[key]
+                    stats["cache_hits"] += 1
+                else:
+                    missing.append(candidate)
+            ms_per_pair = self._ms_per_pair
+        
+        # Candidates arrive in dense order, so trimming drops the weakest uncached pairs
+        if missing:
+            affordable = max(1, int(self.latency_budget_ms / ms_per_pair))
+            if len(missing) > affordable:
+                stats["trimmed"] = len(missing) - affordable
+                missing = missing[:affordable]
+        
+        if missing:
+            model = self._load_model()
+            score_start = time.perf_counter()
+            raw_scores = model.predict(
+                [(query, candidate["document"]) for candidate in missing],
+                batch_size=len(missing),
+                show_progress_bar=False
+            )
+            score_ms = (time.perf_counter() - score_start) * 1000
+            
+            with self._lock:
+                measured = score_ms / len(missing)
+                if self._timed:
+                    self._ms_per_pair = 0.8 * self._ms_per_pair + 0.2 * measured
+                else:
+                    self._ms_per_pair, self._timed = measured, True
+                for candidate, score in zip(missing, raw_scores):
+                    score = float(score)
+                    scores[candidate["id"]] = score
+                    self._cache[(query_hash, candidate["id"], corpus_key)] = score
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            stats["scored"] = len(missing)
+        
+        # Scored candidates first by cross-encoder score, trimmed ones keep dense order
+        scored = sorted(
+            (c for c in candidates if c["id"] in scores),
+            key=lambda c: scores[c["id"]],
+            reverse=True
+        )
+        unscored = [c for c in candidates if c["id"] not in scores]
+        kept = []
+        for candidate in (scored + unscored)[:self.top_n]:
+            kept.append({**candidate, "rerank_score": scores.get(candidate["id"])})
+        
+        stats["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        return kept, stats
@@ -0,0 +1,223 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List
+from config.settings import ResilienceConfig
+from services.profiler import track_thread
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call does not finish within its time budget"""
+
+class StreamCancelled(Exception):
+    """Raised by a stream's text callback once nobody is waiting for the rest of the stream"""
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its dependency's circuit is open"""
+
+class BulkheadFullError(Exception):
+    """Raised when a call is rejected because its dependency's worker threads are all busy"""
+
+class Deadline:
+    """End-to-end time limit of one request, split into per-agent budgets"""
+    
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+    
+    def remaining(self) -> float:
+        """Seconds left before the deadline"""
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def expired(self) -> bool:
+        """Whether the deadline has passed"""
+        return self.remaining() <= 0.0
+    
+    def budget(self, cap: float, reserve: float = 0.0) -> float:
+        """Time an agent may use: its cap, limited by what is left after reserving for later agents"""
+        return max(0.0, min(cap, self.remaining() - reserve))
+
+class CircuitBreaker:
+    """Fail fast after repeated errors of a dependency, probing again after a cool-down"""
+    
+    def __init__(self, name: str,
+                 failure_threshold: int = ResilienceConfig.BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = ResilienceConfig.BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """closed, open, or half_open once the cool-down has passed"""
+        with self._lock:
+            return self._state()
+    
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+    
+    def is_open(self) -> bool:
+        """Whether calls are currently rejected, without consuming the half-open probe"""
+        return self.state == "open"
+    
+    def allow(self) -> bool:
+        """Whether a call may proceed; in half-open state only one probe call is let through"""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+    
+    def record_success(self) -> None:
+        """Close the circuit after a successful call"""
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+    
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit at the threshold"""
+        with self._lock:
+            self.failures += 1
+            # A failed probe re-opens the circuit for another cool-down
+            if self._probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.trips += 1
+                self.opened_at = time.monotonic()
+            self._probing = False
+    
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn through the breaker, raising CircuitOpenError while the circuit is open"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit open after {self.failures} consecutive failures")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Current state and failure counters"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self._state(),
+                "consecutive_failures": self.failures,
+                "trips": self.trips,
+                "rejected": self.rejected
+            }
+
+# Breakers are process-wide per dependency: every session talks to the same Bedrock
+# endpoint and the same in-process Chroma store, so they share each other's failures
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide circuit breaker of a named dependency"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+def get_breaker_stats() -> List[Dict[str, Any]]:
+    """Stats of every breaker created so far"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [breaker.get_stats() for breaker in breakers]
+
+class Bulkhead:
+    """
+    Bounded worker pool of one dependency
+    Timed-out calls cannot be cancelled once running, so each dependency gets its own pool:
+    calls stuck in one only use up that dependency's threads, and a full pool rejects new
+    calls at once instead of queueing them behind the stuck ones
+    """
+    
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-call")
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._lock = threading.Lock()
+        self.busy = 0
+        self.timed_out = 0
+        self.rejected = 0
+    
+    def call(self, fn: Callable[[], Any], timeout: float) -> Any:
+        """
+        Run fn on one of the pool's threads and wait at most timeout seconds for it
+        Raises BulkheadFullError when every thread is busy
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise BulkheadFullError(f"all {self.max_workers} {self.name} worker threads busy")
+        with self._lock:
+            self.busy += 1
+        
+        def run():
+            try:
+                return fn()
+            finally:
+                with self._lock:
+                    self.busy -= 1
+                self._slots.release()
+        
+        future = self._executor.submit(track_thread(run))
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            # The call keeps its thread until it returns on its own; only this pool is short of it
+            with self._lock:
+                self.timed_out += 1
+            raise DeadlineExceeded(f"exceeded {timeout:.1f}s budget")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Thread occupancy and counters"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "busy": self.busy,
+                "timed_out": self.timed_out,
+                "rejected": self.rejected
+            }
+
+_bulkheads: Dict[str, Bulkhead] = {}
+_bulkheads_lock = threading.Lock()
+
+def get_bulkhead(name: str) -> Bulkhead:
+    """Process-wide worker pool of a named dependency, sized by ResilienceConfig.POOL_SIZES"""
+    with _bulkheads_lock:
+        if name not in _bulkheads:
+            _bulkheads[name] = Bulkhead(name, ResilienceConfig.POOL_SIZES.get(
+                name, ResilienceConfig.POOL_SIZES["local"]
+            ))
+        return _bulkheads[name]
+
+def get_bulkhead_stats() -> List[Dict[str, Any]]:
+    """Stats of every worker pool created so far"""
+    with _bulkheads_lock:
+        bulkheads = list(_bulkheads.values())
+    return [bulkhead.get_stats() for bulkhead in bulkheads]
+
+def call_with_timeout(fn: Callable[[], Any], timeout: float, dependency: str = "local") -> Any:
+    """
+    Run fn on the dependency's worker pool and wait at most timeout seconds for it
+    A timed-out call keeps running in the background until it returns on its own
+    """
+    return get_bulkhead(dependency).call(fn, timeout)
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from config.settings import RetrievalCacheConfig
+
+class RetrievalCache:
+    """LRU caches of query embeddings and of ranked retrieval results per corpus version"""
+    
+    def __init__(self, max_entries: int = RetrievalCacheConfig.MAX_ENTRIES,
+                 embedding_cache_size: int = RetrievalCacheConfig.EMBEDDING_CACHE_SIZE,
+                 quantization_step: float = RetrievalCacheConfig.QUANTIZATION_STEP):
+        self.max_entries = max_entries
+        self.embedding_cache_size = embedding_cache_size
+        self.quantization_step = quantization_step
+        self._results: "OrderedDict[Tuple[Any, ...], List[Tuple[str, float]]]" = OrderedDict()
+        self._embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.embedding_hits = 0
+        self.embedding_misses = 0
+        self.saved_ms = 0.0
+        self._miss_ms: Optional[float] = None
+    
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return ' '.join(query.lower().split())
+    
+    def get_embedding(self, query: str) -> Optional[List[float]]:
+        """Cached embedding of a query, ignoring case and whitespace differences"""
+        key = self._normalize(query)
+        with self._lock:
+            embedding = self._embeddings.get(key)
+            if embedding is None:
+                self.embedding_misses += 1
+                return None
+            self._embeddings.move_to_end(key)
+            self.embedding_hits += 1
+            return embedding
+    
+    def put_embedding(self, query: str, embedding: List[float]) -> None:
+        """Remember a query embedding"""
+        with self._lock:
+            self._embeddings[self._normalize(query)] = embedding
+            while len(self._embeddings) > self.embedding_cache_size:
+                self._embeddings.popitem(last=False)
+    
+    def key(self, query_embedding, corpus_key: Tuple[str, int], n_results: int,
+            filters: Optional[Dict[str, Any]] = None) -> Tuple[Any, ...]:
+        """Cache key of a search: the quantized embedding, so near-identical vectors share an entry"""
+        quantized = np.round(np.asarray(query_embedding, dtype=np.float32) / self.quantization_step)
+        digest = hashlib.blake2b(quantized.astype(np.int16).tobytes(), digest_size=16).hexdigest()
+        scope = json.dumps(filters, sort_keys=True, default=sorted) if filters else ""
+        return (corpus_key, n_results, scope, digest)
+    
+    def get(self, key: Tuple[Any, ...]) -> Optional[List[Tuple[str, float]]]:
+        """Ranked (chunk id, distance) pairs of a cached search"""
+        with self._lock:
+            ranked = self._results.get(key)
+            if ranked is not None:
+                self._results.move_to_end(key)
+            return ranked
+    
+    def put(self, key: Tuple[Any, ...], ranked: List[Tuple[str, float]]) -> None:
+        """Store a search result, evicting the least recently used entries"""
+        with self._lock:
+            self._results[key] = ranked
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+    
+    def discard(self, key: Tuple[Any, ...]) -> None:
+        """Drop an entry whose chunks are no longer in the collection"""
+        with self._lock:
+            self._results.pop(key, None)
+    
+    def evict_tenant(self, tenant: str) -> None:
+        """Drop every cached search of an unloaded tenant"""
+        with self._lock:
+            for key in [key for key in self._results if key[0][0] == tenant]:
+                del self._results[key]
+    
+    def record_miss(self, elapsed_ms: float) -> None:
+        """Count an uncached search and track its average cost"""
+        with self._lock:
+            self.misses += 1
+            self._miss_ms = elapsed_ms if self._miss_ms is None else 0.9 * self._miss_ms + 0.1 * elapsed_ms
+    
+    def record_hit(self, elapsed_ms: float) -> None:
+        """Count a cached search and the time it saved against the average uncached search"""
+        with self._lock:
+            self.hits += 1
+            if self._miss_ms is not None:
+                self.saved_ms += max(0.0, self._miss_ms - elapsed_ms)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rates and time saved since start"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            embedding_lookups = self.embedding_hits + self.embedding_misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_ms": self.saved_ms,
+                "embedding_hit_rate": self.embedding_hits / embedding_lookups if embedding_lookups else 0.0,
+                "entries": len(self._results)
+            }
@@ -1,68 +1,433 @@
+import re
+import json
+import time
+import weakref
+import itertools
+import threading
 import chromadb
+import numpy as np
+from collections import OrderedDict, deque
 from sentence_transformers import SentenceTransformer
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, Callable
 from datetime import datetime
+from chromadb.config import Settings
+from config.settings import VectorDBConfig, EmbeddingServerConfig, RetrievalCacheConfig
+from services.resilience import get_breaker
+from services.retrieval_cache import RetrievalCache
+
+# Corpus versions are process-wide per collection: every VectorDBService in the process
+# (one per Streamlit session) shares the same in-process Chroma store, so their cache
+# keys must agree. Versions are unique across collections and never reused.
+_corpus_versions: Dict[str, int] = {}
+_corpus_versions_lock = threading.Lock()
+_version_counter = itertools.count(1)
+# Shared for the same reason: keys include the process-wide corpus version
+_retrieval_cache = RetrievalCache()
+# Corpus stats per collection name as (corpus version, stats); a version bump invalidates them
+_corpus_stats: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+_corpus_stats_lock = threading.Lock()
+# Loaded tenant indexes per collection name, least recently used first. Process-wide so the
+# loaded-tenant limit and the per-tenant metrics cover every session, not each one separately
+_tenants: "OrderedDict[str, TenantIndex]" = OrderedDict()
+_tenants_lock = threading.RLock()
+# Callbacks run with the tenant name when its index is unloaded, held weakly so a closed
+# session's caches do not stay registered
+_unload_listeners: List[Callable[[], Optional[Callable[[str], None]]]] = []
+
+def _current_corpus_version(collection_name: str) -> int:
+    """Current corpus version of a collection"""
+    with _corpus_versions_lock:
+        if collection_name not in _corpus_versions:
+            _corpus_versions[collection_name] = next(_version_counter)
+        return _corpus_versions[collection_name]
+
+def _bump_corpus_version(collection_name: str) -> int:
+    """Mark a collection's contents as changed"""
+    with _corpus_versions_lock:
+        _corpus_versions[collection_name] = next(_version_counter)
+        return _corpus_versions[collection_name]
+
+class TenantIndex:
+    """Loaded collection and usage counters for one tenant"""
+    
+    def __init__(self, name: str, collection):
+        self.name = name
+        self.collection = collection
+        self._chunk_count = collection.count()
+        self._counted_version = self.corpus_version
+        self.embedding_dim = 0
+        self.query_count = 0
+        self.query_latencies_ms = deque(maxlen=VectorDBConfig.LATENCY_WINDOW)
+        self.last_used = time.time()
+    
+    @property
+    def corpus_version(self) -> int:
+        """Corpus version shared by every service using this collection"""
+        return _current_corpus_version(self.collection.name)
+    
+    def bump_version(self) -> int:
+        """Record that this tenant's corpus changed"""
+        return _bump_corpus_version(self.collection.name)
+    
+    def is_stale(self) -> bool:
+        """Whether the collection changed since this index last counted it"""
+        return self._counted_version != self.corpus_version
+    
+    @property
+    def chunk_count(self) -> int:
+        """Chunk count, recounted when another service changed the collection"""
+        version = self.corpus_version
+        if version != self._counted_version:
+            self._chunk_count = self.collection.count()
+            self._counted_version = version
+        return self._chunk_count
+    
 
 class VectorDBService:
     """Service for vector database operations"""
     
     def __init__(self):
         self.client: Optional[chromadb.Client] = None
-        self.collection = None
+        # A SentenceTransformer, or an EmbeddingClient with the same encode interface
         self.embedding_model: Optional[SentenceTransformer] = None
-        
-    def initialize(self, collection_name: str = "documents", 
+        self.collection_name = VectorDBConfig.COLLECTION_NAME
+        self.active_tenant = VectorDBConfig.DEFAULT_TENANT
+        self._lock = threading.RLock()
+        self.breaker = get_breaker("vector_db")
+        self.retrieval_cache = _retrieval_cache if RetrievalCacheConfig.ENABLED else None
+    
+    def initialize(self, collection_name: str = "documents",
                    model_name: str = "all-MiniLM-L6-v2") -> None:
         """Initialize ChromaDB and embedding model"""
-        self.client = chromadb.Client()
-        self.embedding_model = SentenceTransformer(model_name)
+        # Only a persistent client can release an unloaded tenant's index and reload it from disk;
+        # the segment cache bounds the memory of loaded indexes (Chroma 1.x's Rust backend keeps
+        # its own LRU of open indexes instead)
+        if VectorDBConfig.PERSIST_DIRECTORY:
+            self.client = chromadb.PersistentClient(
+                path=VectorDBConfig.PERSIST_DIRECTORY,
+                settings=Settings(
+                    chroma_segment_cache_policy="LRU",
+                    chroma_memory_limit_bytes=VectorDBConfig.SEGMENT_CACHE_MB * 1024 * 1024
+                )
+            )
+        else:
+            self.client = chromadb.Client()
+        # With the embedding server, every session shares one model and concurrent requests batch together
+        if EmbeddingServerConfig.ENABLED:
+            # Imported here so `python -m services.embedding_server` does not load the module twice
+            from services.embedding_server import get_embedding_client
+            self.embedding_model = get_embedding_client()
+        else:
+            self.embedding_model = SentenceTransformer(model_name)
+        self.collection_name = collection_name
+        self._get_tenant(VectorDBConfig.DEFAULT_TENANT, create=True)
+    
+    @staticmethod
+    def normalize_tenant(tenant: str) -> str:
+        """Normalize a tenant name into a collection-safe identifier"""
+        tenant = re.sub(r'[^a-z0-9_-]+', '-', (tenant or "").strip().lower())[:30].strip('-_')
+        return tenant or VectorDBConfig.DEFAULT_TENANT
+    
+    def set_active_tenant(self, tenant: str) -> str:
+        """Select the tenant used when a call does not name one"""
+        self.active_tenant = self.normalize_tenant(tenant)
+        return self.active_tenant
+    
+    def tenant_collection_name(self, tenant: str) -> str:
+        """Collection name for a tenant; the default tenant keeps the legacy name"""
+        if tenant == VectorDBConfig.DEFAULT_TENANT:
+            return self.collection_name
+        return f"{self.collection_name}__{tenant}"
+    
+    @staticmethod
+    def add_unload_listener(callback: Callable[[str], None]) -> None:
+        """Register a callback invoked with the tenant name when its index is unloaded"""
+        ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+        with _tenants_lock:
+            _unload_listeners.append(ref)
+    
+    def _open_collection(self, collection_name: str, create: bool):
+        """Existing collection by name, or None; created only when asked"""
+        if create:
+            return self.client.get_or_create_collection(name=collection_name)
+        try:
+            return self.client.get_collection(name=collection_name)
+        except Exception:
+            return None
+    
+    def _get_tenant(self, tenant: Optional[str], create: bool = False) -> Optional[TenantIndex]:
+        """
+        Return the tenant's loaded index, loading it and unloading cold tenants as needed
+        Returns None for a tenant without a collection unless create is set
+        """
+        if not self.client:
+            return None
+        name = self.normalize_tenant(tenant) if tenant else self.active_tenant
+        collection_name = self.tenant_collection_name(name)
         
+        unloaded = []
+        with _tenants_lock:
+            index = _tenants.get(collection_name)
+            if index is None:
+                collection = self._open_collection(collection_name, create)
+                if collection is None:
+                    return None
+                index = TenantIndex(name, collection)
+                if self.embedding_model:
+                    index.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
+                _tenants[collection_name] = index
+                unloaded = self._unload_cold_tenants(keep=collection_name)
+            else:
+                _tenants.move_to_end(collection_name)
+                if index.is_stale():
+                    # Another session may have cleared and recreated the collection
+                    collection = self._open_collection(collection_name, create)
+                    if collection is None:
+                        del _tenants[collection_name]
+                        return None
+                    index.collection = collection
+            index.last_used = time.time()
+        for unloaded_name in unloaded:
+            self._release_tenant(unloaded_name)
+        return index
+    
+    @staticmethod
+    def _unload_cold_tenants(keep: str) -> List[str]:
+        """Drop least recently used tenant indexes beyond the loaded-tenant limit; returns their names"""
+        unloaded = []
+        while len(_tenants) > max(1, VectorDBConfig.MAX_LOADED_TENANTS):
+            collection_name = next(iter(_tenants))
+            if collection_name == keep:
+                _tenants.move_to_end(collection_name)
+                continue
+            unloaded.append(_tenants.pop(collection_name).name)
+            with _corpus_stats_lock:
+                _corpus_stats.pop(collection_name, None)
+        return unloaded
+    
+    @staticmethod
+    def _release_tenant(tenant: str) -> None:
+        """Evict an unloaded tenant from the shared retrieval cache and every registered cache"""
+        _retrieval_cache.evict_tenant(tenant)
+        with _tenants_lock:
+            callbacks = [ref() for ref in _unload_listeners]
+            _unload_listeners[:] = [ref for ref, callback in zip(_unload_listeners, callbacks) if callback]
+        for callback in callbacks:
+            if callback:
+                callback(tenant)
+    
+    @property
+    def collection(self):
+        """Collection of the active tenant"""
+        index = self._get_tenant(None)
+        return index.collection if index else None
+    
+    @property
+    def corpus_version(self) -> int:
+        """Corpus version of the active tenant"""
+        index = self._get_tenant(None)
+        return index.corpus_version if index else 0
+    
+    def tenant_exists(self, tenant: Optional[str]) -> bool:
+        """Whether a tenant's collection exists; never creates it"""
+        if not self.client:
+            return False
+        name = self.normalize_tenant(tenant) if tenant else self.active_tenant
+        if "__" in name:
+            return False
+        with _tenants_lock:
+            if self.tenant_collection_name(name) in _tenants:
+                return True
+        return name in self.list_tenants()
+    
+    def list_tenants(self) -> List[str]:
+        """Names of the tenants whose collections exist, leaving out staging and retired ones"""
+        if not self.client:
+            return []
+        # Older Chroma versions list Collection objects, newer ones list names
+        names = {getattr(c, "name", c) for c in self.client.list_collections()}
+        prefix = f"{self.collection_name}__"
+        tenants = {
+            name[len(prefix):] for name in names
+            if name.startswith(prefix) and "__" not in name[len(prefix):]
+        }
+        if self.collection_name in names:
+            tenants.add(VectorDBConfig.DEFAULT_TENANT)
+        return sorted(tenants)
+    
+    def create_tenant(self, tenant: str) -> Tuple[bool, str]:
+        """Create a tenant's empty collection; no other call creates tenants"""
+        if not self.client:
+            return False, "Database not initialized"
+        name = self.normalize_tenant(tenant)
+        if "__" in name:
+            return False, "Tenant names cannot contain '__'"
+        if self.tenant_exists(name):
+            return False, f"Tenant '{name}' already exists"
         try:
-            self.collection = self.client.get_collection(name=collection_name)
-        except:
-            self.collection = self.client.create_collection(name=collection_name)
+            self._get_tenant(name, create=True)
+            return True, f"Tenant '{name}' created"
+        except Exception as e:
+            return False, f"Error creating tenant: {str(e)}"
+    
+    def get_collection(self, tenant: Optional[str] = None):
+        """Collection of the given tenant (active tenant by default)"""
+        index = self._get_tenant(tenant)
+        return index.collection if index else None
     
-    def clear(self) -> Tuple[bool, str]:
-        """Clear all documents from the database"""
+    def corpus_key(self, tenant: Optional[str] = None) -> Tuple[str, int]:
+        """Cache key component identifying a tenant's current corpus"""
+        index = self._get_tenant(tenant)
+        if not index:
+            return (self.normalize_tenant(tenant) if tenant else self.active_tenant, 0)
+        return (index.name, index.corpus_version)
+    
+    def clear(self, tenant: Optional[str] = None) -> Tuple[bool, str]:
+        """Clear all documents of one tenant from the database"""
         try:
-            if self.client and self.collection:
-                self.client.delete_collection(name=self.collection.name)
-                self.collection = self.client.create_collection(name="documents")
+            index = self._get_tenant(tenant)
+            if index:
+                with self._lock:
+                    name = self.tenant_collection_name(index.name)
+                    self.client.delete_collection(name=name)
+                    index.collection = self.client.create_collection(name=name)
+                    index.bump_version()
                 return True, "Vector database cleared successfully"
-            return False, "Database not initialized"
+            return False, self._missing_tenant_message(tenant)
         except Exception as e:
             return False, f"Error clearing database: {str(e)}"
     
-    def add_documents(self, documents: List[str], metadatas: List[Dict[str, Any]] = None) -> Tuple[bool, str]:
-        """Add documents to the vector database"""
+    @staticmethod
+    def make_chunk_id(source: str, chunk_index: int) -> str:
+        """Build the stable ID of a chunk from its source file and position"""
+        return f"{source}::{chunk_index}"
+    
+    def _missing_tenant_message(self, tenant: Optional[str]) -> str:
+        """Error message for a call on a tenant that could not be loaded"""
+        if not self.client:
+            return "Database not initialized"
+        return f"Unknown tenant '{self.normalize_tenant(tenant) if tenant else self.active_tenant}'"
+    
+    def stored_bytes(self, documents: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Bytes chunks occupy in the store: UTF-8 texts, JSON metadata and float32 embeddings"""
+        embedding_dim = self.embedding_model.get_sentence_embedding_dimension() if self.embedding_model else 0
+        text_bytes = sum(len(document.encode("utf-8")) for document in documents)
+        metadata_bytes = sum(len(json.dumps(metadata or {}, separators=(",", ":"))) for metadata in metadatas or [])
+        return text_bytes + metadata_bytes + len(documents) * embedding_dim * 4
+    
+    def _check_quota(self, index: TenantIndex, documents: List[str],
+                     metadatas: Optional[List[Dict[str, Any]]]) -> Optional[str]:
+        """Return an error message if adding chunks would exceed the tenant's quotas"""
+        stats = self.get_corpus_stats(index.name)
+        return self.check_quota(
+            index.name, stats["chunks"] + len(documents),
+            stats["stored_bytes"] + self.stored_bytes(documents, metadatas)
+        )
+    
+    def check_quota(self, tenant: Optional[str], chunk_count: int, stored_bytes: int) -> Optional[str]:
+        """Return an error message if a tenant corpus of chunk_count chunks and stored_bytes exceeds its quotas"""
+        name = self.normalize_tenant(tenant) if tenant else self.active_tenant
+        if chunk_count > VectorDBConfig.MAX_CHUNKS_PER_TENANT:
+            return (f"Tenant '{name}' chunk quota exceeded: "
+                    f"{chunk_count} > {VectorDBConfig.MAX_CHUNKS_PER_TENANT}")
+        stored_mb = stored_bytes / (1024 * 1024)
+        if stored_mb > VectorDBConfig.MAX_STORED_MB_PER_TENANT:
+            return (f"Tenant '{name}' storage quota exceeded: "
+                    f"{stored_mb:.1f}MB > {VectorDBConfig.MAX_STORED_MB_PER_TENANT}MB")
+        return None
+    
+    def staging_collection_name(self, tenant: Optional[str], staging_id: str) -> str:
+        """Name of the collection an ingestion run fills before it replaces the live one"""
+        name = self.normalize_tenant(tenant) if tenant else self.active_tenant
+        return f"{self.tenant_collection_name(name)}__staging_{staging_id}"
+    
+    def get_staging_collection(self, tenant: Optional[str], staging_id: str):
+        """Get or create the staging collection of an ingestion run"""
+        return self.client.get_or_create_collection(name=self.staging_collection_name(tenant, staging_id))
+    
+    def drop_staging_collection(self, tenant: Optional[str], staging_id: str) -> None:
+        """Delete an abandoned staging collection"""
+        try:
+            self.client.delete_collection(name=self.staging_collection_name(tenant, staging_id))
+        except Exception:
+            pass
+    
+    def promote_staging(self, tenant: Optional[str], staging_id: str) -> None:
+        """Swap a completed staging collection in as the tenant's live collection"""
+        name = self.normalize_tenant(tenant) if tenant else self.active_tenant
+        live_name = self.tenant_collection_name(name)
+        retired_name = f"{live_name}__retired"
+        
+        with self._lock:
+            staging = self.client.get_collection(name=self.staging_collection_name(name, staging_id))
+            try:
+                self.client.delete_collection(name=retired_name)
+            except Exception:
+                pass
+            
+            # Rename rather than copy so the swap is near-instant and queries keep
+            # hitting the previous collection until the last moment
+            try:
+                self.client.get_collection(name=live_name).modify(name=retired_name)
+                retired = True
+            except Exception:
+                retired = False
+            staging.modify(name=live_name)
+            if retired:
+                self.client.delete_collection(name=retired_name)
+            
+            _bump_corpus_version(live_name)
+            with _tenants_lock:
+                if live_name in _tenants:
+                    _tenants[live_name].collection = staging
+    
+    def add_documents(self, documents: List[str], metadatas: List[Dict[str, Any]] = None,
+                      ids: List[str] = None,
+                      embeddings: List[List[float]] = None,
+                      tenant: Optional[str] = None) -> Tuple[bool, str]:
+        """Add documents to the vector database, reusing precomputed embeddings when given"""
         try:
-            if not self.collection or not self.embedding_model:
-                return False, "Database not initialized"
-            embeddings = [self.embedding_model.encode(doc).tolist() for doc in documents]
+            index = self._get_tenant(tenant)
+            if not index or not self.embedding_model:
+                return False, self._missing_tenant_message(tenant)
+            quota_error = self._check_quota(index, documents, metadatas)
+            if quota_error:
+                return False, quota_error
+            if embeddings is None:
+                embeddings = self.embed_texts(documents)
             
             # Generate IDs
-            timestamp_ms = int(datetime.now().timestamp() * 1000)
-            ids = [f"doc_{i}_{timestamp_ms}" for i in range(len(documents))]
+            if ids is None:
+                timestamp_ms = int(datetime.now().timestamp() * 1000)
+                ids = [f"doc_{i}_{timestamp_ms}" for i in range(len(documents))]
             
             # Add to collection
-            self.collection.add(
-                embeddings=embeddings,
-                documents=documents,
-                metadatas=metadatas or [{} for _ in documents],
-                ids=ids
-            )
+            with self._lock:
+                index.collection.add(
+                    embeddings=embeddings,
+                    documents=documents,
+                    metadatas=metadatas or [{} for _ in documents],
+                    ids=ids
+                )
+                index.bump_version()
             
             return True, f"Added {len(documents)} documents successfully"
         except Exception as e:
             return False, f"Error adding documents: {str(e)}"
     
-    def get_all_documents(self) -> List[str]:
-        """Retrieve all documents from the database"""
+    def get_all_documents(self, tenant: Optional[str] = None,
+                          filters: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Retrieve all documents from the database, or all matching the metadata filters"""
         try:
-            if not self.collection:
+            index = self._get_tenant(tenant)
+            if not index:
                 return []
             
-            results = self.collection.get()
+            start = time.perf_counter()
+            results = self.breaker.call(
+                index.collection.get, where=self.build_where(filters), include=["documents"]
+            )
+            self._record_query(index, start)
             if results and 'documents' in results:
                 return results['documents']
             return []
@@ -70,33 +435,313 @@ class VectorDBService:
             print(f"Error retrieving documents: {str(e)}")
             return []
     
-    def query_documents(self, query: str, n_results: int = 10) -> List[str]:
-        """Query documents by similarity"""
+    @staticmethod
+    def build_where(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Translate metadata filters into a Chroma where clause
+        Each key must match its value; a list or tuple value matches any of its items,
+        e.g. {"source": ["a.pdf", "b.pdf"], "chunk_type": "paragraph"}
+        """
+        if not filters:
+            return None
+        clauses = [
+            {key: {"$in": list(value)} if isinstance(value, (list, tuple, set)) else value}
+            for key, value in sorted(filters.items())
+        ]
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+    
+    def query_documents(self, query: str, n_results: int = 10,
+                        tenant: Optional[str] = None,
+                        filters: Optional[Dict[str, Any]] = None,
+                        expand: int = 0) -> List[str]:
+        """
+        Query documents by similarity
+        filters restricts the search to chunks with matching metadata (see build_where);
+        expand adds the expand chunks before and after each hit, returned in document order
+        """
+        candidates = self.query_with_scores(query, n_results, tenant=tenant, filters=filters)
+        if expand > 0:
+            candidates = self.expand_neighbors(candidates, expand, tenant, filters)
+        return [candidate["document"] for candidate in candidates]
+    
+    def encode_query(self, query: str) -> List[float]:
+        """Embed a single query string, reusing the embedding of a repeated query"""
+        if self.retrieval_cache:
+            embedding = self.retrieval_cache.get_embedding(query)
+            if embedding is not None:
+                return embedding
+        embedding = self.embedding_model.encode(query, normalize_embeddings=True).tolist()
+        if self.retrieval_cache:
+            self.retrieval_cache.put_embedding(query, embedding)
+        return embedding
+    
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts in one encode call, as unit vectors like every embedding here"""
+        if not texts:
+            return []
+        return self.embedding_model.encode(texts, show_progress_bar=False, normalize_embeddings=True).tolist()
+    
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts into a float32 matrix, avoiding a Python float object per value"""
+        if not texts:
+            return np.zeros((0, self.embedding_model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.asarray(
+            self.embedding_model.encode(texts, show_progress_bar=False, normalize_embeddings=True), dtype=np.float32
+        )
+    
+    def query_with_scores(self, query: str, n_results: int = 10,
+                          query_embedding: Optional[List[float]] = None,
+                          tenant: Optional[str] = None,
+                          filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Query documents by similarity, keeping chunk IDs, metadata and distances
+        With filters, Chroma narrows the candidates through its metadata index before scoring
+        """
         try:
-            if not self.collection or not self.embedding_model:
+            index = self._get_tenant(tenant)
+            if not index or not self.embedding_model:
                 return []
             
-            query_embedding = self.embedding_model.encode(query).tolist()
-            results = self.collection.query(
+            n_results = min(n_results, index.chunk_count)
+            if n_results <= 0:
+                return []
+            
+            start = time.perf_counter()
+            if query_embedding is None:
+                query_embedding = self.encode_query(query)
+            
+            cache_key = None
+            if self.retrieval_cache:
+                cache_key = self.retrieval_cache.key(
+                    query_embedding, (index.name, index.corpus_version), n_results, filters
+                )
+                cached = self._get_cached_results(index, cache_key)
+                if cached is not None:
+                    self.retrieval_cache.record_hit((time.perf_counter() - start) * 1000)
+                    self._record_query(index, start)
+                    return cached
+            
+            results = self.breaker.call(
+                index.collection.query,
                 query_embeddings=[query_embedding],
-                n_results=n_results
+                n_results=n_results,
+                where=self.build_where(filters),
+                include=["documents", "metadatas", "distances"]
             )
+            self._record_query(index, start)
             
-            if results and 'documents' in results:
-                return results['documents'][0]
-            return []
+            if not results or not results.get('ids'):
+                return []
+            candidates = [
+                {"id": chunk_id, "document": doc, "metadata": meta or {}, "distance": distance}
+                for chunk_id, doc, meta, distance in zip(
+                    results['ids'][0], results['documents'][0],
+                    results['metadatas'][0], results['distances'][0]
+                )
+            ]
+            if cache_key is not None:
+                self.retrieval_cache.put(cache_key, [(c["id"], c["distance"]) for c in candidates])
+                self.retrieval_cache.record_miss((time.perf_counter() - start) * 1000)
+            return candidates
         except Exception as e:
             print(f"Error querying documents: {str(e)}")
             return []
     
-    def get_document_count(self) -> int:
-        """Get the number of documents in the database"""
+    def _get_cached_results(self, index: TenantIndex, cache_key) -> Optional[List[Dict[str, Any]]]:
+        """Rebuild a cached ranking from its chunk ids with one get, skipping the similarity search"""
+        ranked = self.retrieval_cache.get(cache_key)
+        if ranked is None:
+            return None
+        results = self.breaker.call(
+            index.collection.get, ids=[chunk_id for chunk_id, _ in ranked], include=["documents", "metadatas"]
+        )
+        chunks = {
+            chunk_id: (doc, meta)
+            for chunk_id, doc, meta in zip(results['ids'], results['documents'], results['metadatas'])
+        }
+        if len(chunks) != len(ranked):
+            # A chunk vanished without a version bump (e.g. a concurrent swap); search again
+            self.retrieval_cache.discard(cache_key)
+            return None
+        return [
+            {"id": chunk_id, "document": chunks[chunk_id][0], "metadata": chunks[chunk_id][1] or {},
+             "distance": distance}
+            for chunk_id, distance in ranked
+        ]
+    
+    def expand_neighbors(self, candidates: List[Dict[str, Any]], window: int = 1,
+                         tenant: Optional[str] = None,
+                         filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Add the window chunks before and after each hit, fetched in one get by their source and
+        chunk_index metadata, so it works whatever IDs the chunks were stored under
+        Neighbors must match the same filters as the hits, so they never add excluded chunks
+        Returns hits and neighbors deduplicated, grouped by source in order of each source's best
+        hit and in chunk order within a source; neighbors have distance None
+        """
+        index = self._get_tenant(tenant)
+        if not index or not candidates or window <= 0:
+            return candidates
+        
+        by_id = {candidate["id"]: candidate for candidate in candidates}
+        hit_positions = {
+            (candidate["metadata"].get("source"), candidate["metadata"].get("chunk_index"))
+            for candidate in candidates
+        }
+        wanted: Dict[str, set] = {}
+        for source, chunk_index in hit_positions:
+            if source is None or not isinstance(chunk_index, int):
+                continue
+            for position in range(max(chunk_index - window, 1), chunk_index + window + 1):
+                if (source, position) not in hit_positions:
+                    wanted.setdefault(source, set()).add(position)
+        
+        if wanted:
+            clauses = [
+                {"$and": [{"source": source}, {"chunk_index": {"$in": sorted(positions)}}]}
+                for source, positions in sorted(wanted.items())
+            ]
+            where = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+            filter_where = self.build_where(filters)
+            if filter_where:
+                where = {"$and": [where, filter_where]}
+            try:
+                # Positions past either end of a document simply match nothing
+                results = self.breaker.call(
+                    index.collection.get, where=where, include=["documents", "metadatas"]
+                )
+                for chunk_id, doc, meta in zip(results['ids'], results['documents'], results['metadatas']):
+                    by_id.setdefault(chunk_id, {"id": chunk_id, "document": doc, "metadata": meta or {},
+                                                "distance": None})
+            except Exception as e:
+                print(f"Error expanding neighbor chunks: {str(e)}")
+        
+        source_rank: Dict[str, int] = {}
+        for candidate in candidates:
+            source_rank.setdefault(candidate["metadata"].get("source", ""), len(source_rank))
+        return sorted(by_id.values(), key=lambda chunk: (
+            source_rank.get(chunk["metadata"].get("source", ""), len(source_rank)),
+            chunk["metadata"].get("chunk_index", 0)
+        ))
+    
+    def get_retrieval_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Hit rate and time saved by the retrieval cache, or None when disabled"""
+        return self.retrieval_cache.get_stats() if self.retrieval_cache else None
+    
+    def _record_query(self, index: TenantIndex, start: float) -> None:
+        """Record a query latency against the tenant"""
+        index.query_count += 1
+        index.query_latencies_ms.append((time.perf_counter() - start) * 1000)
+    
+    def get_tenant_metrics(self) -> List[Dict[str, Any]]:
+        """Per-tenant query latency and storage metrics for the tenants loaded in this process"""
+        metrics = []
+        with _tenants_lock:
+            tenants = list(_tenants.values())
+        for index in tenants:
+            latencies = list(index.query_latencies_ms)
+            metrics.append({
+                "tenant": index.name,
+                "active": index.name == self.active_tenant,
+                "chunks": index.chunk_count,
+                "stored_mb": self.get_corpus_stats(index.name)["stored_bytes"] / (1024 * 1024),
+                "queries": index.query_count,
+                "p50_latency_ms": float(np.percentile(latencies, 50)) if latencies else 0.0,
+                "p95_latency_ms": float(np.percentile(latencies, 95)) if latencies else 0.0,
+                "last_used": datetime.fromtimestamp(index.last_used).strftime('%H:%M:%S')
+            })
+        return metrics
+    
+    def get_embedding_server_stats(self) -> Optional[Dict[str, Any]]:
+        """Batching stats of the shared embedding server, or None when embedding in-process"""
+        if not EmbeddingServerConfig.ENABLED or self.embedding_model is None:
+            return None
         try:
-            if not self.collection:
-                return 0
-            results = self.collection.get()
-            if results and 'documents' in results:
-                return len(results['documents'])
+            return self.embedding_model.get_stats()
+        except Exception as e:
+            print(f"Error reading embedding server stats: {str(e)}")
+            return None
+    
+    def count(self, tenant: Optional[str] = None) -> int:
+        """Number of chunks in a tenant's collection, without fetching any of them"""
+        try:
+            index = self._get_tenant(tenant)
+            return index.chunk_count if index else 0
+        except Exception as e:
+            print(f"Error counting documents: {str(e)}")
             return 0
-        except:
-            return 0
\ No newline at end of file
+    
+    def get_document_count(self, tenant: Optional[str] = None) -> int:
+        """Get the number of documents in the database"""
+        return self.count(tenant)
+    
+    def get_corpus_stats(self, tenant: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Chunk count, per-source chunk counts and stored bytes (see stored_bytes) of a tenant's
+        corpus, cached until the corpus version changes
+        """
+        index = self._get_tenant(tenant)
+        if not index:
+            return {"chunks": 0, "sources": {}, "stored_bytes": 0, "version": 0}
+        version = index.corpus_version
+        collection_name = index.collection.name
+        with _corpus_stats_lock:
+            cached = _corpus_stats.get(collection_name)
+        if cached and cached[0] == version:
+            return cached[1]
+        
+        sources: Dict[str, int] = {}
+        chunks = 0
+        stored = 0
+        try:
+            for offset in range(0, index.collection.count(), VectorDBConfig.BROWSE_PAGE_SIZE):
+                page = self.breaker.call(
+                    index.collection.get, include=["documents", "metadatas"],
+                    limit=VectorDBConfig.BROWSE_PAGE_SIZE, offset=offset
+                )
+                for metadata in page["metadatas"] or []:
+                    source = (metadata or {}).get("source", "unknown")
+                    sources[source] = sources.get(source, 0) + 1
+                chunks += len(page["ids"])
+                stored += self.stored_bytes(page["documents"] or [], page["metadatas"])
+        except Exception as e:
+            print(f"Error computing corpus stats: {str(e)}")
+            return {"chunks": index.chunk_count, "sources": {},
+                    "stored_bytes": index.chunk_count * index.embedding_dim * 4,
+                    "version": version}
+        
+        stats = {"chunks": chunks, "sources": dict(sorted(sources.items())), "stored_bytes": stored,
+                 "version": version}
+        with _corpus_stats_lock:
+            _corpus_stats[collection_name] = (version, stats)
+        return stats
+    
+    def list_chunks(self, tenant: Optional[str] = None, offset: int = 0, limit: int = 20,
+                    source: Optional[str] = None,
+                    include: Tuple[str, ...] = ("metadatas",)) -> Dict[str, Any]:
+        """
+        One page of chunks, optionally from a single source
+        include picks the fields fetched besides ids ("metadatas", "documents", "embeddings");
+        leave out documents and embeddings when only browsing
+        Returns: dict with ids, the requested fields, offset and the matching total
+        """
+        index = self._get_tenant(tenant)
+        page: Dict[str, Any] = {"ids": [], "offset": offset, "total": 0}
+        if not index:
+            return page
+        try:
+            where = {"source": source} if source else None
+            page_results = self.breaker.call(
+                index.collection.get, where=where, include=list(include), limit=limit, offset=offset
+            )
+            page["ids"] = page_results["ids"]
+            for field in include:
+                values = page_results.get(field)
+                page[field] = list(values) if values is not None else []
+            if source:
+                page["total"] = self.get_corpus_stats(tenant)["sources"].get(source, 0)
+            else:
+                page["total"] = index.chunk_count
+        except Exception as e:
+            print(f"Error listing chunks: {str(e)}")
+        return page
@@ -0,0 +1,45 @@
+import os
+import sys
+import uuid
+import zlib
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import EmbeddingServerConfig, VectorDBConfig
+from services import vector_db_service as vector_db_module
+
+class HashingEncoder:
+    """Deterministic bag-of-words encoder standing in for the sentence transformer"""
+    
+    DIMENSION = 32
+    
+    def __init__(self, model_name: str = "", *args, **kwargs):
+        self.model_name = model_name
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.DIMENSION
+    
+    def _encode_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.DIMENSION, dtype=np.float32)
+        for word in text.lower().split():
+            vector[zlib.crc32(word.encode("utf-8")) % self.DIMENSION] += 1
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            return self._encode_one(texts)
+        return np.array([self._encode_one(text) for text in texts], dtype=np.float32)
+
+@pytest.fixture
+def vector_db(monkeypatch, tmp_path):
+    """Initialized in-memory vector store on a collection of its own, with the hashing encoder"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(vector_db_module, "SentenceTransformer", HashingEncoder)
+    monkeypatch.setattr(EmbeddingServerConfig, "ENABLED", False)
+    monkeypatch.setattr(VectorDBConfig, "PERSIST_DIRECTORY", None)
+    service = vector_db_module.VectorDBService()
+    service.initialize(collection_name=f"test_{uuid.uuid4().hex[:12]}")
+    return service
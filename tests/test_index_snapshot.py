@@ -0,0 +1,78 @@
+import numpy as np
+from services.index_snapshot import IndexSnapshot, SnapshotService
+
+def _add_source(vector_db, tenant, source, texts):
+    ok, message = vector_db.add_documents(
+        texts,
+        metadatas=[{"source": source, "chunk_index": i} for i in range(len(texts))],
+        ids=[vector_db.make_chunk_id(source, i) for i in range(len(texts))],
+        tenant=tenant
+    )
+    assert ok, message
+
+def _contents(vector_db, tenant):
+    collection = vector_db.get_collection(tenant)
+    rows = collection.get(include=["documents", "metadatas", "embeddings"])
+    order = np.argsort(rows["ids"])
+    return (
+        [rows["ids"][i] for i in order],
+        [rows["documents"][i] for i in order],
+        [rows["metadatas"][i] for i in order],
+        np.asarray(rows["embeddings"], dtype=np.float32)[order]
+    )
+
+def test_export_restore_round_trip(vector_db, tmp_path):
+    ok, message = vector_db.create_tenant("acme")
+    assert ok, message
+    _add_source(vector_db, "acme", "a.txt", ["alpha beta gamma", "delta epsilon"])
+    _add_source(vector_db, "acme", "b.txt", ["zeta eta theta"])
+    before = _contents(vector_db, "acme")
+    
+    snapshots = SnapshotService(vector_db, directory=str(tmp_path / "snapshots"))
+    ok, message = snapshots.export("acme")
+    assert ok, message
+    assert snapshots.list_snapshots() == ["acme"]
+    
+    ok, message = vector_db.clear("acme")
+    assert ok, message
+    assert vector_db.count("acme") == 0
+    
+    ok, message = snapshots.restore("acme")
+    assert ok, message
+    after = _contents(vector_db, "acme")
+    assert after[:3] == before[:3]
+    np.testing.assert_allclose(after[3], before[3], rtol=0, atol=1e-6)
+    assert vector_db.count("acme") == 3
+
+def test_export_reuses_unchanged_sources(vector_db, tmp_path):
+    _add_source(vector_db, None, "a.txt", ["alpha beta gamma"])
+    _add_source(vector_db, None, "b.txt", ["zeta eta theta"])
+    snapshots = SnapshotService(vector_db, directory=str(tmp_path / "snapshots"))
+    assert snapshots.export()[0]
+    
+    _add_source(vector_db, None, "b.txt", ["zeta eta theta", "iota kappa"])
+    ok, message = snapshots.export()
+    assert ok, message
+    assert "1 reused and 1 re-read" in message
+    
+    snapshot = IndexSnapshot.open(snapshots.snapshot_path())
+    assert snapshot.header["count"] == 3
+    assert snapshot.header["sources"]["b.txt"]["count"] == 2
+
+def test_restore_rejects_other_embedding_dimension(vector_db, tmp_path):
+    _add_source(vector_db, None, "a.txt", ["alpha beta gamma"])
+    snapshots = SnapshotService(vector_db, directory=str(tmp_path / "snapshots"))
+    assert snapshots.export()[0]
+    
+    vector_db.embedding_model.get_sentence_embedding_dimension = lambda: 64
+    ok, message = snapshots.restore()
+    assert not ok
+    assert "32 dimensions" in message
+    assert vector_db.count() == 1
+
+def test_export_empty_tenant(vector_db, tmp_path):
+    snapshots = SnapshotService(vector_db, directory=str(tmp_path / "snapshots"))
+    ok, message = snapshots.export()
+    assert not ok
+    assert "no documents" in message
+    assert snapshots.list_snapshots() == []
@@ -0,0 +1,54 @@
+from services.retrieval_cache import RetrievalCache
+
+def _add(vector_db, chunks):
+    ok, message = vector_db.add_documents(
+        list(chunks.values()), metadatas=[{"source": chunk_id} for chunk_id in chunks], ids=list(chunks)
+    )
+    assert ok, message
+
+def _use_fresh_cache(vector_db):
+    vector_db.retrieval_cache = RetrievalCache()
+    return vector_db.retrieval_cache
+
+def test_repeated_query_hits_cache(vector_db):
+    cache = _use_fresh_cache(vector_db)
+    _add(vector_db, {"a": "alpha beta", "b": "gamma delta"})
+    
+    first = vector_db.query_with_scores("alpha beta", n_results=2)
+    second = vector_db.query_with_scores("Alpha  beta", n_results=2)
+    assert [c["id"] for c in second] == [c["id"] for c in first]
+    assert [c["document"] for c in second] == [c["document"] for c in first]
+    assert (cache.misses, cache.hits) == (1, 1)
+
+def test_version_bump_invalidates_cached_results(vector_db):
+    cache = _use_fresh_cache(vector_db)
+    _add(vector_db, {"a": "alpha beta", "b": "gamma delta"})
+    version = vector_db.corpus_version
+    assert [c["id"] for c in vector_db.query_with_scores("alpha beta", n_results=5)] == ["a", "b"]
+    
+    _add(vector_db, {"c": "alpha beta alpha"})
+    assert vector_db.corpus_version > version
+    results = vector_db.query_with_scores("alpha beta", n_results=5)
+    assert {c["id"] for c in results} == {"a", "b", "c"}
+    assert (cache.misses, cache.hits) == (2, 0)
+
+def test_clear_invalidates_cached_results(vector_db):
+    cache = _use_fresh_cache(vector_db)
+    _add(vector_db, {"a": "alpha beta"})
+    assert vector_db.query_with_scores("alpha beta", n_results=1)
+    
+    assert vector_db.clear()[0]
+    _add(vector_db, {"g": "gamma delta"})
+    assert [c["id"] for c in vector_db.query_with_scores("alpha beta", n_results=1)] == ["g"]
+    assert cache.hits == 0
+
+def test_evict_tenant_drops_only_that_tenant():
+    cache = RetrievalCache()
+    acme_key = cache.key([0.1, 0.2], ("acme", 1), 5)
+    other_key = cache.key([0.1, 0.2], ("other", 2), 5)
+    cache.put(acme_key, [("a", 0.1)])
+    cache.put(other_key, [("b", 0.2)])
+    
+    cache.evict_tenant("acme")
+    assert cache.get(acme_key) is None
+    assert cache.get(other_key) == [("b", 0.2)]
@@ -0,0 +1,39 @@
+from config.settings import VectorDBConfig
+
+def test_tenants_are_created_explicitly(vector_db):
+    assert vector_db.list_tenants() == [VectorDBConfig.DEFAULT_TENANT]
+    assert not vector_db.tenant_exists("acme")
+    ok, message = vector_db.add_documents(["alpha"], metadatas=[{"source": "a.txt"}], tenant="acme")
+    assert not ok
+    assert "Unknown tenant 'acme'" in message
+    assert not vector_db.tenant_exists("acme")
+    
+    ok, message = vector_db.create_tenant("acme")
+    assert ok, message
+    assert vector_db.tenant_exists("acme")
+    assert vector_db.list_tenants() == ["acme", VectorDBConfig.DEFAULT_TENANT]
+    assert not vector_db.create_tenant("acme")[0]
+
+def test_tenant_names_cannot_reach_staging_collections(vector_db):
+    ok, message = vector_db.create_tenant("acme__staging_x")
+    assert not ok
+    assert "'__'" in message
+    assert not vector_db.tenant_exists("acme__staging_x")
+
+def test_tenants_are_isolated(vector_db):
+    assert vector_db.create_tenant("acme")[0]
+    assert vector_db.add_documents(["alpha beta"], metadatas=[{"source": "a.txt"}], ids=["a"], tenant="acme")[0]
+    assert vector_db.count("acme") == 1
+    assert vector_db.count() == 0
+    assert vector_db.query_with_scores("alpha beta", n_results=1) == []
+
+def test_storage_quota_counts_stored_bytes(vector_db, monkeypatch):
+    documents = ["x" * 4096]
+    metadatas = [{"source": "a.txt"}]
+    assert vector_db.stored_bytes(documents, metadatas) == 4096 + len('{"source":"a.txt"}') + 32 * 4
+    
+    monkeypatch.setattr(VectorDBConfig, "MAX_STORED_MB_PER_TENANT", 4096 / (1024 * 1024))
+    ok, message = vector_db.add_documents(documents, metadatas=metadatas)
+    assert not ok
+    assert "storage quota exceeded" in message
+    assert vector_db.count() == 0
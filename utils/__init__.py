@@ -3,11 +3,13 @@
 from .helpers import (
     get_agent_background_color,
     generate_performance_indicator,
-    format_timestamp
+    format_timestamp,
+    estimate_tokens
 )
 
 __all__ = [
     'get_agent_background_color',
     'generate_performance_indicator',
-    'format_timestamp'
+    'format_timestamp',
+    'estimate_tokens'
 ]
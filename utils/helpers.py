@@ -25,6 +25,11 @@ def generate_performance_indicator():
     return np.random.choice(['🟢', '🟡', '🔴'], p=[0.7, 0.2, 0.1])
 
 
+def estimate_tokens(text: str) -> int:
+    """Estimate token count from word count"""
+    return int(len(text.split()) * 1.3)
+
+
 def format_timestamp():
     """Format current timestamp"""
     return datetime.now().strftime('%H:%M:%S')
\ No newline at end of file